@@ -18,6 +18,9 @@ const DEFAULT_CATEGORIES = {
 };
 
 // Default preferences
+// Quality tier sent with each request, stored apart from the preferences
+const ANALYSIS_MODES = ['fast', 'balanced', 'thorough'];
+
 const DEFAULT_PREFERENCES = {
   default_categories: [],
   custom_keywords: [],
@@ -29,6 +32,7 @@ const DEFAULT_PREFERENCES = {
 class PreferencesManager {
   constructor() {
     this.preferences = { ...DEFAULT_PREFERENCES };
+    this.analysisMode = 'balanced';
     this.isSaving = false; // Add saving state tracking
     this.init();
   }
@@ -43,8 +47,9 @@ class PreferencesManager {
 
   async loadPreferences() {
     try {
-      const result = await chrome.storage.local.get(['userPreferences', 'skipperEnabled']);
+      const result = await chrome.storage.local.get(['userPreferences', 'skipperEnabled', 'analysisMode']);
       this.preferences = { ...DEFAULT_PREFERENCES, ...(result.userPreferences || {}) };
+      this.analysisMode = ANALYSIS_MODES.includes(result.analysisMode) ? result.analysisMode : 'balanced';
 
       // Ensure arrays exist and are valid
       if (!Array.isArray(this.preferences.custom_keywords)) {
@@ -166,6 +171,14 @@ class PreferencesManager {
       });
     });
 
+    // Analysis quality radio buttons - saved on change, used from the next analyzed video
+    document.querySelectorAll('input[name="analysisMode"]').forEach(radio => {
+      radio.addEventListener('change', async (e) => {
+        this.analysisMode = e.target.value;
+        await chrome.storage.local.set({ analysisMode: this.analysisMode });
+      });
+    });
+
     // Action buttons
     document.getElementById('savePreferencesBtn').addEventListener('click', async () => {
       await this.savePreferences();
@@ -354,6 +367,7 @@ class PreferencesManager {
   updateUI() {
     // Update sensitivity radio buttons
     document.querySelector(`input[name="sensitivity"][value="${this.preferences.sensitivity}"]`).checked = true;
+    document.querySelector(`input[name="analysisMode"][value="${this.analysisMode}"]`).checked = true;
 
     // Update quick stats
     const activeCategoriesCount = this.preferences.default_categories.length;
@@ -374,6 +388,8 @@ class PreferencesManager {
   async resetPreferences() {
     if (confirm('Are you sure you want to reset all preferences to defaults?')) {
       this.preferences = { ...DEFAULT_PREFERENCES };
+      this.analysisMode = 'balanced';
+      await chrome.storage.local.set({ analysisMode: this.analysisMode });
       this.renderCategories();
       this.renderCustomTags();
       this.updateUI();
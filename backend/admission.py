@@ -0,0 +1,120 @@
+"""
+Admission control for expensive (cache-miss) work.
+
+At most `max_in_flight` requests run at once; up to `max_queue` more wait, each
+for at most `queue_timeout` seconds. Anything beyond that is shed immediately
+with an AdmissionRejected carrying a Retry-After estimate, so an overloaded
+worker answers fast instead of letting every request slow down together.
+
+Background LLM work (remaining playhead windows, refreshes, tier upgrades)
+takes the same slots through background_slot(): it waits as long as needed
+and is never shed, but it never runs beyond max_in_flight either.
+"""
+
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+
+# Weight of the newest sample in the service time moving average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; reason is 'queue_full' or 'queue_timeout'"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a bounded, time-limited wait queue (one event loop)"""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.background_waiting = 0
+        self.background_admitted = 0
+        self.shed: Dict[str, int] = {}
+        self.avg_service_seconds = 0.0
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from queue depth and average service time"""
+        waves = (self.queued + self.in_flight) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(self.avg_service_seconds * waves))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        return AdmissionRejected(reason, self.retry_after())
+
+    async def _acquire(self) -> float:
+        """Wait for a slot, return the seconds spent queued"""
+        if self.in_flight < self.max_in_flight and not self.queued:
+            await self._semaphore.acquire()
+            return 0.0
+        if self.queued >= self.max_queue:
+            raise self._reject("queue_full")
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("queue_timeout") from None
+        finally:
+            self.queued -= 1
+        return time.perf_counter() - started
+
+    @asynccontextmanager
+    async def _hold(self):
+        """Count an acquired slot as in flight for the body, then release it"""
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.avg_service_seconds += SERVICE_TIME_ALPHA * (elapsed - self.avg_service_seconds)
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold an in-flight slot for the body; yields the queue wait in seconds"""
+        waited = await self._acquire()
+        self.admitted += 1
+        async with self._hold():
+            yield waited
+
+    @asynccontextmanager
+    async def background_slot(self):
+        """Hold an in-flight slot for background work; waits without a queue limit or timeout"""
+        self.background_waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.background_waiting -= 1
+        self.background_admitted += 1
+        async with self._hold():
+            yield
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "background_waiting": self.background_waiting,
+            "background_admitted": self.background_admitted,
+            "shed": dict(self.shed),
+            "avg_service_seconds": round(self.avg_service_seconds, 4),
+        }
@@ -3,20 +3,44 @@ import json
 import hashlib
 import time
 import logging
-from typing import List, Optional, Dict, Union
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import List, Optional, Dict, Tuple, Union
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, ConfigDict
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
-from groq import Groq
 import asyncio
 import re
+import bisect
+import math
+import array
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import cProfile
+import threading
+import contextvars
+import weakref
+from backend.metrics import MetricsRegistry
+from backend.profiling import write_profile, format_server_timing
+from backend.structured_logging import setup_logging
+from backend.snapshot import VIDEO_ID_BYTES as SNAPSHOT_VIDEO_ID_BYTES, TranscriptSnapshot, write_snapshot
+from backend.admission import AdmissionController, AdmissionRejected
+from backend.prescreen import HashedTfidfClassifier, term_features
+from backend.fingerprints import SponsorFingerprintIndex
+from backend.micro_batcher import MicroBatcher
+from backend.corpus import CorpusRecorder, build_record
+from backend.llm_cache import LLMResponseCache, request_key
+from backend.community_segments import CommunitySegmentStore
+from backend.tinylfu import FrequencySketch, TinyLFUCache
+from backend.file_lock import locked
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: records are queued and written by a background thread
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # text or json
+# Fraction of requests whose full prompt/LLM response are logged (always logged on parse failure)
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "0"))
+setup_logging(level=logging.INFO, log_format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
@@ -35,14 +59,546 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Initialize Groq client for ultra-fast inference
-client = Groq(
-    api_key=os.environ.get("GROQ_API_KEY"),
+# Providers (groq, youtube_transcript_api, the transcript fetcher) are imported and constructed on first
+# use so a fresh worker binds its port without paying for them; WARMUP_ON_STARTUP
+# initializes them in a background thread right after startup instead.
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "true").lower() == "true"
+_provider_lock = threading.Lock()
+_providers: Dict[str, object] = {}
+provider_init_seconds: Dict[str, float] = {}
+process_started_at = time.time()
+
+def _init_provider(name: str, factory):
+    """Construct a provider once, recording how long it took"""
+    provider = _providers.get(name)
+    if provider is not None:
+        return provider
+    with _provider_lock:
+        if name not in _providers:
+            started = time.perf_counter()
+            _providers[name] = factory()
+            provider_init_seconds[name] = time.perf_counter() - started
+            logger.info("Initialized provider %s in %.3fs", name, provider_init_seconds[name])
+        return _providers[name]
+
+def _create_groq_client():
+    from groq import Groq
+    # Initialize Groq client for ultra-fast inference
+    return Groq(api_key=os.environ.get("GROQ_API_KEY"))
+
+def _import_transcript_api():
+    import youtube_transcript_api
+    return youtube_transcript_api
+
+def get_groq_client():
+    return _init_provider("groq", _create_groq_client)
+
+def get_transcript_api():
+    """The youtube_transcript_api module (YouTubeTranscriptApi and its exceptions)"""
+    return _init_provider("youtube_transcript_api", _import_transcript_api)
+
+def _create_transcript_fetcher():
+    from backend.transcript_fetcher import PooledTranscriptFetcher
+    return PooledTranscriptFetcher(
+        pool_maxsize=TRANSCRIPT_POOL_MAXSIZE,
+        max_concurrency=TRANSCRIPT_FETCH_CONCURRENCY,
+        connect_timeout=TRANSCRIPT_CONNECT_TIMEOUT,
+        read_timeout=TRANSCRIPT_READ_TIMEOUT,
+        retries=TRANSCRIPT_FETCH_RETRIES,
+        backoff_factor=TRANSCRIPT_RETRY_BACKOFF,
+        base_url=TRANSCRIPT_FETCH_BASE_URL,
+        on_request=lambda host, seconds: TRANSCRIPT_HTTP_DURATION.observe(seconds, host=host),
+        on_new_connection=lambda host: TRANSCRIPT_CONNECTIONS.inc(host=host)
+    )
+
+def get_transcript_fetcher():
+    """Shared keep-alive transcript fetcher"""
+    return _init_provider("transcript_fetcher", _create_transcript_fetcher)
+
+PROVIDER_NAMES = ("youtube_transcript_api", "transcript_fetcher", "groq")
+
+def warm_up_providers() -> None:
+    for name, getter in zip(PROVIDER_NAMES, (get_transcript_api, get_transcript_fetcher, get_groq_client)):
+        try:
+            getter()
+        except Exception as e:
+            logger.error("Warm-up of provider %s failed: %s", name, e)
+    try:
+        # Pay the TCP/TLS handshake now rather than on the first request
+        get_transcript_fetcher().prewarm()
+    except Exception as e:
+        logger.warning("Could not pre-open a transcript connection: %s", e)
+
+# Request frequency per video (count-min sketch), recorded once per process_video call. The
+# result and transcript caches only let a new video displace an entry when it is requested
+# more often (TinyLFU admission), so the long tail of one-off videos can't flush popular ones.
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "20000"))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.environ.get("TRANSCRIPT_CACHE_MAX_ENTRIES", "5000"))
+CHUNK_CACHE_MAX_ENTRIES = int(os.environ.get("CHUNK_CACHE_MAX_ENTRIES", "100000"))
+HOT_VIDEOS_TRACKED = int(os.environ.get("HOT_VIDEOS_TRACKED", "100"))
+video_popularity = FrequencySketch(
+    width=8 * max(RESULT_CACHE_MAX_ENTRIES, TRANSCRIPT_CACHE_MAX_ENTRIES),
+    sample_size=10 * max(RESULT_CACHE_MAX_ENTRIES, TRANSCRIPT_CACHE_MAX_ENTRIES),
+    top_k=HOT_VIDEOS_TRACKED
+)
+
+# In-memory result cache (in production, use Redis or similar); entries count under their video
+video_cache = TinyLFUCache(RESULT_CACHE_MAX_ENTRIES, video_popularity, lambda key, entry: entry['video_id'])
+# Results analyzed from client-supplied captions: their own "_client" keys, never served to requests
+# that fetched the transcript server-side and never written to the snapshot
+CLIENT_RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("CLIENT_RESULT_CACHE_MAX_ENTRIES", "2000"))
+client_result_cache = TinyLFUCache(
+    CLIENT_RESULT_CACHE_MAX_ENTRIES, video_popularity, lambda key, entry: entry['video_id']
+)
+CACHE_EXPIRY_HOURS = float(os.environ.get("CACHE_EXPIRY_HOURS", "24"))
+
+# Stale-while-revalidate: results up to CACHE_STALE_SERVE_HOURS past expiry are still served
+# while one background refresh re-analyzes them, and entries that keep getting hits late in
+# their lifetime are refreshed before they expire. Refreshes share a small concurrency budget.
+CACHE_STALE_SERVE_HOURS = float(os.environ.get("CACHE_STALE_SERVE_HOURS", "6"))  # 0 = never serve stale
+REFRESH_AHEAD_FRACTION = float(os.environ.get("REFRESH_AHEAD_FRACTION", "0.8"))  # of CACHE_EXPIRY_HOURS, 1 = off
+REFRESH_AHEAD_MIN_HITS = int(os.environ.get("REFRESH_AHEAD_MIN_HITS", "3"))
+MAX_CONCURRENT_REFRESHES = int(os.environ.get("MAX_CONCURRENT_REFRESHES", "2"))  # 0 = no background refreshes
+refreshing_keys = set()
+
+# Post-processing of LLM skip start times into skip segments. Result cache keys include
+# POSTPROCESS_SIGNATURE, so changing these re-derives results from the LLM response cache
+# instead of serving results built with the old rules or calling the model again.
+SKIP_BUFFER_SECONDS = float(os.environ.get("SKIP_BUFFER_SECONDS", "0.5"))  # padding around each skipped caption
+SKIP_MERGE_GAP_SECONDS = float(os.environ.get("SKIP_MERGE_GAP_SECONDS", "1.0"))  # merge skips closer than this
+MIN_SKIP_SECONDS = float(os.environ.get("MIN_SKIP_SECONDS", "1.5"))  # drop shorter skips
+MIN_LLM_CONFIDENCE = float(os.environ.get("MIN_LLM_CONFIDENCE", "0.4"))
+MIN_LLM_CONFIDENCE_HIGH = float(os.environ.get("MIN_LLM_CONFIDENCE_HIGH", "0.3"))  # for sensitivity "high"
+POSTPROCESS_VERSION = 1  # bump when the post-processing code itself changes
+POSTPROCESS_SIGNATURE = hashlib.md5(json.dumps([
+    POSTPROCESS_VERSION, SKIP_BUFFER_SECONDS, SKIP_MERGE_GAP_SECONDS, MIN_SKIP_SECONDS,
+    MIN_LLM_CONFIDENCE, MIN_LLM_CONFIDENCE_HIGH
+]).encode()).hexdigest()[:8]
+
+# Raw LLM output by exact request (model, prompt and settings), re-used by post-processing
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH")  # unset = in-memory only
+LLM_CACHE_HOURS = float(os.environ.get("LLM_CACHE_HOURS", "168"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_SAVE_INTERVAL_SECONDS = float(os.environ.get("LLM_CACHE_SAVE_INTERVAL_SECONDS", "300"))
+llm_response_cache = LLMResponseCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_HOURS * 3600)
+
+# Fetched transcripts, so repeat requests and snapshots skip the YouTube round-trip
+transcript_cache = TinyLFUCache(TRANSCRIPT_CACHE_MAX_ENTRIES, video_popularity)
+TRANSCRIPT_CACHE_HOURS = float(os.environ.get("TRANSCRIPT_CACHE_HOURS", "6"))
+
+# Quality tiers a request can ask for, cheapest first. "fast" is local scoring only,
+# "balanced" (the default) sends the pre-screened transcript to the routed model, and
+# "thorough" sends the full transcript to the large model, in chunks when it is very long.
+ANALYSIS_MODES = ("fast", "balanced", "thorough")
+THOROUGH_CHUNK_WORDS = int(os.environ.get("THOROUGH_CHUNK_WORDS", "60000"))
+
+# Captions sent by the extension in POST /process_video replace the server-side fetch
+CLIENT_CAPTIONS_ENABLED = os.environ.get("CLIENT_CAPTIONS_ENABLED", "true").lower() == "true"
+MAX_CLIENT_CAPTIONS = int(os.environ.get("MAX_CLIENT_CAPTIONS", "50000"))
+MAX_CLIENT_CAPTION_CHARS = int(os.environ.get("MAX_CLIENT_CAPTION_CHARS", "2000000"))
+
+# Memory-mapped corpus snapshot for warm starts (disabled unless SNAPSHOT_PATH is set)
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH")
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get("SNAPSHOT_INTERVAL_SECONDS", "0"))  # 0 = only on shutdown
+corpus_snapshot: Optional[TranscriptSnapshot] = None
+# video_id -> time of its last DELETE /cache; older snapshot entries for it are ignored
+cleared_videos: Dict[str, float] = {}
+
+# Community skip segments imported by import_community_segments.py (disabled unless the path is set).
+# Videos it covers in the user's categories are answered without the LLM.
+COMMUNITY_SEGMENTS_PATH = os.environ.get("COMMUNITY_SEGMENTS_PATH")
+# Categories used for requests without category preferences
+COMMUNITY_DEFAULT_CATEGORIES = [
+    category.strip()
+    for category in os.environ.get("COMMUNITY_DEFAULT_CATEGORIES", "advertisements,self_promotion,calls_to_action").split(",")
+    if category.strip()
+]
+# Segments are ignored when the transcript runs this much past the video length in the dump (re-edited video)
+COMMUNITY_DURATION_TOLERANCE_SECONDS = float(os.environ.get("COMMUNITY_DURATION_TOLERANCE_SECONDS", "5"))
+community_store: Optional[CommunitySegmentStore] = None
+
+# Per-stage metrics exposed on /metrics (Prometheus text format)
+metrics = MetricsRegistry()
+STAGE_DURATION = metrics.histogram(
+    "yt_skip_stage_duration_seconds",
+    "Time spent in each process_video stage",
+    labels=["stage"]
+)
+REQUEST_DURATION = metrics.histogram(
+    "yt_skip_request_duration_seconds",
+    "End-to-end process_video time",
+    labels=["cache"]
+)
+CACHE_REQUESTS = metrics.counter(
+    "yt_skip_cache_requests_total",
+    "Result cache lookups by outcome",
+    labels=["result"]
+)
+CACHE_REFRESHES = metrics.counter(
+    "yt_skip_cache_refreshes_total",
+    "Background result refreshes by trigger and outcome",
+    labels=["trigger", "outcome"]
+)
+LLM_CACHE_REQUESTS = metrics.counter(
+    "yt_skip_llm_cache_total",
+    "LLM response cache lookups by outcome",
+    labels=["result"]
+)
+COMMUNITY_LOOKUPS = metrics.counter(
+    "yt_skip_community_segments_total",
+    "Community segment store lookups by outcome",
+    labels=["result"]
+)
+TRANSCRIPT_SOURCES = metrics.counter(
+    "yt_skip_transcript_source_total",
+    "Where each transcript came from",
+    labels=["source"]
+)
+JSON_REPAIRS = metrics.counter(
+    "yt_skip_json_repair_total",
+    "LLM response repair paths taken",
+    labels=["path"]
+)
+LLM_TOKENS = metrics.counter(
+    "yt_skip_llm_tokens_total",
+    "Tokens reported by the Groq usage field",
+    labels=["direction"]
+)
+
+# On-demand profiling (off unless sampled, toggled by admin, or requested by header)
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = "x-profile-request"
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+profiling_state = {"enabled": False, "sample_rate": PROFILE_SAMPLE_RATE, "profiles_written": 0}
+# cProfile can only have one active profiler per thread, so profiled requests never overlap
+_profiler_lock = threading.Lock()
+
+# Profiles of the worker-thread work of the current request, only set while it is being profiled
+thread_profiles_var: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar(
+    "thread_profiles", default=None
+)
+
+# Per-request stage timings, only set while a request is being profiled
+stage_timings_var: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "stage_timings", default=None
 )
 
-# Simple in-memory cache (in production, use Redis or similar)
-video_cache = {}
-CACHE_EXPIRY_HOURS = 24
+# Raw LLM responses of the current request, only set while it is being recorded to the corpus
+llm_capture_var: contextvars.ContextVar[Optional[List[dict]]] = contextvars.ContextVar(
+    "llm_capture", default=None
+)
+
+# Set while the transcript being analyzed came from the client: it is untrusted, so nothing shared learns from it
+client_transcript_var: contextvars.ContextVar[bool] = contextvars.ContextVar("client_transcript", default=False)
+
+# Set while a background refresh re-analyzes: LLM calls skip llm_response_cache lookups (answers are still stored)
+llm_cache_bypass_var: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+# Record mode: sampled cache-miss analyses are appended to a JSONL corpus for replay_corpus.py
+RECORD_CORPUS_PATH = os.environ.get("RECORD_CORPUS_PATH")  # unset = recording off
+RECORD_SAMPLE_RATE = float(os.environ.get("RECORD_SAMPLE_RATE", "1.0"))
+RECORD_MAX_MB = float(os.environ.get("RECORD_MAX_MB", "512"))
+corpus_recorder = (
+    CorpusRecorder(RECORD_CORPUS_PATH, RECORD_SAMPLE_RATE, int(RECORD_MAX_MB * 1024 * 1024))
+    if RECORD_CORPUS_PATH else None
+)
+
+@contextmanager
+def corpus_capture():
+    """Collect this request's stage timings and raw LLM responses when it is sampled for the corpus"""
+    if corpus_recorder is None or not corpus_recorder.should_record():
+        yield None
+        return
+    # A profiled request already collects timings; share its dict
+    timings = stage_timings_var.get()
+    capture = {"stage_timings": timings if timings is not None else {}, "llm_responses": []}
+    timings_token = stage_timings_var.set(capture["stage_timings"])
+    llm_token = llm_capture_var.set(capture["llm_responses"])
+    try:
+        yield capture
+    finally:
+        llm_capture_var.reset(llm_token)
+        stage_timings_var.reset(timings_token)
+
+@contextmanager
+def track_stage(stage: str):
+    """Time a process_video stage into the stage histogram"""
+    stage_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - stage_start
+        STAGE_DURATION.observe(elapsed, stage=stage)
+        timings = stage_timings_var.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+async def run_in_thread(func, *args):
+    """asyncio.to_thread that also profiles func in its worker thread when the request is being profiled"""
+    profiles = thread_profiles_var.get()
+    if profiles is None:
+        return await asyncio.to_thread(func, *args)
+    
+    def profiled():
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active in this thread (or interpreter-wide on Python 3.12+)
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profiler.disable()
+            profiles.append(profiler)
+    return await asyncio.to_thread(profiled)
+
+def is_admin_request(request: Request) -> bool:
+    """Admin features are open when ADMIN_TOKEN is unset, otherwise require the X-Admin-Token header"""
+    return not ADMIN_TOKEN or request.headers.get("x-admin-token") == ADMIN_TOKEN
+
+def should_profile(request: Request) -> bool:
+    """Decide whether this process_video request gets profiled"""
+    if request.headers.get(PROFILE_HEADER) == "1" and is_admin_request(request):
+        return True
+    if profiling_state["enabled"]:
+        return True
+    return profiling_state["sample_rate"] > 0 and random.random() < profiling_state["sample_rate"]
+
+class ProfilingMiddleware:
+    """Wrap process_video in cProfile for opted-in requests and attach a Server-Timing header
+
+    Plain ASGI so unprofiled requests only pay for a path comparison. A profiled
+    response's start message is held back until the body is complete, so the
+    profile can be written and its headers added. Background tasks run after
+    that and are not part of the dump.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != "/process_video":
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        if not should_profile(request):
+            return await self.app(scope, receive, send)
+        if not _profiler_lock.acquire(blocking=False):
+            logger.info("Skipping profile, another request is already being profiled")
+            return await self.app(scope, receive, send)
+
+        # The event-loop profiler may also capture work from other requests sharing the loop.
+        # Analysis and transcript fetches run in worker threads, profiled separately by
+        # run_in_thread and merged into the same dump.
+        timings: Dict[str, float] = {}
+        thread_profiles: List[cProfile.Profile] = []
+        profiler = cProfile.Profile()
+        request_start = time.perf_counter()
+        video_id = request.query_params.get("video_id", "post")
+        state = {"start": None, "done": False}
+
+        async def finish() -> List[Tuple[bytes, bytes]]:
+            profiler.disable()
+            state["done"] = True
+            _profiler_lock.release()
+            timings["total"] = time.perf_counter() - request_start
+            headers = []
+            basename = f"{int(time.time() * 1000)}_{video_id}"
+            try:
+                base_path = await asyncio.to_thread(write_profile, profiler, PROFILE_DIR, basename, thread_profiles)
+                profiling_state["profiles_written"] += 1
+                headers.append((b"x-profile-path", base_path.encode("latin-1")))
+            except OSError as e:
+                logger.error("Failed to write profile for %s: %s", video_id, e)
+            headers.append((b"server-timing", format_server_timing(timings).encode("latin-1")))
+            return headers
+
+        async def profiled_send(message):
+            if state["done"]:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                state["body"] = []
+                return
+            if message["type"] == "http.response.body":
+                state["body"].append(message)
+                if message.get("more_body", False):
+                    return
+                start = dict(state["start"])
+                start["headers"] = list(start.get("headers", [])) + await finish()
+                await send(start)
+                for body in state["body"]:
+                    await send(body)
+                return
+            await send(message)
+
+        token = stage_timings_var.set(timings)
+        profiles_token = thread_profiles_var.set(thread_profiles)
+        try:
+            profiler.enable()
+            await self.app(scope, receive, profiled_send)
+        finally:
+            if not state["done"]:
+                profiler.disable()
+                _profiler_lock.release()
+            stage_timings_var.reset(token)
+            thread_profiles_var.reset(profiles_token)
+
+app.add_middleware(ProfilingMiddleware)
+
+# Size-based model routing: tiny transcripts skip the LLM, short or sparse ones use a
+# small fast model, everything else goes to the large-context model
+ROUTE_HEURISTIC_MAX_WORDS = int(os.environ.get("ROUTE_HEURISTIC_MAX_WORDS", "80"))
+ROUTE_HEURISTIC_MAX_DURATION = float(os.environ.get("ROUTE_HEURISTIC_MAX_DURATION", "30"))
+ROUTE_SMALL_MAX_WORDS = int(os.environ.get("ROUTE_SMALL_MAX_WORDS", "1500"))
+ROUTE_LOW_DENSITY_WPM = float(os.environ.get("ROUTE_LOW_DENSITY_WPM", "40"))
+SMALL_MODEL = os.environ.get("SMALL_MODEL", "llama-3.1-8b-instant")
+LARGE_MODEL = os.environ.get("LARGE_MODEL", "meta-llama/llama-4-scout-17b-16e-instruct")
+ROUTE_DURATION = metrics.histogram(
+    "yt_skip_route_duration_seconds",
+    "Analysis time (prompt build, LLM call, parse) per routing decision",
+    labels=["route"]
+)
+route_stats: Dict[str, Dict[str, float]] = {}
+
+# Prompt packing: short transcripts arriving together share one LLM call
+PROMPT_PACKING_ENABLED = os.environ.get("PROMPT_PACKING_ENABLED", "true").lower() == "true"
+PACK_MAX_WORDS = int(os.environ.get("PACK_MAX_WORDS", "500"))  # only transcripts this short are packed
+PACK_MAX_BATCH = int(os.environ.get("PACK_MAX_BATCH", "8"))
+PACK_MAX_WAIT_MS = float(os.environ.get("PACK_MAX_WAIT_MS", "15"))
+PACKED_BATCH_SIZE = metrics.histogram(
+    "yt_skip_packed_batch_size",
+    "Videos per packed LLM call",
+    buckets=(2, 3, 4, 6, 8, 12, 16)
+)
+
+# Transcripts are hashed and analyzed in stable time windows of this many seconds, so a
+# caption revision only re-analyzes the windows it touched. Playhead-first requests
+# analyze the window at the playhead before responding.
+TRANSCRIPT_CHUNK_SECONDS = float(os.environ.get("TRANSCRIPT_CHUNK_SECONDS", "180"))
+# chunk cache key -> {'video_id': ..., 'segments': LLM skip start times inside the window, 'timestamp': ...};
+# bounded with TinyLFU admission like the result cache, entries count under their video
+chunk_cache = TinyLFUCache(CHUNK_CACHE_MAX_ENTRIES, video_popularity, lambda key, entry: entry['video_id'])
+CHUNK_REQUESTS = metrics.counter(
+    "yt_skip_chunk_cache_total",
+    "Per-window LLM result lookups by outcome",
+    labels=["result"]
+)
+CACHE_ENTRIES = metrics.gauge(
+    "yt_skip_cache_entries",
+    "Entries held per in-memory cache",
+    labels=["cache"]
+)
+CACHE_ENTRIES.set_function(lambda: len(video_cache), cache="result")
+CACHE_ENTRIES.set_function(lambda: len(client_result_cache), cache="client_result")
+CACHE_ENTRIES.set_function(lambda: len(transcript_cache), cache="transcript")
+CACHE_ENTRIES.set_function(lambda: len(chunk_cache), cache="chunk")
+# Process-pool offload of CPU stages for very long transcripts (0 workers = always inline)
+CPU_POOL_WORKERS = int(os.environ.get("CPU_POOL_WORKERS", "0"))
+CPU_POOL_MIN_CAPTIONS = int(os.environ.get("CPU_POOL_MIN_CAPTIONS", "3000"))
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+CPU_OFFLOADS = metrics.counter(
+    "yt_skip_cpu_offload_total",
+    "CPU stages run in the process pool",
+    labels=["stage"]
+)
+# profile_id -> registered UserPreferences (compiled on registration); oldest evicted first
+preference_profiles: Dict[str, "UserPreferences"] = {}
+MAX_PREFERENCE_PROFILES = int(os.environ.get("MAX_PREFERENCE_PROFILES", "10000"))
+
+# Local pre-screening: windows the classifier is sure are core content never reach the LLM.
+# Off by default: the hand-set weights have not been validated against a labelled set.
+PRESCREEN_ENABLED = os.environ.get("PRESCREEN_ENABLED", "false").lower() == "true"
+PRESCREEN_WINDOW_SECONDS = float(os.environ.get("PRESCREEN_WINDOW_SECONDS", "30"))
+PRESCREEN_KEEP_BELOW = float(os.environ.get("PRESCREEN_KEEP_BELOW", "0.1"))
+PRESCREEN_SKIP_ABOVE = float(os.environ.get("PRESCREEN_SKIP_ABOVE", "0.9"))
+PRESCREEN_MODEL_PATH = os.environ.get("PRESCREEN_MODEL_PATH")  # weights saved by HashedTfidfClassifier.save()
+_prescreen_model: Optional[HashedTfidfClassifier] = None
+PRESCREEN_WORDS = metrics.counter(
+    "yt_skip_prescreen_words_total",
+    "Transcript words by pre-screening decision (keep is never sent to the LLM)",
+    labels=["decision"]
+)
+PRESCREEN_SAVED_FRACTION = metrics.histogram(
+    "yt_skip_prescreen_saved_fraction",
+    "Fraction of a video's words decided locally instead of by the LLM",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+)
+
+# Cross-video fingerprints of sponsor reads, intros and outros: matched captions skip the LLM
+FINGERPRINT_INDEX_ENABLED = os.environ.get("FINGERPRINT_INDEX_ENABLED", "true").lower() == "true"
+FINGERPRINT_INDEX_PATH = os.environ.get("FINGERPRINT_INDEX_PATH")  # unset = in-memory only
+FINGERPRINT_SAVE_INTERVAL_SECONDS = float(os.environ.get("FINGERPRINT_SAVE_INTERVAL_SECONDS", "300"))
+FINGERPRINT_MAX_ENTRIES = int(os.environ.get("FINGERPRINT_MAX_ENTRIES", "100000"))
+FINGERPRINT_THRESHOLD = float(os.environ.get("FINGERPRINT_THRESHOLD", "0.6"))
+# Only content that is skippable for every viewer is learned, never preference-driven skips
+FINGERPRINT_LEARN_REASONS = ("Advertisement", "Call to Action", "Intro/Outro")
+sponsor_index = SponsorFingerprintIndex(threshold=FINGERPRINT_THRESHOLD, max_entries=FINGERPRINT_MAX_ENTRIES)
+FINGERPRINT_CAPTIONS = metrics.counter(
+    "yt_skip_fingerprint_captions_total",
+    "Captions checked against the fingerprint index, by outcome",
+    labels=["outcome"]
+)
+
+# Admission control for cache misses; cache hits never wait
+MAX_IN_FLIGHT = int(os.environ.get("MAX_IN_FLIGHT", "8"))
+MAX_QUEUE = int(os.environ.get("MAX_QUEUE", "32"))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("QUEUE_TIMEOUT_SECONDS", "10"))
+OVERLOAD_ACTION = os.environ.get("OVERLOAD_ACTION", "reject")  # reject (503) or degrade (keyword-only)
+admission = AdmissionController(MAX_IN_FLIGHT, MAX_QUEUE, QUEUE_TIMEOUT_SECONDS)
+ADMISSION_QUEUE_WAIT = metrics.histogram(
+    "yt_skip_admission_queue_wait_seconds",
+    "Time admitted cache misses waited for an in-flight slot"
+)
+ADMISSION_SHED = metrics.counter(
+    "yt_skip_admission_shed_total",
+    "Cache misses shed under overload",
+    labels=["reason", "action"]
+)
+
+# Outbound transcript fetching over a pooled keep-alive session
+TRANSCRIPT_FETCH_BASE_URL = os.environ.get("TRANSCRIPT_FETCH_BASE_URL")  # e.g. mock_youtube_server.py
+TRANSCRIPT_POOL_MAXSIZE = int(os.environ.get("TRANSCRIPT_POOL_MAXSIZE", "10"))  # connections per host
+TRANSCRIPT_FETCH_CONCURRENCY = int(os.environ.get("TRANSCRIPT_FETCH_CONCURRENCY", "8"))
+TRANSCRIPT_CONNECT_TIMEOUT = float(os.environ.get("TRANSCRIPT_CONNECT_TIMEOUT", "3.05"))
+TRANSCRIPT_READ_TIMEOUT = float(os.environ.get("TRANSCRIPT_READ_TIMEOUT", "10"))
+TRANSCRIPT_FETCH_RETRIES = int(os.environ.get("TRANSCRIPT_FETCH_RETRIES", "2"))
+TRANSCRIPT_RETRY_BACKOFF = float(os.environ.get("TRANSCRIPT_RETRY_BACKOFF", "0.3"))
+TRANSCRIPT_HTTP_DURATION = metrics.histogram(
+    "yt_skip_transcript_http_request_seconds",
+    "Outbound transcript HTTP request latency, including retries",
+    labels=["host"]
+)
+TRANSCRIPT_CONNECTIONS = metrics.counter(
+    "yt_skip_transcript_connections_total",
+    "New outbound transcript connections opened (requests minus these were reused)",
+    labels=["host"]
+)
+
+# cache_key -> in-progress background analysis of the remaining windows
+playhead_jobs: Dict[str, dict] = {}
+# Strong references so background tasks are not garbage collected mid-run
+background_jobs = set()
+# Periodic writers run until shutdown; kept apart so the shutdown drain doesn't wait on them
+periodic_jobs = set()
+# How long shutdown waits for background jobs (playhead windows, cache refreshes) to finish
+SHUTDOWN_DRAIN_SECONDS = float(os.environ.get("SHUTDOWN_DRAIN_SECONDS", "30"))
+
+def record_llm_usage(response) -> None:
+    """Add prompt/completion token counts from a Groq response to the totals"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, direction="input")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, direction="output")
+
+def serialize_result(result: "ProcessResult") -> Response:
+    """Serialize a ProcessResult to a JSON response, timing the encode"""
+    with track_stage("serialization"):
+        body = result.model_dump_json()
+    return Response(content=body, media_type="application/json")
 
 class TranscriptionResult(BaseModel):
     text: str
@@ -67,9 +623,28 @@ class UserPreferences(BaseModel):
 
     model_config = ConfigDict(frozen=True)
 
+class CompiledPreferences(BaseModel):
+    """Everything the pipeline derives from a UserPreferences, built once"""
+    preferences_hash: str
+    prompt_section: str
+    # (lowercased needle, reason, confidence) in matching priority order
+    rules: List[tuple]
+    min_llm_confidence: float = 0.4
+
+class ClientCaptions(BaseModel):
+    """Caption track already loaded by the client, as parallel arrays (one entry per caption)"""
+    start: List[float]
+    duration: List[float]
+    text: List[str]
+
 class ProcessVideoRequest(BaseModel):
     video_id: str
     user_preferences: Optional[UserPreferences] = None
+    profile_id: Optional[str] = None  # from POST /profiles; replaces user_preferences
+    current_time: Optional[float] = None  # viewer's playhead in seconds
+    captions: Optional[ClientCaptions] = None  # skips the server-side transcript fetch
+    mode: str = "balanced"  # fast, balanced, thorough
+    upgrade: Optional[str] = None  # higher tier to analyze in the background after answering
 
 class ProcessResult(BaseModel):
     transcription: List[TranscriptionResult]
@@ -77,6 +652,10 @@ class ProcessResult(BaseModel):
     processing_time: float
     total_duration: float
     skip_percentage: float
+    complete: bool = True  # False while the rest of the video is still being analyzed
+    degraded: bool = False  # True when shed under overload and answered without the LLM
+    mode: str = "balanced"  # quality tier the skips come from
+    cache_key: Optional[str] = None  # poll GET /results/{cache_key} with while a playhead analysis is incomplete
 
 class VideoMetadata(BaseModel):
     video_id: str
@@ -128,16 +707,32 @@ DEFAULT_SKIP_CATEGORIES = {
     }
 }
 
-def get_cache_key(video_id: str, transcript_hash: str, preferences_hash: str = "") -> str:
-    """Generate cache key for video processing results including preferences"""
-    return f"{video_id}_{transcript_hash[:16]}_{preferences_hash[:8]}"
+def get_cache_key(
+    video_id: str,
+    transcript_hash: str,
+    preferences_hash: str = "",
+    mode: str = "balanced",
+    client: bool = False
+) -> str:
+    """Generate cache key for video processing results including preferences, post-processing rules and tier"""
+    key = f"{video_id}_{transcript_hash[:16]}_{preferences_hash[:8]}_{POSTPROCESS_SIGNATURE}"
+    if mode != "balanced":
+        key = f"{key}_{mode}"
+    # Client captions never share a key with the server-fetched transcript
+    return f"{key}_client" if client else key
+
+def result_cache() -> TinyLFUCache:
+    """Result cache for the current request: client captions are kept apart from the shared cache"""
+    return client_result_cache if client_transcript_var.get() else video_cache
 
 def get_preferences_hash(preferences: Optional[UserPreferences]) -> str:
     """Generate hash for user preferences to include in cache key"""
     if not preferences:
         return "default"
     
+    # Every UserPreferences field; profile ids are derived from this hash
     prefs_str = json.dumps({
+        "enabled": preferences.enabled,
         "categories": sorted(preferences.default_categories),
         "keywords": sorted(preferences.custom_keywords),
         "phrases": sorted(preferences.custom_phrases),
@@ -145,18 +740,244 @@ def get_preferences_hash(preferences: Optional[UserPreferences]) -> str:
     }, sort_keys=True)
     return hashlib.md5(prefs_str.encode()).hexdigest()
 
-def is_cache_valid(cache_entry: dict) -> bool:
+def build_preferences_prompt_section(preferences: Optional[UserPreferences]) -> str:
+    """User-specific part of the LLM prompt"""
+    section = ""
+    if preferences and preferences.enabled:
+        if preferences.default_categories:
+            section += "\n\n🎯 USER SELECTED CATEGORIES TO SKIP:"
+            for category in preferences.default_categories:
+                if category in DEFAULT_SKIP_CATEGORIES:
+                    cat_data = DEFAULT_SKIP_CATEGORIES[category]
+                    section += f"\n- {category.replace('_', ' ').title()}: {', '.join(cat_data['keywords'][:5])}"
+        
+        if preferences.custom_keywords:
+            section += f"\n\n🎯 CUSTOM KEYWORDS TO SKIP: {', '.join(preferences.custom_keywords)}"
+        
+        if preferences.custom_phrases:
+            section += f"\n\n🎯 CUSTOM PHRASES TO SKIP: {', '.join(preferences.custom_phrases)}"
+        
+        # Adjust sensitivity
+        if preferences.sensitivity == "high":
+            section += "\n\n⚡ HIGH SENSITIVITY: Be aggressive in identifying skip segments. Target 20-30% reduction."
+        elif preferences.sensitivity == "low":
+            section += "\n\n🎯 LOW SENSITIVITY: Only skip obvious and disruptive content. Target 5-10% reduction."
+        else:
+            section += "\n\n⚖️ MEDIUM SENSITIVITY: Balance between content preservation and skip effectiveness. Target 10-20% reduction."
+    return section
+
+def build_preference_rules(preferences: Optional[UserPreferences]) -> List[tuple]:
+    """Flatten preferences into (needle, reason, confidence) rules, first match wins"""
+    if not preferences or not preferences.enabled:
+        return []
+    high = preferences.sensitivity == "high"
+    rules = []
+    for category in preferences.default_categories:
+        if category in DEFAULT_SKIP_CATEGORIES:
+            cat_data = DEFAULT_SKIP_CATEGORIES[category]
+            reason = f"User preference: {category.replace('_', ' ').title()}"
+            rules += [(keyword.lower(), reason, 0.8 if high else 0.6) for keyword in cat_data["keywords"]]
+            rules += [(phrase.lower(), reason, 0.9 if high else 0.7) for phrase in cat_data["phrases"]]
+    rules += [(keyword.lower(), f"Custom keyword: {keyword}", 0.9 if high else 0.7) for keyword in preferences.custom_keywords]
+    rules += [(phrase.lower(), f"Custom phrase: {phrase}", 0.95 if high else 0.8) for phrase in preferences.custom_phrases]
+    return rules
+
+def compile_preferences(preferences: Optional[UserPreferences]) -> CompiledPreferences:
+    """Hash, prompt section, matcher and thresholds for a preference set, memoized on the object"""
+    if preferences is None:
+        return DEFAULT_COMPILED_PREFERENCES
+    compiled = _compiled_preferences.get(id(preferences))
+    if compiled is None:
+        compiled = _compiled_preferences[id(preferences)] = CompiledPreferences(
+            preferences_hash=get_preferences_hash(preferences),
+            prompt_section=build_preferences_prompt_section(preferences),
+            rules=build_preference_rules(preferences),
+            min_llm_confidence=MIN_LLM_CONFIDENCE_HIGH if preferences.sensitivity == "high" else MIN_LLM_CONFIDENCE
+        )
+        # Entry lives exactly as long as the preferences object (profiles keep theirs)
+        weakref.finalize(preferences, _compiled_preferences.pop, id(preferences), None)
+    return compiled
+
+# id(UserPreferences) -> its compiled form
+_compiled_preferences: Dict[int, CompiledPreferences] = {}
+DEFAULT_COMPILED_PREFERENCES = CompiledPreferences(
+    preferences_hash=get_preferences_hash(None), prompt_section="", rules=[], min_llm_confidence=MIN_LLM_CONFIDENCE
+)
+
+def register_profile(preferences: UserPreferences) -> str:
+    """Store a compiled preference set; the id is derived from its content, so re-registering is idempotent"""
+    compiled = compile_preferences(preferences)
+    profile_id = f"p_{compiled.preferences_hash[:16]}"
+    if profile_id not in preference_profiles:
+        while len(preference_profiles) >= MAX_PREFERENCE_PROFILES:
+            preference_profiles.pop(next(iter(preference_profiles)))
+        preference_profiles[profile_id] = preferences
+    return profile_id
+
+def is_cache_valid(cache_entry: dict, expiry_hours: float = CACHE_EXPIRY_HOURS) -> bool:
     """Check if cache entry is still valid"""
     if not cache_entry:
         return False
     cache_time = cache_entry.get('timestamp', 0)
-    return (time.time() - cache_time) < (CACHE_EXPIRY_HOURS * 3600)
+    return (time.time() - cache_time) < (expiry_hours * 3600)
+
+def get_transcription_data(video_id: str) -> List[TranscriptionResult]:
+    """Transcript from memory, then the corpus snapshot, then YouTube"""
+    cached = transcript_cache.get(video_id)
+    if cached and is_cache_valid(cached, TRANSCRIPT_CACHE_HOURS):
+        TRANSCRIPT_SOURCES.inc(source="memory")
+        return cached['transcription']
+    
+    if corpus_snapshot is not None:
+        snapshot_entry = corpus_snapshot.get_transcript(video_id)
+        if (
+            snapshot_entry and is_cache_valid({'timestamp': snapshot_entry[0]}, TRANSCRIPT_CACHE_HOURS)
+            and snapshot_entry[0] > cleared_videos.get(video_id, 0)
+        ):
+            timestamp, cues = snapshot_entry
+            transcription_data = [
+                TranscriptionResult(text=text, start=start, duration=duration) for text, start, duration in cues
+            ]
+            transcript_cache[video_id] = {'transcription': transcription_data, 'timestamp': timestamp}
+            TRANSCRIPT_SOURCES.inc(source="snapshot")
+            return transcription_data
+    
+    data = get_transcript_fetcher().fetch(video_id, ['en'])
+    
+    if not data:
+        raise get_transcript_api().NoTranscriptFound
+    
+    transcription_data = [TranscriptionResult(**segment) for segment in data]
+    transcript_cache[video_id] = {'transcription': transcription_data, 'timestamp': time.time()}
+    TRANSCRIPT_SOURCES.inc(source="youtube")
+    return transcription_data
+
+def get_cached_result(video_id: str, cache_key: str, expiry_hours: float = CACHE_EXPIRY_HOURS) -> Optional[dict]:
+    """Result cache entry younger than expiry_hours from memory or the corpus snapshot"""
+    cached_result = result_cache().get(cache_key)
+    if cached_result and is_cache_valid(cached_result, expiry_hours):
+        return cached_result
+    if corpus_snapshot is not None and not client_transcript_var.get():
+        snapshot_result = corpus_snapshot.get_results(video_id).get(cache_key)
+        if (
+            snapshot_result and is_cache_valid(snapshot_result, expiry_hours)
+            and snapshot_result['timestamp'] > cleared_videos.get(video_id, 0)
+        ):
+            cached_result = video_cache[cache_key] = {
+                'video_id': video_id,
+                'skip_segments': [SkipSegment(**seg) for seg in snapshot_result['skip_segments']],
+                'skip_percentage': snapshot_result['skip_percentage'],
+                'timestamp': snapshot_result['timestamp'],
+                'mode': snapshot_result.get('mode', 'balanced')
+            }
+            return cached_result
+    return None
+
+def save_corpus_snapshot(path: str) -> int:
+    """Write live caches, plus still-valid entries of the snapshots on disk and in memory, to path"""
+    with locked(path):
+        # Other workers write the same file; merge their entries instead of overwriting them
+        on_disk = None
+        if os.path.exists(path):
+            try:
+                on_disk = TranscriptSnapshot(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable corpus snapshot %s: %s", path, e)
+        try:
+            return _write_merged_snapshot(path, [snap for snap in (on_disk, corpus_snapshot) if snap is not None])
+        finally:
+            if on_disk is not None:
+                on_disk.close()
+
+def _write_merged_snapshot(path: str, snapshots: List[TranscriptSnapshot]) -> int:
+    """Newest valid entry per key across snapshots, overridden by the live caches"""
+    transcripts = {}
+    results: Dict[str, Dict[str, dict]] = {}
+    
+    for snapshot in snapshots:
+        for video_id in snapshot.video_ids():
+            cleared_at = cleared_videos.get(video_id, 0)
+            snapshot_entry = snapshot.get_transcript(video_id)
+            if (
+                snapshot_entry and is_cache_valid({'timestamp': snapshot_entry[0]}, TRANSCRIPT_CACHE_HOURS)
+                and snapshot_entry[0] > max(cleared_at, transcripts.get(video_id, {}).get('timestamp', 0))
+            ):
+                transcripts[video_id] = {'timestamp': snapshot_entry[0], 'cues': snapshot_entry[1]}
+            for key, entry in snapshot.get_results(video_id).items():
+                current = results.get(video_id, {}).get(key)
+                if (
+                    is_cache_valid(entry) and entry['timestamp'] > cleared_at
+                    and (current is None or entry['timestamp'] > current['timestamp'])
+                ):
+                    results.setdefault(video_id, {})[key] = entry
+    
+    for video_id, cached in list(transcript_cache.items()):
+        if is_cache_valid(cached, TRANSCRIPT_CACHE_HOURS):
+            transcripts[video_id] = {
+                'timestamp': cached['timestamp'],
+                'cues': [(seg.text, seg.start, seg.duration) for seg in cached['transcription']]
+            }
+    for cache_key, entry in list(video_cache.items()):
+        if 'video_id' in entry and is_cache_valid(entry):
+            results.setdefault(entry['video_id'], {})[cache_key] = {
+                'skip_segments': [seg.model_dump() for seg in entry['skip_segments']],
+                'skip_percentage': entry['skip_percentage'],
+                'timestamp': entry['timestamp'],
+                'mode': entry.get('mode', 'balanced')
+            }
+    
+    # video_id is client input; one id the snapshot can't hold must not fail every later write
+    too_long = {
+        video_id for video_id in set(transcripts) | set(results)
+        if len(video_id.encode()) > SNAPSHOT_VIDEO_ID_BYTES
+    }
+    for video_id in too_long:
+        transcripts.pop(video_id, None)
+        results.pop(video_id, None)
+    if too_long:
+        logger.warning("Left %d videos with ids over %d bytes out of the corpus snapshot", len(too_long), SNAPSHOT_VIDEO_ID_BYTES)
+    
+    return write_snapshot(path, transcripts, results)
+
+def load_corpus_snapshot(path: str) -> None:
+    """Memory-map the snapshot at path, replacing any previously loaded one"""
+    global corpus_snapshot
+    previous = corpus_snapshot
+    corpus_snapshot = TranscriptSnapshot(path)
+    logger.info("Loaded corpus snapshot %s with %d videos", path, len(corpus_snapshot))
+    if previous is not None:
+        previous.close()
 
-def calculate_transcript_hash(transcription_data: List[TranscriptionResult]) -> str:
-    """Calculate hash of transcript for cache validation"""
-    transcript_text = "".join([seg.text for seg in transcription_data])
+def calculate_transcript_hash(transcription_data: List[TranscriptionResult], include_timings: bool = False) -> str:
+    """Calculate hash of transcript for cache validation.
+
+    include_timings also covers every start and duration, for captions whose timings can't be trusted.
+    """
+    if include_timings:
+        transcript_text = "".join([f"{seg.start!r}|{seg.duration!r}|{seg.text}\n" for seg in transcription_data])
+    else:
+        transcript_text = "".join([seg.text for seg in transcription_data])
     return hashlib.md5(transcript_text.encode()).hexdigest()
 
+def calculate_chunk_hashes(
+    transcription_data: List[TranscriptionResult],
+    window_seconds: float = TRANSCRIPT_CHUNK_SECONDS
+) -> Dict[int, str]:
+    """Hash the transcript per fixed time window: window index -> md5 of the window's text"""
+    hashers = {}
+    for seg in transcription_data:
+        index = int(seg.start // window_seconds)
+        hasher = hashers.get(index)
+        if hasher is None:
+            hasher = hashers[index] = hashlib.md5()
+        hasher.update(seg.text.encode())
+        hasher.update(b"\n")
+    return {index: hasher.hexdigest() for index, hasher in hashers.items()}
+
+def get_chunk_cache_key(video_id: str, chunk_index: int, chunk_hash: str, preferences_hash: str = "") -> str:
+    """Cache key for the LLM result of one transcript window"""
+    return f"{video_id}_c{chunk_index}_{chunk_hash[:16]}_{preferences_hash[:8]}"
+
 def optimize_transcript_for_llm(transcription_data: List[TranscriptionResult], max_tokens: int = 120000) -> str:
     """Optimize transcript for LLM processing - Llama 4 Scout has 128K context window"""
     
@@ -254,18 +1075,33 @@ def clean_llm_response(response_content: str) -> str:
         logger.warning(f"Error cleaning LLM response: {e}")
         return response_content
 
+# Response format of a packed prompt covering several videos, keyed v1, v2, ...
+PACKED_FORMAT_EXAMPLE = '{"videos": {"v1": {"segments": [12.5, 45.2]}, "v2": {"segments": []}}}'
+
 def get_optimized_prompt_with_preferences(
     video_duration: float, 
     word_count: int, 
-    preferences: Optional[UserPreferences] = None
+    preferences: Optional[UserPreferences] = None,
+    packed_videos: int = 0
 ) -> str:
-    """Generate optimized prompt for Llama 4 Scout model with user preferences"""
+    """Generate optimized prompt for Llama 4 Scout model with user preferences
+
+    With packed_videos > 0 the prompt asks for one keyed result per video section instead.
+    """
+    if packed_videos:
+        task = f"Analyze each of the {packed_videos} video transcripts below separately and identify precise start times of segments that should be skipped based on user preferences."
+        response_format = f"""- Format: {PACKED_FORMAT_EXAMPLE}
+- One entry per video key (v1 to v{packed_videos}), an empty list when nothing should be skipped
+- Timestamps are relative to their own video"""
+    else:
+        task = "Analyze the transcript and identify precise start times of segments that should be skipped based on user preferences."
+        response_format = '- Format: {"segments": [12.5, 45.2, 89.7]}'
     
-    base_prompt = """You are an expert video editor with advanced pattern recognition. Analyze the transcript and identify precise start times of segments that should be skipped based on user preferences.
+    base_prompt = f"""You are an expert video editor with advanced pattern recognition. {task}
 
 CRITICAL JSON FORMAT REQUIREMENTS:
 - Return ONLY a valid JSON object
-- Format: {"segments": [12.5, 45.2, 89.7]}
+{response_format}
 - Numbers must be pure decimals (NO units like 's', 'sec', 'seconds')
 - No trailing commas
 - No comments or explanations outside the JSON
@@ -275,28 +1111,8 @@ ALWAYS SKIP THESE SEGMENTS:
 - Filler speech: "um", "uh", "er", "like", "you know", "basically"
 - Long pauses or dead air (>3 seconds)"""
 
-    # Add user-specific skip preferences
-    if preferences and preferences.enabled:
-        if preferences.default_categories:
-            base_prompt += "\n\n🎯 USER SELECTED CATEGORIES TO SKIP:"
-            for category in preferences.default_categories:
-                if category in DEFAULT_SKIP_CATEGORIES:
-                    cat_data = DEFAULT_SKIP_CATEGORIES[category]
-                    base_prompt += f"\n- {category.replace('_', ' ').title()}: {', '.join(cat_data['keywords'][:5])}"
-        
-        if preferences.custom_keywords:
-            base_prompt += f"\n\n🎯 CUSTOM KEYWORDS TO SKIP: {', '.join(preferences.custom_keywords)}"
-        
-        if preferences.custom_phrases:
-            base_prompt += f"\n\n🎯 CUSTOM PHRASES TO SKIP: {', '.join(preferences.custom_phrases)}"
-        
-        # Adjust sensitivity
-        if preferences.sensitivity == "high":
-            base_prompt += "\n\n⚡ HIGH SENSITIVITY: Be aggressive in identifying skip segments. Target 20-30% reduction."
-        elif preferences.sensitivity == "low":
-            base_prompt += "\n\n🎯 LOW SENSITIVITY: Only skip obvious and disruptive content. Target 5-10% reduction."
-        else:
-            base_prompt += "\n\n⚖️ MEDIUM SENSITIVITY: Balance between content preservation and skip effectiveness. Target 10-20% reduction."
+    # Add user-specific skip preferences (precompiled)
+    base_prompt += compile_preferences(preferences).prompt_section
     
     base_prompt += """
 
@@ -313,7 +1129,9 @@ ANALYSIS GUIDELINES:
 - Preserve context needed for understanding
 
 RESPONSE FORMAT EXAMPLE:
-{"segments": [12.5, 45.2, 89.7, 123.1, 156.8]}
+"""
+    base_prompt += PACKED_FORMAT_EXAMPLE if packed_videos else '{"segments": [12.5, 45.2, 89.7, 123.1, 156.8]}'
+    base_prompt += """
 
 Remember: Return ONLY the JSON object with numeric timestamps."""
 
@@ -332,39 +1150,15 @@ Remember: Return ONLY the JSON object with numeric timestamps."""
 
 def matches_user_preferences(segment: TranscriptionResult, preferences: Optional[UserPreferences]) -> tuple[bool, str, float]:
     """Check if segment matches user skip preferences"""
-    if not preferences or not preferences.enabled:
+    rules = compile_preferences(preferences).rules
+    if not rules:
         return False, "", 0.0
     
     text = segment.text.lower()
-    
-    # Check default categories
-    for category in preferences.default_categories:
-        if category in DEFAULT_SKIP_CATEGORIES:
-            cat_data = DEFAULT_SKIP_CATEGORIES[category]
-            
-            # Check keywords
-            for keyword in cat_data["keywords"]:
-                if keyword.lower() in text:
-                    confidence = 0.8 if preferences.sensitivity == "high" else 0.6
-                    return True, f"User preference: {category.replace('_', ' ').title()}", confidence
-            
-            # Check phrases
-            for phrase in cat_data["phrases"]:
-                if phrase.lower() in text:
-                    confidence = 0.9 if preferences.sensitivity == "high" else 0.7
-                    return True, f"User preference: {category.replace('_', ' ').title()}", confidence
-    
-    # Check custom keywords
-    for keyword in preferences.custom_keywords:
-        if keyword.lower() in text:
-            confidence = 0.9 if preferences.sensitivity == "high" else 0.7
-            return True, f"Custom keyword: {keyword}", confidence
-    
-    # Check custom phrases
-    for phrase in preferences.custom_phrases:
-        if phrase.lower() in text:
-            confidence = 0.95 if preferences.sensitivity == "high" else 0.8
-            return True, f"Custom phrase: {phrase}", confidence
+    # Categories (keywords, then phrases), custom keywords, custom phrases: first match wins
+    for needle, reason, confidence in rules:
+        if needle in text:
+            return True, reason, confidence
     
     return False, "", 0.0
 
@@ -372,7 +1166,7 @@ def create_enhanced_skip_segments(
     data: List[TranscriptionResult],
     non_important_segments: ImportantSegments,
     preferences: Optional[UserPreferences] = None,
-    buffer_time: float = 0.5
+    buffer_time: float = SKIP_BUFFER_SECONDS
 ) -> List[SkipSegment]:
     """Enhanced skip segment creation with user preferences and confidence scoring"""
     
@@ -393,7 +1187,7 @@ def create_enhanced_skip_segments(
             segment_end = min(total_duration, segment.start + segment.duration + buffer_time)
             
             # Merge with previous segment if they overlap
-            if skip_segments and segment_start <= skip_segments[-1].end + 1.0:
+            if skip_segments and segment_start <= skip_segments[-1].end + SKIP_MERGE_GAP_SECONDS:
                 skip_segments[-1].end = segment_end
                 skip_segments[-1].confidence = max(skip_segments[-1].confidence or 0, confidence)
                 if skip_segments[-1].reason != reason:
@@ -406,32 +1200,43 @@ def create_enhanced_skip_segments(
                     reason=reason
                 ))
     
+    # Index for the LLM pass: caption starts and the running max of caption ends, so the
+    # first caption containing a timestamp is found by bisection instead of a linear scan
+    caption_starts = [seg.start for seg in sorted_data]
+    running_max_ends = list(accumulate((seg.start + seg.duration for seg in sorted_data), max))
+    
+    # Skip segments form two runs sorted by start with disjoint spans: the preference
+    # matches above, then the LLM segments appended below. The only segment in a run
+    # that can cover a time is the last one starting at or before it.
+    preference_count = len(skip_segments)
+    preference_starts = [seg.start for seg in skip_segments]
+    llm_starts: List[float] = []
+    
+    def is_covered(t: float) -> bool:
+        i = bisect.bisect_right(preference_starts, t) - 1
+        if i >= 0 and t <= skip_segments[i].end:
+            return True
+        j = bisect.bisect_right(llm_starts, t) - 1
+        return j >= 0 and t <= skip_segments[preference_count + j].end
+    
     # Then, process LLM-identified segments
     for start_time in sorted_starts:
-        # Find the segment that contains this start time
-        matching_segment = None
-        for seg in sorted_data:
-            if seg.start <= start_time <= seg.start + seg.duration:
-                matching_segment = seg
-                break
-        
-        if not matching_segment:
+        # Find the first segment that contains this start time
+        candidates = bisect.bisect_right(caption_starts, start_time)
+        first_reaching = bisect.bisect_left(running_max_ends, start_time)
+        if first_reaching >= candidates:
             continue
+        matching_segment = sorted_data[first_reaching]
         
         # Check if already covered by user preferences
-        already_covered = any(
-            skip_seg.start <= matching_segment.start <= skip_seg.end 
-            for skip_seg in skip_segments
-        )
-        
-        if already_covered:
+        if is_covered(matching_segment.start):
             continue
         
         # Calculate confidence based on segment characteristics
         confidence = calculate_skip_confidence(matching_segment, sorted_data)
         
         # Adjust confidence threshold based on user sensitivity
-        min_confidence = 0.3 if preferences and preferences.sensitivity == "high" else 0.4
+        min_confidence = compile_preferences(preferences).min_llm_confidence
         if confidence < min_confidence:
             continue
             
@@ -442,7 +1247,7 @@ def create_enhanced_skip_segments(
         reason = classify_skip_reason(matching_segment)
         
         # Merge with previous segment if they overlap
-        if skip_segments and segment_start <= skip_segments[-1].end + 1.0:
+        if skip_segments and segment_start <= skip_segments[-1].end + SKIP_MERGE_GAP_SECONDS:
             skip_segments[-1].end = segment_end
             skip_segments[-1].confidence = max(skip_segments[-1].confidence or 0, confidence)
             if skip_segments[-1].reason != reason:
@@ -454,9 +1259,10 @@ def create_enhanced_skip_segments(
                 confidence=confidence,
                 reason=reason
             ))
+            llm_starts.append(segment_start)
     
-    # Filter out very short segments (less than 1.5 seconds)
-    skip_segments = [seg for seg in skip_segments if seg.end - seg.start >= 1.5]
+    # Filter out very short segments (less than MIN_SKIP_SECONDS)
+    skip_segments = [seg for seg in skip_segments if seg.end - seg.start >= MIN_SKIP_SECONDS]
     
     # Sort by start time
     skip_segments.sort(key=lambda x: x.start)
@@ -503,148 +1309,284 @@ def calculate_skip_confidence(segment: TranscriptionResult, all_segments: List[T
     
     return min(max(confidence, 0.0), 1.0)
 
+# Whole words only: a plain substring test finds "ad" in "already" and "er" in "never"
+SKIP_REASON_PATTERNS = {
+    "Advertisement": re.compile(r"\b(?:sponsor(?:s|ed|ship)?|ads?|advertisements?|promo)\b"),
+    "Call to Action": re.compile(r"\b(?:subscribe|bell icon|notifications?)\b"),
+    "Filler Speech": re.compile(r"\b(?:um|uh|er)\b"),
+    "Intro/Outro": re.compile(r"\b(?:welcome back|thanks for watching)\b"),
+}
+
 def classify_skip_reason(segment: TranscriptionResult) -> str:
     """Classify the reason for skipping a segment"""
     text = segment.text.lower()
     
-    if any(word in text for word in ['sponsor', 'ad', 'advertisement', 'promo']):
+    if SKIP_REASON_PATTERNS["Advertisement"].search(text):
         return "Advertisement"
-    elif any(word in text for word in ['subscribe', 'like and subscribe', 'bell icon', 'notification']):
+    elif SKIP_REASON_PATTERNS["Call to Action"].search(text):
         return "Call to Action"
-    elif any(word in text for word in ['um', 'uh', 'er']) and len(text.split()) < 10:
+    elif SKIP_REASON_PATTERNS["Filler Speech"].search(text) and len(text.split()) < 10:
         return "Filler Speech"
     elif segment.duration > 10 and len(set(text.split())) < len(text.split()) * 0.6:
         return "Repetitive Content"
-    elif any(phrase in text for phrase in ['welcome back', 'thanks for watching']):
+    elif SKIP_REASON_PATTERNS["Intro/Outro"].search(text):
         return "Intro/Outro"
     else:
         return "Non-Essential Content"
 
-@app.get("/process_video", response_model=ProcessResult)
-async def process_video(video_id: str, user_preferences: Optional[UserPreferences] = None):
-    start_time = time.time()
-    
-    # Extract transcript
-    try:
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        transcript = transcript_list.find_transcript(['en'])
-        data = transcript.fetch()
-        
-        if not data:
-            raise NoTranscriptFound
-            
-        transcription_data = [TranscriptionResult(**segment) for segment in data]
-        
-    except TranscriptsDisabled:
-        raise HTTPException(status_code=400, detail="Transcripts are disabled for this video.")
-    except NoTranscriptFound:
-        raise HTTPException(status_code=400, detail="No transcript found for this video.")
-    except Exception as e:
-        logger.error(f"Error fetching transcript: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error fetching transcript: {str(e)}")
+class ModelRoute(BaseModel):
+    name: str
+    model: Optional[str] = None  # None = heuristics only, no LLM call
+    max_completion_tokens: int = 0
 
-    # Calculate metadata
-    total_duration = transcription_data[-1].start + transcription_data[-1].duration if transcription_data else 0
-    word_count = sum(len(seg.text.split()) for seg in transcription_data)
-    transcript_hash = calculate_transcript_hash(transcription_data)
-    preferences_hash = get_preferences_hash(user_preferences)
-    cache_key = get_cache_key(video_id, transcript_hash, preferences_hash)
-    
-    # Check cache
-    if cache_key in video_cache and is_cache_valid(video_cache[cache_key]):
-        cached_result = video_cache[cache_key]
-        return ProcessResult(
-            transcription=transcription_data,
-            remove=cached_result['skip_segments'],
-            processing_time=time.time() - start_time,
-            total_duration=total_duration,
-            skip_percentage=cached_result['skip_percentage']
+class LLMAnalysis(BaseModel):
+    segments: List[float]
+    route: str
+    prompt_chars: int = 0
+    response_chars: int = 0
+    raw_response: str = ""  # model output for this transcript, kept for corpus recording
+    # Words decided locally by pre-screening vs all words considered
+    prescreened_words: int = 0
+    total_words: int = 0
+
+class PackedPromptItem(BaseModel):
+    """One short transcript waiting to share an LLM call"""
+    video_id: str
+    transcription_data: List[TranscriptionResult]
+    total_duration: float
+    word_count: int
+    user_preferences: Optional[UserPreferences] = None
+    route: ModelRoute
+
+class PrescreenResult(BaseModel):
+    skip_starts: List[float]  # captions in skip windows containing sponsor/CTA terms (fast tier only)
+    ambiguous: List[TranscriptionResult]  # captions still sent to the LLM (skip and llm windows)
+    windows: Dict[str, int]  # keep / skip / llm -> window count
+    prescreened_words: int
+    total_words: int
+
+MODEL_ROUTES = {
+    "heuristic": ModelRoute(name="heuristic"),
+    "small": ModelRoute(
+        name="small",
+        model=SMALL_MODEL,
+        max_completion_tokens=int(os.environ.get("SMALL_MODEL_MAX_TOKENS", "1024"))
+    ),
+    "large": ModelRoute(
+        name="large",
+        model=LARGE_MODEL,
+        max_completion_tokens=int(os.environ.get("LARGE_MODEL_MAX_TOKENS", "2048"))
+    ),
+}
+
+def select_model_route(video_duration: float, word_count: int) -> ModelRoute:
+    """Pick the cheapest route that can handle a transcript of this size"""
+    words_per_minute = word_count / (video_duration / 60) if video_duration > 0 else 0
+    if word_count <= ROUTE_HEURISTIC_MAX_WORDS or video_duration <= ROUTE_HEURISTIC_MAX_DURATION:
+        return MODEL_ROUTES["heuristic"]
+    if word_count <= ROUTE_SMALL_MAX_WORDS or words_per_minute < ROUTE_LOW_DENSITY_WPM:
+        return MODEL_ROUTES["small"]
+    return MODEL_ROUTES["large"]
+
+def record_route(route: ModelRoute, seconds: float) -> None:
+    """Track routing decisions and per-route latency for /api/stats and /metrics"""
+    stats = route_stats.setdefault(route.name, {"requests": 0, "total_seconds": 0.0})
+    stats["requests"] += 1
+    stats["total_seconds"] += seconds
+    ROUTE_DURATION.observe(seconds, route=route.name)
+
+def heuristic_skip_starts(transcription_data: List[TranscriptionResult], threshold: float = 0.7) -> List[float]:
+    """Local stand-in for the LLM: start times of captions the confidence scorer is already sure about"""
+    return [
+        seg.start for seg in transcription_data
+        if calculate_skip_confidence(seg, transcription_data) >= threshold
+    ]
+
+def analyze_transcript_with_llm(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    word_count: int,
+    user_preferences: Optional[UserPreferences],
+    route: ModelRoute
+) -> LLMAnalysis:
+    """Ask the routed model for skip start times; short transcripts may share a packed call.
+
+    Answers are cached under the single-video request, also when they came from a
+    packed call, so the same transcript and prompt never reach the model twice.
+    """
+    prompts = build_transcript_prompt(transcription_data, total_duration, word_count, user_preferences)
+    cache_key = request_key(route.model, single_prompt_messages(prompts[1]), **single_prompt_settings(route))
+    bypass = llm_cache_bypass_var.get()
+    cached = llm_response_cache.get(cache_key) if LLM_CACHE_ENABLED and not bypass else None
+    if cached is not None:
+        LLM_CACHE_REQUESTS.inc(result="hit")
+        analysis = LLMAnalysis(
+            segments=cached["segments"],
+            route=route.name,
+            prompt_chars=len(prompts[1]),
+            response_chars=len(cached["raw_response"]),
+            raw_response=cached["raw_response"]
         )
+    else:
+        if PROMPT_PACKING_ENABLED and word_count <= PACK_MAX_WORDS:
+            item = PackedPromptItem(
+                video_id=video_id,
+                transcription_data=transcription_data,
+                total_duration=total_duration,
+                word_count=word_count,
+                user_preferences=user_preferences,
+                route=route
+            )
+            # Only requests with the same model and preferences can share a prompt
+            analysis = prompt_packer.submit((route.name, compile_preferences(user_preferences).preferences_hash), item)
+        else:
+            analysis = analyze_single_transcript_with_llm(
+                video_id, transcription_data, total_duration, word_count, user_preferences, route, prompts
+            )
+        if LLM_CACHE_ENABLED:
+            LLM_CACHE_REQUESTS.inc(result="bypass" if bypass else "miss")
+            # Nothing to cache when the model's answer was lost
+            if analysis.raw_response:
+                llm_response_cache.put(cache_key, analysis.segments, analysis.raw_response, video_id=video_id)
+    capture = llm_capture_var.get()
+    if capture is not None:
+        capture.append({"model": route.model, "response": analysis.raw_response})
+    return analysis
+
+def build_transcript_prompt(
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    word_count: int,
+    user_preferences: Optional[UserPreferences]
+) -> Tuple[str, str]:
+    """Instruction prompt and full user message for a single-video analysis"""
+    with track_stage("prompt_build"):
+        # Optimize transcript for LLM processing
+        optimized_transcript = optimize_transcript_for_llm(transcription_data)
+        
+        # Get optimized prompt
+        prompt = get_optimized_prompt_with_preferences(total_duration, word_count, user_preferences)
+        return prompt, f"{prompt}\n\nTranscript:\n{optimized_transcript}"
+
+def single_prompt_messages(full_prompt: str) -> List[dict]:
+    return [
+        {
+            "role": "system", 
+            "content": "You are a precision video editing AI. Return ONLY valid JSON format: {\"segments\": [12.5, 45.2]}. Numbers must be pure decimals without units. No explanations outside JSON."
+        },
+        {
+            "role": "user", 
+            "content": full_prompt
+        }
+    ]
+
+def single_prompt_settings(route: ModelRoute) -> dict:
+    return {
+        "response_format": {"type": "json_object"},
+        "temperature": 0.1,  # Very low temperature for consistency
+        "max_completion_tokens": route.max_completion_tokens
+    }
+
+def analyze_single_transcript_with_llm(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    word_count: int,
+    user_preferences: Optional[UserPreferences],
+    route: ModelRoute,
+    prompts: Optional[Tuple[str, str]] = None
+) -> LLMAnalysis:
+    """Ask the routed model for skip start times, repairing malformed JSON where possible"""
+    if prompts is None:
+        prompts = build_transcript_prompt(transcription_data, total_duration, word_count, user_preferences)
+    prompt, full_prompt = prompts
     
-    # Optimize transcript for LLM processing
-    optimized_transcript = optimize_transcript_for_llm(transcription_data)
-    
-    # Get optimized prompt
-    prompt = get_optimized_prompt_with_preferences(total_duration, word_count, user_preferences)
-    full_prompt = f"{prompt}\n\nTranscript:\n{optimized_transcript}"
-    
-    # Log the prompt being used
-    # logger.info(f"Processing video {video_id} with user preferences: {user_preferences}")
-    logger.info(f"Generated prompt for video {video_id}:\n{prompt}")
-    # logger.info(f"Full prompt length: {len(full_prompt)} characters")
+    # Full prompt/response payloads are only logged for a sample of requests
+    log_payloads = LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE
+    if log_payloads:
+        logger.info("Generated prompt for video %s", video_id, extra={"event": "llm_prompt", "video_id": video_id, "prompt": prompt})
+    response_content = ""
     
     try:
-        # Call Groq with Llama 4 Scout for ultra-fast inference
-        response = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a precision video editing AI. Return ONLY valid JSON format: {\"segments\": [12.5, 45.2]}. Numbers must be pure decimals without units. No explanations outside JSON."
-                },
-                {
-                    "role": "user", 
-                    "content": full_prompt
-                }
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1,  # Very low temperature for consistency
-            max_completion_tokens=2048  # Increased for detailed analysis
-        )
+        # Call Groq for ultra-fast inference
+        with track_stage("llm_call"):
+            response = get_groq_client().chat.completions.create(
+                model=route.model,
+                messages=single_prompt_messages(full_prompt),
+                **single_prompt_settings(route)
+            )
+        record_llm_usage(response)
         
         response_content = response.choices[0].message.content
         
-        # Clean the response before parsing JSON
-        cleaned_response = clean_llm_response(response_content)
-        logger.info(f"Original LLM response: {response_content}")
-        logger.info(f"Cleaned LLM response: {cleaned_response}")
-        
-        response_json = json.loads(cleaned_response)
-        segments = response_json.get('segments', [])
-        
-        # Log the LLM response
-        # logger.info(f"LLM response for video {video_id}: {response_content}")
-        # logger.info(f"Extracted {len(segments)} skip segments: {segments}")
-        
-        non_important_segments = ImportantSegments(segments=segments)
-        skip_segments = create_enhanced_skip_segments(transcription_data, non_important_segments, user_preferences)
+        with track_stage("response_parse"):
+            # Clean the response before parsing JSON
+            cleaned_response = clean_llm_response(response_content)
+            if cleaned_response != response_content:
+                JSON_REPAIRS.inc(path="clean_llm_response")
+            if log_payloads:
+                logger.info("LLM response for video %s", video_id, extra={
+                    "event": "llm_response",
+                    "video_id": video_id,
+                    "response": response_content,
+                    "cleaned_response": cleaned_response
+                })
+            
+            response_json = json.loads(cleaned_response)
+            segments = response_json.get('segments', [])
         
     except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error for video {video_id}: {e}")
-        logger.error(f"Raw response: {response_content if 'response_content' in locals() else 'No response'}")
-        logger.error(f"Cleaned response: {cleaned_response if 'cleaned_response' in locals() else 'Not cleaned'}")
-        segments = extract_segments_fallback(response_content if 'response_content' in locals() else "")
-        logger.info(f"Fallback extracted {len(segments)} segments: {segments}")
-        non_important_segments = ImportantSegments(segments=segments)
-        skip_segments = create_enhanced_skip_segments(transcription_data, non_important_segments, user_preferences)
+        # Parse failures always capture the full payloads for debugging
+        logger.error("JSON decode error for video %s: %s", video_id, e, extra={
+            "event": "llm_parse_failed",
+            "video_id": video_id,
+            "prompt": prompt,
+            "response": response_content,
+            "cleaned_response": cleaned_response if 'cleaned_response' in locals() else None
+        })
+        with track_stage("response_fallback"):
+            JSON_REPAIRS.inc(path="extract_segments_fallback")
+            segments = extract_segments_fallback(response_content)
+        logger.info("Fallback extracted %d segments for video %s", len(segments), video_id)
     except Exception as e:
-        logger.error(f"Error processing video {video_id} with Groq: {e}")
+        logger.error("Error processing video %s with Groq: %s", video_id, e)
         
         # Check if this is a Groq JSON validation error and try to extract failed generation
         error_str = str(e)
         if 'json_validate_failed' in error_str and 'failed_generation' in error_str:
-            logger.warning(f"Groq JSON validation failed for video {video_id}, attempting recovery")
+            logger.warning("Groq JSON validation failed for video %s, attempting recovery", video_id)
             
-            failed_generation = extract_failed_generation_from_error(error_str)
+            with track_stage("response_fallback"):
+                JSON_REPAIRS.inc(path="extract_failed_generation_from_error")
+                failed_generation = extract_failed_generation_from_error(error_str)
             if failed_generation:
                 logger.info("Successfully extracted failed generation from error")
+                response_content = failed_generation
                 
                 # Try to clean and parse the failed generation
-                cleaned_response = clean_llm_response(failed_generation)
+                with track_stage("response_fallback"):
+                    cleaned_response = clean_llm_response(failed_generation)
+                    if cleaned_response != failed_generation:
+                        JSON_REPAIRS.inc(path="clean_llm_response")
                 
                 try:
-                    response_json = json.loads(cleaned_response)
-                    segments = response_json.get('segments', [])
-                    logger.info(f"Successfully recovered from Groq JSON error, extracted {len(segments)} segments")
-                    non_important_segments = ImportantSegments(segments=segments)
-                    skip_segments = create_enhanced_skip_segments(transcription_data, non_important_segments, user_preferences)
+                    with track_stage("response_fallback"):
+                        response_json = json.loads(cleaned_response)
+                        segments = response_json.get('segments', [])
+                    logger.info("Successfully recovered from Groq JSON error, extracted %d segments", len(segments))
                 except json.JSONDecodeError:
                     # If still can't parse, use fallback
-                    logger.warning("Cleaned failed generation still invalid, using fallback extraction")
-                    segments = extract_segments_fallback(failed_generation)
-                    logger.info(f"Fallback extracted {len(segments)} segments from failed generation")
-                    non_important_segments = ImportantSegments(segments=segments)
-                    skip_segments = create_enhanced_skip_segments(transcription_data, non_important_segments, user_preferences)
+                    logger.warning("Cleaned failed generation still invalid, using fallback extraction", extra={
+                        "event": "llm_parse_failed",
+                        "video_id": video_id,
+                        "prompt": prompt,
+                        "response": failed_generation
+                    })
+                    with track_stage("response_fallback"):
+                        JSON_REPAIRS.inc(path="extract_segments_fallback")
+                        segments = extract_segments_fallback(failed_generation)
+                    logger.info("Fallback extracted %d segments from failed generation", len(segments))
             else:
                 # If we can't extract failed generation, raise the original error
                 raise HTTPException(status_code=500, detail=f"Error processing with Groq: {str(e)}")
@@ -652,31 +1594,1389 @@ async def process_video(video_id: str, user_preferences: Optional[UserPreference
             # If it's not a JSON validation error, raise the original error
             raise HTTPException(status_code=500, detail=f"Error processing with Groq: {str(e)}")
     
-    # Calculate skip percentage
+    return LLMAnalysis(
+        segments=segments,
+        route=route.name,
+        prompt_chars=len(full_prompt),
+        response_chars=len(response_content),
+        raw_response=response_content
+    )
+
+def analyze_packed_item(item: PackedPromptItem) -> LLMAnalysis:
+    return analyze_single_transcript_with_llm(
+        item.video_id, item.transcription_data, item.total_duration, item.word_count, item.user_preferences, item.route
+    )
+
+def parse_packed_response(response_content: str, videos: int) -> Dict[str, List[float]]:
+    """Segments per video key (v1, v2, ...) from a packed response; missing keys are left out"""
+    cleaned = clean_llm_response(response_content)
+    if cleaned != response_content:
+        JSON_REPAIRS.inc(path="clean_llm_response")
+    try:
+        response_json = json.loads(cleaned)
+    except json.JSONDecodeError:
+        response_json = None
+    
+    per_video: Dict[str, List[float]] = {}
+    if isinstance(response_json, dict):
+        keyed = response_json.get("videos", response_json)
+        if isinstance(keyed, dict):
+            for key, value in keyed.items():
+                if isinstance(value, dict):
+                    value = value.get("segments")
+                if isinstance(value, list):
+                    per_video[key] = [float(v) for v in value if isinstance(v, (int, float))]
+        return per_video
+    
+    # Malformed JSON: pull each video's list out by its key
+    JSON_REPAIRS.inc(path="packed_key_extraction")
+    for i in range(1, videos + 1):
+        match = re.search(rf'"v{i}"\s*:\s*\{{?\s*(?:"segments"\s*:\s*)?\[([^\]]*)\]', cleaned)
+        if match:
+            per_video[f"v{i}"] = extract_segments_fallback(match.group(1))
+    return per_video
+
+def analyze_packed_with_llm(items: List[PackedPromptItem]) -> List[Optional[LLMAnalysis]]:
+    """One LLM call for several short transcripts, fanned back out per video.
+
+    Videos the response has no entry for, or the whole batch if the call fails, come
+    back as None so prompt_packer retries them one by one in their own request context.
+    """
+    route = items[0].route
+    with track_stage("prompt_build"):
+        prompt = get_optimized_prompt_with_preferences(
+            max(item.total_duration for item in items),
+            sum(item.word_count for item in items),
+            items[0].user_preferences,
+            packed_videos=len(items)
+        )
+        sections = [
+            f"### Video v{i} ({item.total_duration:.0f}s)\n{optimize_transcript_for_llm(item.transcription_data)}"
+            for i, item in enumerate(items, start=1)
+        ]
+        full_prompt = f"{prompt}\n\nTranscripts:\n" + "\n\n".join(sections)
+    
+    try:
+        with track_stage("llm_call"):
+            response = get_groq_client().chat.completions.create(
+                model=route.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": f"You are a precision video editing AI. Return ONLY valid JSON format: {PACKED_FORMAT_EXAMPLE}. Numbers must be pure decimals without units. No explanations outside JSON."
+                    },
+                    {
+                        "role": "user",
+                        "content": full_prompt
+                    }
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+                max_completion_tokens=route.max_completion_tokens * len(items)
+            )
+        record_llm_usage(response)
+        response_content = response.choices[0].message.content
+    except Exception as e:
+        logger.warning("Packed LLM call for %d videos failed, analyzing them one by one: %s", len(items), e)
+        return [None] * len(items)
+    
+    PACKED_BATCH_SIZE.observe(len(items))
+    with track_stage("response_parse"):
+        per_video = parse_packed_response(response_content, len(items))
+    
+    results: List[Optional[LLMAnalysis]] = []
+    for i, item in enumerate(items, start=1):
+        segments = per_video.get(f"v{i}")
+        if segments is None:
+            logger.warning("Packed response had no entry for video %s, analyzing it alone", item.video_id)
+            results.append(None)
+            continue
+        # Timestamps are attributed by the response's v<i> key; transcripts all start near 0,
+        # so a time from another video can't be told apart. This only drops times that fall
+        # outside this video's own transcript.
+        first = item.transcription_data[0].start
+        last = item.transcription_data[-1].start + item.transcription_data[-1].duration
+        results.append(LLMAnalysis(
+            segments=[t for t in segments if first <= t <= last],
+            route=route.name,
+            prompt_chars=len(full_prompt) // len(items),
+            response_chars=len(response_content) // len(items),
+            # This video's slice, in the single-video format a replay can feed back
+            raw_response=json.dumps({"segments": segments})
+        ))
+    logger.info("Packed %d videos into one LLM call", len(items), extra={
+        "event": "llm_packed",
+        "video_ids": [item.video_id for item in items],
+        "prompt_chars": len(full_prompt)
+    })
+    return results
+
+prompt_packer = MicroBatcher(
+    analyze_packed_with_llm,
+    analyze_packed_item,
+    max_batch_size=PACK_MAX_BATCH,
+    max_wait=PACK_MAX_WAIT_MS / 1000
+)
+
+# Vocabulary behind the default pre-screening model: what calculate_skip_confidence and
+# the always-on categories treat as skippable, and what marks core content
+PRESCREEN_ALWAYS_SKIP_CATEGORIES = ("advertisements", "calls_to_action", "self_promotion")
+PRESCREEN_FILLER_WORDS = ['um', 'uh', 'you know', 'basically', 'literally', 'yeah']
+PRESCREEN_CORE_WORDS = ['algorithm', 'function', 'variable', 'method', 'process', 'system']
+PRESCREEN_KEYWORD_WEIGHT = 8.0
+PRESCREEN_PHRASE_WEIGHT = 12.0
+PRESCREEN_BIAS = -4.0
+# Logit offsets from the per-caption scorers, averaged over a window
+PRESCREEN_CONFIDENCE_WEIGHT = 4.0
+PRESCREEN_PREFERENCE_WEIGHT = 3.0
+# Unambiguous sponsor/CTA/self-promotion terms. A skip window is never skipped whole: only its
+# captions containing one of these are skipped without the LLM, and only by the fast tier.
+PRESCREEN_CAPTION_TERMS = sorted({
+    *(phrase.lower() for category in PRESCREEN_ALWAYS_SKIP_CATEGORIES for phrase in DEFAULT_SKIP_CATEGORIES[category]["phrases"]),
+    "sponsor", "sponsored", "sponsors", "subscribe", "patreon", "affiliate", "discount code", "promo code", "coupon", "merch"
+}, key=len, reverse=True)
+PRESCREEN_CAPTION_PATTERN = re.compile(r"\b(?:" + "|".join(map(re.escape, PRESCREEN_CAPTION_TERMS)) + r")\b")
+
+def get_prescreen_model() -> HashedTfidfClassifier:
+    """Classifier from PRESCREEN_MODEL_PATH, or built from the skip vocabularies"""
+    global _prescreen_model
+    if _prescreen_model is None:
+        if PRESCREEN_MODEL_PATH:
+            _prescreen_model = HashedTfidfClassifier.load(PRESCREEN_MODEL_PATH)
+        else:
+            term_weights: Dict[str, float] = {}
+            for category in PRESCREEN_ALWAYS_SKIP_CATEGORIES:
+                for keyword in DEFAULT_SKIP_CATEGORIES[category]["keywords"]:
+                    term_weights[keyword] = PRESCREEN_KEYWORD_WEIGHT
+                for phrase in DEFAULT_SKIP_CATEGORIES[category]["phrases"]:
+                    term_weights[phrase] = PRESCREEN_PHRASE_WEIGHT
+            for phrase in ['link in description', 'thanks for watching', 'see you next time', 'welcome back']:
+                term_weights[phrase] = PRESCREEN_PHRASE_WEIGHT
+            for word in PRESCREEN_FILLER_WORDS:
+                term_weights[word] = PRESCREEN_KEYWORD_WEIGHT / 2
+            for word in PRESCREEN_CORE_WORDS:
+                term_weights[word] = -PRESCREEN_KEYWORD_WEIGHT / 2
+            _prescreen_model = HashedTfidfClassifier.from_terms(term_weights, PRESCREEN_BIAS)
+    return _prescreen_model
+
+def preference_feature_weights(preferences: Optional[UserPreferences]) -> Dict[int, float]:
+    """Extra model weights for the terms a user asked to skip"""
+    weights: Dict[int, float] = {}
+    for needle, _, confidence in compile_preferences(preferences).rules:
+        features = term_features(needle)
+        for feature in features:
+            weights[feature] = max(weights.get(feature, 0.0), PRESCREEN_PHRASE_WEIGHT * confidence / len(features))
+    return weights
+
+def prescreen_transcript(
+    transcription_data: List[TranscriptionResult],
+    user_preferences: Optional[UserPreferences]
+) -> PrescreenResult:
+    """Drop windows that are clearly core content; every other window is left for the LLM"""
+    with track_stage("prescreen"):
+        windows = list(split_into_windows(transcription_data, PRESCREEN_WINDOW_SECONDS).values())
+        offsets = []
+        for window in windows:
+            mean_confidence = sum(calculate_skip_confidence(seg, window) for seg in window) / len(window)
+            matched = sum(1 for seg in window if matches_user_preferences(seg, user_preferences)[0]) / len(window)
+            offsets.append(
+                PRESCREEN_CONFIDENCE_WEIGHT * (mean_confidence - 0.4) + PRESCREEN_PREFERENCE_WEIGHT * matched
+            )
+        scores = get_prescreen_model().score(
+            [" ".join(seg.text for seg in window) for window in windows],
+            offsets,
+            preference_feature_weights(user_preferences)
+        )
+        
+        skip_starts: List[float] = []
+        ambiguous: List[TranscriptionResult] = []
+        decided = {"keep": 0, "skip": 0, "llm": 0}
+        words = {"keep": 0, "skip": 0, "llm": 0}
+        for window, (probability, has_skip_terms) in zip(windows, scores):
+            # A window mentioning any skip vocabulary is never waved through as core content
+            if probability < PRESCREEN_KEEP_BELOW and not has_skip_terms:
+                decision = "keep"
+            elif probability > PRESCREEN_SKIP_ABOVE:
+                # The window score says a skip is likely somewhere in it, not that every caption is one
+                decision = "skip"
+                skip_starts.extend(seg.start for seg in window if PRESCREEN_CAPTION_PATTERN.search(seg.text.lower()))
+                ambiguous.extend(window)
+            else:
+                decision = "llm"
+                ambiguous.extend(window)
+            decided[decision] += 1
+            words[decision] += sum(len(seg.text.split()) for seg in window)
+    
+    for decision, count in words.items():
+        PRESCREEN_WORDS.inc(count, decision=decision)
+    total_words = sum(words.values())
+    return PrescreenResult(
+        skip_starts=skip_starts,
+        ambiguous=ambiguous,
+        windows=decided,
+        prescreened_words=words["keep"],
+        total_words=total_words
+    )
+
+def match_fingerprints(
+    video_id: str,
+    transcription_data: List[TranscriptionResult]
+) -> tuple[List[float], List[TranscriptionResult]]:
+    """Start times of captions matching indexed skip spans, and the captions left to analyze"""
+    with track_stage("fingerprint_match"):
+        matched = set(sponsor_index.match([seg.text for seg in transcription_data]))
+    FINGERPRINT_CAPTIONS.inc(len(matched), outcome="matched")
+    FINGERPRINT_CAPTIONS.inc(len(transcription_data) - len(matched), outcome="unmatched")
+    if matched:
+        logger.info("Fingerprint index matched %d of %d captions for video %s", len(matched), len(transcription_data), video_id)
+    matched_starts = [transcription_data[i].start for i in sorted(matched)]
+    remaining = [seg for i, seg in enumerate(transcription_data) if i not in matched]
+    return matched_starts, remaining
+
+def learn_fingerprints(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    skip_starts: List[float],
+    route_name: str
+) -> None:
+    """Index runs of LLM-skipped captions whose content is skippable for everyone.
+
+    Heuristic guesses and client-supplied captions are never learned: one bad entry
+    would skip matching captions in every other video.
+    """
+    route = MODEL_ROUTES.get(route_name)
+    if route is None or route.model is None or client_transcript_var.get():
+        return
+    caption_starts = [seg.start for seg in transcription_data]
+    flagged = [False] * len(transcription_data)
+    for start_time in skip_starts:
+        i = bisect.bisect_right(caption_starts, start_time) - 1
+        if i >= 0 and start_time <= transcription_data[i].start + transcription_data[i].duration:
+            flagged[i] = True
+    flagged = [
+        flag and classify_skip_reason(seg) in FINGERPRINT_LEARN_REASONS
+        for flag, seg in zip(flagged, transcription_data)
+    ]
+    if any(flagged):
+        with track_stage("fingerprint_learn"):
+            sponsor_index.add_spans([seg.text for seg in transcription_data], flagged, source=video_id)
+
+def run_routed_analysis(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    user_preferences: Optional[UserPreferences]
+) -> LLMAnalysis:
+    """Skip captions matching known sponsor reads, then route what is left by size and analyze it"""
+    if not FINGERPRINT_INDEX_ENABLED or not transcription_data:
+        return route_and_analyze(video_id, transcription_data, user_preferences)
+    matched_starts, remaining = match_fingerprints(video_id, transcription_data)
+    if not remaining:
+        return LLMAnalysis(segments=matched_starts, route="fingerprint")
+    analysis = route_and_analyze(video_id, remaining, user_preferences)
+    learn_fingerprints(video_id, remaining, analysis.segments, analysis.route)
+    if matched_starts:
+        analysis.segments = sorted(matched_starts + analysis.segments)
+    return analysis
+
+def route_and_analyze(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    user_preferences: Optional[UserPreferences]
+) -> LLMAnalysis:
+    """Route a transcript (or a window of one) by size and analyze it"""
+    if not transcription_data:
+        return LLMAnalysis(segments=[], route="heuristic")
+    duration = transcription_data[-1].start + transcription_data[-1].duration - transcription_data[0].start
+    word_count = sum(len(seg.text.split()) for seg in transcription_data)
+    
+    route = select_model_route(duration, word_count)
+    route_start = time.perf_counter()
+    if route.model is None:
+        analysis = LLMAnalysis(segments=heuristic_skip_starts(transcription_data), route=route.name)
+        record_route(route, time.perf_counter() - route_start)
+        return analysis
+    
+    if not PRESCREEN_ENABLED:
+        analysis = analyze_transcript_with_llm(
+            video_id, transcription_data, duration, word_count, user_preferences, route
+        )
+        record_route(route, time.perf_counter() - route_start)
+        return analysis
+    
+    screen = prescreen_transcript(transcription_data, user_preferences)
+    llm_segments: List[float] = []
+    prompt_chars = response_chars = 0
+    route_name = "prescreen"
+    if screen.ambiguous:
+        # Route again on what is left: a few ambiguous windows often fit the small model
+        llm_duration = sum(seg.duration for seg in screen.ambiguous)
+        llm_words = screen.total_words - screen.prescreened_words
+        route = select_model_route(llm_duration, llm_words)
+        if route.model is None:
+            llm_segments = heuristic_skip_starts(screen.ambiguous)
+        else:
+            llm_analysis = analyze_transcript_with_llm(
+                video_id, screen.ambiguous, llm_duration, llm_words, user_preferences, route
+            )
+            llm_segments = llm_analysis.segments
+            prompt_chars, response_chars = llm_analysis.prompt_chars, llm_analysis.response_chars
+        route_name = route.name
+        record_route(route, time.perf_counter() - route_start)
+    
+    saved_fraction = screen.prescreened_words / screen.total_words if screen.total_words else 0.0
+    PRESCREEN_SAVED_FRACTION.observe(saved_fraction)
+    logger.info("Pre-screened video %s: %s windows, %.0f%% of words decided locally", video_id, screen.windows, saved_fraction * 100, extra={
+        "event": "prescreen",
+        "video_id": video_id,
+        "windows": screen.windows,
+        "saved_fraction": round(saved_fraction, 3)
+    })
+    return LLMAnalysis(
+        segments=sorted(llm_segments),
+        route=route_name,
+        prompt_chars=prompt_chars,
+        response_chars=response_chars,
+        prescreened_words=screen.prescreened_words,
+        total_words=screen.total_words
+    )
+
+def compute_skip_percentage(skip_segments: List[SkipSegment], total_duration: float) -> float:
     total_skip_time = sum(seg.end - seg.start for seg in skip_segments)
-    skip_percentage = (total_skip_time / total_duration * 100) if total_duration > 0 else 0
+    return (total_skip_time / total_duration * 100) if total_duration > 0 else 0
+
+def split_into_windows(
+    transcription_data: List[TranscriptionResult],
+    window_seconds: float = TRANSCRIPT_CHUNK_SECONDS
+) -> Dict[int, List[TranscriptionResult]]:
+    """Group captions into fixed-length time windows keyed by window index"""
+    windows: Dict[int, List[TranscriptionResult]] = {}
+    for seg in transcription_data:
+        windows.setdefault(int(seg.start // window_seconds), []).append(seg)
+    return windows
+
+def store_chunk_segments(
+    video_id: str,
+    chunk_hashes: Dict[int, str],
+    chunk_indices,
+    segments: List[float],
+    preferences_hash: str
+) -> List[float]:
+    """Split LLM start times by window, cache them per window, return those inside chunk_indices.
+
+    Windows of client-supplied captions are not cached: chunk_cache is shared by every request.
+    """
+    by_chunk: Dict[int, List[float]] = {index: [] for index in chunk_indices}
+    for start in segments:
+        index = int(start // TRANSCRIPT_CHUNK_SECONDS)
+        if index in by_chunk:
+            by_chunk[index].append(start)
+    if not client_transcript_var.get():
+        now = time.time()
+        for index, chunk_segments in by_chunk.items():
+            key = get_chunk_cache_key(video_id, index, chunk_hashes[index], preferences_hash)
+            chunk_cache[key] = {'video_id': video_id, 'segments': chunk_segments, 'timestamp': now}
+    return [start for chunk_segments in by_chunk.values() for start in chunk_segments]
+
+def get_cached_chunk_segments(
+    video_id: str,
+    chunk_index: int,
+    chunk_hash: str,
+    preferences_hash: str
+) -> Optional[List[float]]:
+    entry = chunk_cache.get(get_chunk_cache_key(video_id, chunk_index, chunk_hash, preferences_hash))
+    if entry and is_cache_valid(entry):
+        CHUNK_REQUESTS.inc(result="hit")
+        return entry['segments']
+    CHUNK_REQUESTS.inc(result="miss")
+    return None
+
+def community_skip_segments(
+    video_id: str,
+    total_duration: float,
+    user_preferences: Optional[UserPreferences]
+) -> Optional[List[SkipSegment]]:
+    """Community segments in the user's categories, or None when the store doesn't cover the video for them"""
+    if community_store is None:
+        return None
+    with track_stage("community_lookup"):
+        entry = community_store.get_segments(video_id)
+    if entry is None:
+        COMMUNITY_LOOKUPS.inc(result="absent")
+        return None
+    video_duration, segments = entry
+    if video_duration and total_duration > video_duration + COMMUNITY_DURATION_TOLERANCE_SECONDS:
+        COMMUNITY_LOOKUPS.inc(result="duration_mismatch")
+        return None
+    if user_preferences and user_preferences.enabled and user_preferences.default_categories:
+        categories = set(user_preferences.default_categories)
+    else:
+        categories = set(COMMUNITY_DEFAULT_CATEGORIES)
+    selected = [
+        SkipSegment(
+            start=start,
+            end=end,
+            confidence=1.0 if locked else 0.9,
+            reason=f"Community: {category.replace('_', ' ').title()}"
+        )
+        for start, end, category, locked in segments
+        if category in categories
+    ]
+    if not selected:
+        COMMUNITY_LOOKUPS.inc(result="other_categories")
+        return None
+    COMMUNITY_LOOKUPS.inc(result="covered")
+    return selected
+
+def merge_skip_segments(skip_segments: List[SkipSegment], extra: List[SkipSegment]) -> List[SkipSegment]:
+    """Union of two skip segment lists; overlapping or nearly touching segments are merged"""
+    merged: List[SkipSegment] = []
+    for seg in sorted(skip_segments + extra, key=lambda x: x.start):
+        if merged and seg.start <= merged[-1].end + SKIP_MERGE_GAP_SECONDS:
+            last = merged[-1]
+            last.end = max(last.end, seg.end)
+            last.confidence = max(last.confidence or 0, seg.confidence or 0)
+            if seg.reason and seg.reason not in (last.reason or ""):
+                last.reason = f"{last.reason}, {seg.reason}" if last.reason else seg.reason
+        else:
+            merged.append(seg.model_copy())
+    return merged
+
+def analyze_fast(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    user_preferences: Optional[UserPreferences]
+) -> LLMAnalysis:
+    """Local-only analysis: known sponsor reads, sponsor-term captions in pre-screen skip windows and the confidence scorer"""
+    segments = set(heuristic_skip_starts(transcription_data))
+    if FINGERPRINT_INDEX_ENABLED and transcription_data:
+        segments.update(match_fingerprints(video_id, transcription_data)[0])
+    if PRESCREEN_ENABLED and transcription_data:
+        segments.update(prescreen_transcript(transcription_data, user_preferences).skip_starts)
+    return LLMAnalysis(segments=sorted(segments), route="fast")
+
+def analyze_thorough(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    user_preferences: Optional[UserPreferences]
+) -> LLMAnalysis:
+    """Large model over the whole transcript, without pre-screening, in chunks of THOROUGH_CHUNK_WORDS"""
+    matched_starts: List[float] = []
+    remaining = transcription_data
+    if FINGERPRINT_INDEX_ENABLED and transcription_data:
+        matched_starts, remaining = match_fingerprints(video_id, transcription_data)
+    
+    chunks: List[List[TranscriptionResult]] = [[]]
+    chunk_words = 0
+    for seg in remaining:
+        words = len(seg.text.split())
+        if chunks[-1] and chunk_words + words > THOROUGH_CHUNK_WORDS:
+            chunks.append([])
+            chunk_words = 0
+        chunks[-1].append(seg)
+        chunk_words += words
+    
+    route = MODEL_ROUTES["large"]
+    route_start = time.perf_counter()
+    llm_segments: List[float] = []
+    prompt_chars = response_chars = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        duration = chunk[-1].start + chunk[-1].duration - chunk[0].start
+        analysis = analyze_transcript_with_llm(
+            video_id, chunk, duration, sum(len(seg.text.split()) for seg in chunk), user_preferences, route
+        )
+        llm_segments.extend(analysis.segments)
+        prompt_chars += analysis.prompt_chars
+        response_chars += analysis.response_chars
+    if remaining:
+        record_route(route, time.perf_counter() - route_start)
+        if FINGERPRINT_INDEX_ENABLED:
+            learn_fingerprints(video_id, remaining, llm_segments, route.name)
+    if len(chunks) > 1:
+        logger.info("Analyzed video %s in %d chunks", video_id, len(chunks))
+    return LLMAnalysis(
+        segments=sorted(matched_starts + llm_segments),
+        route="thorough",
+        prompt_chars=prompt_chars,
+        response_chars=response_chars
+    )
+
+def analyze_incrementally(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    reuse_chunks: bool = True
+) -> LLMAnalysis:
+    """Reuse cached per-window results and only send changed windows to the LLM"""
+    chunk_hashes = calculate_chunk_hashes(transcription_data)
+    reused_segments: List[float] = []
+    changed = set()
+    for index, chunk_hash in chunk_hashes.items():
+        cached_segments = get_cached_chunk_segments(video_id, index, chunk_hash, preferences_hash) if reuse_chunks else None
+        if cached_segments is None:
+            changed.add(index)
+        else:
+            reused_segments.extend(cached_segments)
+    
+    if not changed:
+        return LLMAnalysis(segments=reused_segments, route="chunk_cache")
+    
+    if len(changed) == len(chunk_hashes):
+        # Nothing reusable: analyze the whole transcript in one call and seed the chunk cache
+        analysis = run_routed_analysis(video_id, transcription_data, user_preferences)
+        store_chunk_segments(video_id, chunk_hashes, changed, analysis.segments, preferences_hash)
+        return analysis
+    
+    logger.info("Re-analyzing %d of %d transcript windows for video %s", len(changed), len(chunk_hashes), video_id)
+    changed_data = [seg for seg in transcription_data if int(seg.start // TRANSCRIPT_CHUNK_SECONDS) in changed]
+    analysis = run_routed_analysis(video_id, changed_data, user_preferences)
+    new_segments = store_chunk_segments(video_id, chunk_hashes, changed, analysis.segments, preferences_hash)
+    return LLMAnalysis(
+        segments=reused_segments + new_segments,
+        route=analysis.route,
+        prompt_chars=analysis.prompt_chars,
+        response_chars=analysis.response_chars,
+        prescreened_words=analysis.prescreened_words,
+        total_words=analysis.total_words
+    )
+
+def analyze_window_cached(
+    video_id: str,
+    chunk_index: int,
+    window: List[TranscriptionResult],
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str
+) -> List[float]:
+    """LLM start times for one window, from the chunk cache when its text is unchanged"""
+    chunk_hashes = calculate_chunk_hashes(window)
+    cached_segments = get_cached_chunk_segments(video_id, chunk_index, chunk_hashes[chunk_index], preferences_hash)
+    if cached_segments is not None:
+        return cached_segments
+    analysis = run_routed_analysis(video_id, window, user_preferences)
+    return store_chunk_segments(video_id, chunk_hashes, [chunk_index], analysis.segments, preferences_hash)
+
+def playhead_distance(window: List[TranscriptionResult], current_time: float) -> float:
+    """Seconds between the playhead and a window; windows behind the playhead rank after equally distant ones ahead"""
+    window_start = window[0].start
+    window_end = window[-1].start + window[-1].duration
+    if window_start <= current_time < window_end:
+        return 0.0
+    if window_start >= current_time:
+        return window_start - current_time
+    return current_time - window_end + 0.001
+
+async def analyze_remaining_windows(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    windows: List[tuple],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    cache_key: str
+):
+    """Background job: analyze the remaining windows nearest-first, then cache the full result"""
+    # The task inherits the starting request's context; keep its work out of that request's profile
+    stage_timings_var.set(None)
+    thread_profiles_var.set(None)
+    job = playhead_jobs[cache_key]
+    try:
+        for chunk_index, window in windows:
+            # Groq calls are blocking, keep them off the event loop; each window takes an admission
+            # slot so background windows never add LLM calls beyond the in-flight limit
+            async with admission.background_slot():
+                segments = await run_in_thread(
+                    analyze_window_cached, video_id, chunk_index, window, user_preferences, preferences_hash
+                )
+            job['segments'].extend(segments)
+            job['windows_done'] += 1
+        
+        skip_segments = await build_skip_segments(video_id, transcription_data, job['segments'], user_preferences)
+        result_cache()[cache_key] = {
+            'video_id': video_id,
+            'skip_segments': skip_segments,
+            'skip_percentage': compute_skip_percentage(skip_segments, total_duration),
+            'timestamp': time.time(),
+            'mode': "balanced"
+        }
+    except Exception as e:
+        logger.error("Background window analysis failed for video %s: %s", video_id, e)
+    finally:
+        playhead_jobs.pop(cache_key, None)
+
+async def process_from_playhead(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    current_time: float,
+    cache_key: str,
+    start_time: float
+) -> Response:
+    """Analyze the window at the playhead now and the rest of the video in the background"""
+    job = playhead_jobs.get(cache_key)
+    if job is None:
+        windows = sorted(
+            split_into_windows(transcription_data).items(),
+            key=lambda item: playhead_distance(item[1], current_time)
+        )
+        
+        first_index, first_window = windows[0]
+        segments = await run_in_thread(
+            analyze_window_cached, video_id, first_index, first_window, user_preferences, preferences_hash
+        )
+        if cache_key in playhead_jobs:
+            # Another request started the same job while this window was analyzed
+            return await process_from_playhead(
+                video_id, transcription_data, total_duration, user_preferences, preferences_hash,
+                current_time, cache_key, start_time
+            )
+        job = playhead_jobs[cache_key] = {
+            'segments': list(segments),
+            'windows_done': 1,
+            'windows_total': len(windows)
+        }
+        task = asyncio.create_task(analyze_remaining_windows(
+            video_id, transcription_data, windows[1:], total_duration, user_preferences, preferences_hash, cache_key
+        ))
+        background_jobs.add(task)
+        task.add_done_callback(background_jobs.discard)
+    
+    # Skips known so far: user preference matches everywhere plus analyzed windows
+    skip_segments = await build_skip_segments(video_id, transcription_data, list(job['segments']), user_preferences)
+    
+    logger.info("process_video summary", extra={
+        "event": "request_summary",
+        "video_id": video_id,
+        "cache": "partial",
+        "current_time": current_time,
+        "windows_done": job['windows_done'],
+        "windows_total": job['windows_total'],
+        "skip_segments": len(skip_segments),
+        "duration_ms": round((time.time() - start_time) * 1000, 1)
+    })
+    return serialize_result(ProcessResult(
+        transcription=transcription_data,
+        remove=skip_segments,
+        processing_time=time.time() - start_time,
+        total_duration=total_duration,
+        skip_percentage=compute_skip_percentage(skip_segments, total_duration),
+        complete=False,
+        cache_key=cache_key
+    ))
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """Process pool for CPU stages, started on first use"""
+    global _cpu_pool
+    if _cpu_pool is None:
+        # spawn: workers must not inherit the event loop, log listener thread or sockets
+        _cpu_pool = ProcessPoolExecutor(max_workers=CPU_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _cpu_pool
+
+def should_offload(transcription_data: List[TranscriptionResult]) -> bool:
+    return CPU_POOL_WORKERS > 0 and len(transcription_data) >= CPU_POOL_MIN_CAPTIONS
+
+def pack_transcript(transcription_data: List[TranscriptionResult]) -> tuple:
+    """Columnar transfer format for the process pool: two float64 buffers and one NUL-joined string"""
+    return (
+        array.array('d', [seg.start for seg in transcription_data]).tobytes(),
+        array.array('d', [seg.duration for seg in transcription_data]).tobytes(),
+        "\0".join(seg.text for seg in transcription_data)
+    )
+
+def unpack_transcript(packed: tuple) -> List[TranscriptionResult]:
+    starts, durations, texts = packed
+    return [
+        # Values were validated when the transcript was first built
+        TranscriptionResult.model_construct(text=text, start=start, duration=duration)
+        for text, start, duration in zip(texts.split("\0"), array.array('d', starts), array.array('d', durations))
+    ]
+
+def get_packed_transcript(video_id: str, transcription_data: List[TranscriptionResult]) -> tuple:
+    """Packed form of a transcript, memoized on its transcript_cache entry"""
+    cached = transcript_cache.get(video_id)
+    if cached and cached['transcription'] is transcription_data:
+        if 'packed' not in cached:
+            cached['packed'] = pack_transcript(transcription_data)
+        return cached['packed']
+    return pack_transcript(transcription_data)
+
+def _pool_transcript_hash(packed: tuple, include_timings: bool) -> str:
+    """Process-pool worker for calculate_transcript_hash"""
+    return calculate_transcript_hash(unpack_transcript(packed), include_timings)
+
+def _pool_skip_segments(packed: tuple, segments: List[float], preferences: Optional[dict]) -> List[tuple]:
+    """Process-pool worker for create_enhanced_skip_segments; returns plain tuples to keep the result pickle small"""
+    user_preferences = UserPreferences(**preferences) if preferences is not None else None
+    skip_segments = create_enhanced_skip_segments(
+        unpack_transcript(packed), ImportantSegments(segments=segments), user_preferences
+    )
+    return [(seg.start, seg.end, seg.confidence, seg.reason) for seg in skip_segments]
+
+async def compute_transcript_hash(video_id: str, transcription_data: List[TranscriptionResult]) -> str:
+    """calculate_transcript_hash, in the process pool for very long transcripts; client captions include timings"""
+    include_timings = client_transcript_var.get()
+    if not should_offload(transcription_data):
+        return calculate_transcript_hash(transcription_data, include_timings)
+    CPU_OFFLOADS.inc(stage="transcript_hash")
+    packed = get_packed_transcript(video_id, transcription_data)
+    return await asyncio.get_running_loop().run_in_executor(
+        get_cpu_pool(), _pool_transcript_hash, packed, include_timings
+    )
+
+async def build_skip_segments(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    segments: List[float],
+    user_preferences: Optional[UserPreferences]
+) -> List[SkipSegment]:
+    """create_enhanced_skip_segments, in the process pool for very long transcripts"""
+    with track_stage("skip_segments"):
+        if not should_offload(transcription_data):
+            return create_enhanced_skip_segments(
+                transcription_data, ImportantSegments(segments=segments), user_preferences
+            )
+        CPU_OFFLOADS.inc(stage="skip_segments")
+        packed = get_packed_transcript(video_id, transcription_data)
+        preferences = user_preferences.model_dump() if user_preferences is not None else None
+        rows = await asyncio.get_running_loop().run_in_executor(
+            get_cpu_pool(), _pool_skip_segments, packed, list(segments), preferences
+        )
+        return [SkipSegment(start=start, end=end, confidence=confidence, reason=reason) for start, end, confidence, reason in rows]
+
+def client_transcription(captions: ClientCaptions) -> List[TranscriptionResult]:
+    """Validate client-supplied captions and convert them, sorted by start time"""
+    count = len(captions.start)
+    if count == 0 or len(captions.duration) != count or len(captions.text) != count:
+        raise HTTPException(status_code=422, detail="captions.start, captions.duration and captions.text must be non-empty and of equal length.")
+    if count > MAX_CLIENT_CAPTIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_CLIENT_CAPTIONS} captions are accepted.")
+    if sum(len(text) for text in captions.text) > MAX_CLIENT_CAPTION_CHARS:
+        raise HTTPException(status_code=413, detail=f"Caption text is limited to {MAX_CLIENT_CAPTION_CHARS} characters.")
+    # Chained comparisons also reject NaN
+    if not all(0.0 <= value < math.inf for value in captions.start) or not all(0.0 <= value < math.inf for value in captions.duration):
+        raise HTTPException(status_code=422, detail="Caption start and duration must be finite, non-negative seconds.")
+    
+    order = range(count)
+    if any(a > b for a, b in zip(captions.start, captions.start[1:])):
+        order = sorted(order, key=captions.start.__getitem__)
+    # Already validated; skip per-caption model validation
+    return [
+        TranscriptionResult.model_construct(text=captions.text[i], start=captions.start[i], duration=captions.duration[i])
+        for i in order
+    ]
+
+@app.get("/process_video", response_model=ProcessResult)
+async def process_video(
+    video_id: str,
+    user_preferences: Optional[UserPreferences] = None,
+    current_time: Optional[float] = None,
+    profile_id: Optional[str] = None,
+    mode: str = "balanced",
+    upgrade: Optional[str] = None
+):
+    return await handle_process_video(video_id, user_preferences, current_time, profile_id, mode=mode, upgrade=upgrade)
+
+async def handle_process_video(
+    video_id: str,
+    user_preferences: Optional[UserPreferences],
+    current_time: Optional[float],
+    profile_id: Optional[str],
+    captions: Optional[ClientCaptions] = None,
+    mode: str = "balanced",
+    upgrade: Optional[str] = None
+):
+    start_time = time.time()
+    
+    if mode not in ANALYSIS_MODES or (upgrade is not None and upgrade not in ANALYSIS_MODES):
+        raise HTTPException(status_code=422, detail=f"mode and upgrade must be one of: {', '.join(ANALYSIS_MODES)}.")
+    video_popularity.record(video_id)
+    
+    if profile_id is not None:
+        user_preferences = preference_profiles.get(profile_id)
+        if user_preferences is None:
+            raise HTTPException(status_code=404, detail="Unknown profile_id; register the preferences again via POST /profiles.")
+    
+    if captions is not None and CLIENT_CAPTIONS_ENABLED:
+        # Used for this request only: never written to the shared transcript cache or snapshot
+        with track_stage("client_captions"):
+            transcription_data = client_transcription(captions)
+        TRANSCRIPT_SOURCES.inc(source="client")
+        # Inherited by the analysis threads and by background work this request starts
+        client_transcript_var.set(True)
+    else:
+        # Extract transcript
+        transcript_api = get_transcript_api()
+        try:
+            with track_stage("transcript_fetch"):
+                # Blocking network I/O; the fetcher bounds outbound concurrency
+                transcription_data = await run_in_thread(get_transcription_data, video_id)
+            
+        except transcript_api.TranscriptsDisabled:
+            raise HTTPException(status_code=400, detail="Transcripts are disabled for this video.")
+        except transcript_api.NoTranscriptFound:
+            raise HTTPException(status_code=400, detail="No transcript found for this video.")
+        except Exception as e:
+            logger.error("Error fetching transcript for video %s: %s", video_id, e)
+            raise HTTPException(status_code=500, detail=f"Error fetching transcript: {str(e)}")
+
+    # Calculate metadata
+    total_duration = transcription_data[-1].start + transcription_data[-1].duration if transcription_data else 0
+    transcript_hash = await compute_transcript_hash(video_id, transcription_data)
+    preferences_hash = compile_preferences(user_preferences).preferences_hash
+    client = client_transcript_var.get()
+    tier_keys = {
+        tier: get_cache_key(video_id, transcript_hash, preferences_hash, tier, client) for tier in ANALYSIS_MODES
+    }
+    cache_key = tier_keys[mode]
+    
+    def schedule_upgrade(served_mode: str) -> None:
+        """Analyze the requested upgrade tier in the background unless it is cached already"""
+        if upgrade is None or ANALYSIS_MODES.index(upgrade) <= ANALYSIS_MODES.index(served_mode):
+            return
+        if get_cached_result(video_id, tier_keys[upgrade]) is None:
+            schedule_refresh(
+                "upgrade", video_id, transcription_data, total_duration, user_preferences, preferences_hash,
+                tier_keys[upgrade], mode=upgrade
+            )
+    
+    # Check cache: the best tier already analyzed at or above the requested one is served
+    cached_result = None
+    for tier in reversed(ANALYSIS_MODES[ANALYSIS_MODES.index(mode):]):
+        cached_result = get_cached_result(video_id, tier_keys[tier], CACHE_EXPIRY_HOURS + CACHE_STALE_SERVE_HOURS)
+        if cached_result:
+            break
+    if cached_result:
+        cached_result['hits'] = cached_result.get('hits', 0) + 1
+        trigger = refresh_trigger(cached_result)
+        if trigger is not None:
+            schedule_refresh(
+                trigger, video_id, transcription_data, total_duration, user_preferences, preferences_hash,
+                tier_keys[tier], mode=tier
+            )
+        schedule_upgrade(tier)
+        cache_state = "stale" if trigger == "stale" else "hit"
+        CACHE_REQUESTS.inc(result=cache_state)
+        response = serialize_result(ProcessResult(
+            transcription=transcription_data,
+            remove=cached_result['skip_segments'],
+            processing_time=time.time() - start_time,
+            total_duration=total_duration,
+            skip_percentage=cached_result['skip_percentage'],
+            mode=tier
+        ))
+        REQUEST_DURATION.observe(time.time() - start_time, cache=cache_state)
+        logger.info("process_video summary", extra={
+            "event": "request_summary",
+            "video_id": video_id,
+            "cache": cache_state,
+            "mode": tier,
+            "captions": len(transcription_data),
+            "skip_segments": len(cached_result['skip_segments']),
+            "duration_ms": round((time.time() - start_time) * 1000, 1)
+        })
+        return response
+    CACHE_REQUESTS.inc(result="miss")
+    
+    community_segments = community_skip_segments(video_id, total_duration, user_preferences)
+    if mode == "fast" or (mode == "balanced" and community_segments is not None):
+        # Local scoring (and community segments) only: no LLM, so no admission slot and no playhead windows
+        response = await analyze_cache_miss(
+            video_id, transcription_data, total_duration, user_preferences, preferences_hash, cache_key, start_time,
+            mode=mode, community_segments=community_segments
+        )
+        schedule_upgrade(mode)
+        return response
+    
+    # Polls for a playhead analysis already under way only merge known results
+    playhead_mode = (
+        mode == "balanced" and current_time is not None and total_duration > TRANSCRIPT_CHUNK_SECONDS * 1.5
+    )
+    if playhead_mode and cache_key in playhead_jobs:
+        return await process_from_playhead(
+            video_id, transcription_data, total_duration, user_preferences, preferences_hash,
+            current_time, cache_key, start_time
+        )
+    
+    try:
+        async with admission.slot() as queue_wait:
+            ADMISSION_QUEUE_WAIT.observe(queue_wait)
+            if playhead_mode:
+                # Long video with a known playhead: answer for the upcoming window first
+                return await process_from_playhead(
+                    video_id, transcription_data, total_duration, user_preferences, preferences_hash,
+                    current_time, cache_key, start_time
+                )
+            response = await analyze_cache_miss(
+                video_id, transcription_data, total_duration, user_preferences, preferences_hash, cache_key, start_time,
+                mode=mode, community_segments=community_segments
+            )
+        schedule_upgrade(mode)
+        return response
+    except AdmissionRejected as rejected:
+        ADMISSION_SHED.inc(reason=rejected.reason, action=OVERLOAD_ACTION)
+        logger.warning("Shedding video %s: %s", video_id, rejected.reason, extra={
+            "event": "admission_shed",
+            "video_id": video_id,
+            "reason": rejected.reason,
+            "action": OVERLOAD_ACTION,
+            "retry_after": rejected.retry_after
+        })
+        if OVERLOAD_ACTION != "degrade":
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, retry later.",
+                headers={"Retry-After": str(rejected.retry_after)}
+            )
+        return await process_keyword_only(video_id, transcription_data, total_duration, user_preferences, start_time)
+
+async def process_keyword_only(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    start_time: float
+) -> Response:
+    """Degraded answer under overload: preference matches and local scoring only, not cached"""
+    skip_segments = await build_skip_segments(
+        video_id, transcription_data, heuristic_skip_starts(transcription_data), user_preferences
+    )
+    REQUEST_DURATION.observe(time.time() - start_time, cache="degraded")
+    return serialize_result(ProcessResult(
+        transcription=transcription_data,
+        remove=skip_segments,
+        processing_time=time.time() - start_time,
+        total_duration=total_duration,
+        skip_percentage=compute_skip_percentage(skip_segments, total_duration),
+        complete=False,
+        degraded=True
+    ))
+
+async def analyze_and_cache(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    cache_key: str,
+    reuse_chunks: bool = True,
+    mode: str = "balanced",
+    community_segments: Optional[List[SkipSegment]] = None,
+    bypass_llm_cache: bool = False
+) -> Tuple[LLMAnalysis, List[SkipSegment], float]:
+    """Analyze the transcript at the given tier and store the result under cache_key.
+
+    community_segments (from community_skip_segments) are merged into the result; below
+    the thorough tier they replace the LLM call. bypass_llm_cache asks the model again
+    instead of replaying llm_response_cache.
+    """
+    # Worker threads copy the context, so the flag reaches every LLM call of this analysis
+    bypass_token = llm_cache_bypass_var.set(bypass_llm_cache)
+    try:
+        return await _analyze_and_cache(
+            video_id, transcription_data, total_duration, user_preferences, preferences_hash, cache_key,
+            reuse_chunks, mode, community_segments
+        )
+    finally:
+        llm_cache_bypass_var.reset(bypass_token)
+
+async def _analyze_and_cache(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    cache_key: str,
+    reuse_chunks: bool,
+    mode: str,
+    community_segments: Optional[List[SkipSegment]]
+) -> Tuple[LLMAnalysis, List[SkipSegment], float]:
+    # Groq calls are blocking, so analysis runs off the event loop
+    if mode == "fast" or (mode == "balanced" and community_segments is not None):
+        analysis = await run_in_thread(analyze_fast, video_id, transcription_data, user_preferences)
+        if community_segments is not None:
+            analysis.route = "community"
+    elif mode == "thorough":
+        analysis = await run_in_thread(analyze_thorough, video_id, transcription_data, user_preferences)
+    else:
+        # Reuse per-window results from earlier transcript revisions; changed windows are
+        # routed by size (heuristics only, small model, or large-context model)
+        analysis = await run_in_thread(
+            analyze_incrementally, video_id, transcription_data, user_preferences, preferences_hash, reuse_chunks
+        )
+    
+    skip_segments = await build_skip_segments(video_id, transcription_data, analysis.segments, user_preferences)
+    if community_segments is not None:
+        skip_segments = merge_skip_segments(skip_segments, community_segments)
+    
+    # Calculate skip percentage
+    skip_percentage = compute_skip_percentage(skip_segments, total_duration)
     
     # Cache the result
-    video_cache[cache_key] = {
+    result_cache()[cache_key] = {
+        'video_id': video_id,
         'skip_segments': skip_segments,
         'skip_percentage': skip_percentage,
-        'timestamp': time.time()
+        'timestamp': time.time(),
+        'mode': mode
     }
+    return analysis, skip_segments, skip_percentage
+
+def refresh_trigger(cached_result: dict) -> Optional[str]:
+    """'stale' for an expired entry served from the stale window, 'ahead' for a hot entry close to expiry"""
+    age_hours = (time.time() - cached_result['timestamp']) / 3600
+    if age_hours >= CACHE_EXPIRY_HOURS:
+        return "stale"
+    if age_hours >= CACHE_EXPIRY_HOURS * REFRESH_AHEAD_FRACTION and cached_result.get('hits', 0) >= REFRESH_AHEAD_MIN_HITS:
+        return "ahead"
+    return None
+
+def schedule_refresh(
+    trigger: str,
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    cache_key: str,
+    mode: str = "balanced"
+) -> None:
+    """Start one background (re-)analysis of cache_key at the given tier if the refresh budget allows"""
+    if cache_key in refreshing_keys:
+        return
+    if len(refreshing_keys) >= MAX_CONCURRENT_REFRESHES:
+        CACHE_REFRESHES.inc(trigger=trigger, outcome="over_budget")
+        return
+    if admission.queued:
+        # Cache misses are already waiting for the LLM; they go first
+        CACHE_REFRESHES.inc(trigger=trigger, outcome="deferred")
+        return
+    refreshing_keys.add(cache_key)
+    CACHE_REFRESHES.inc(trigger=trigger, outcome="started")
+    task = asyncio.create_task(refresh_cached_result(
+        trigger, video_id, transcription_data, total_duration, user_preferences, preferences_hash, cache_key, mode
+    ))
+    background_jobs.add(task)
+    task.add_done_callback(background_jobs.discard)
+
+async def refresh_cached_result(
+    trigger: str,
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    cache_key: str,
+    mode: str = "balanced"
+) -> None:
+    # The task inherits the triggering request's context; keep its work out of that request's profile
+    stage_timings_var.set(None)
+    thread_profiles_var.set(None)
+    try:
+        # Like cache misses, background LLM work counts against the in-flight limit
+        async with admission.background_slot():
+            # Refreshes re-analyze from scratch: the window results and raw LLM answers are as old
+            # as the entry being refreshed. Upgrades are a different tier and may reuse both
+            refresh = trigger != "upgrade"
+            await analyze_and_cache(
+                video_id, transcription_data, total_duration, user_preferences, preferences_hash, cache_key,
+                reuse_chunks=not refresh, mode=mode,
+                community_segments=community_skip_segments(video_id, total_duration, user_preferences),
+                bypass_llm_cache=refresh
+            )
+        CACHE_REFRESHES.inc(trigger=trigger, outcome="completed")
+        logger.info("Refreshed cached %s result for video %s (%s)", mode, video_id, trigger)
+    except Exception as e:
+        # The old entry stays in place; the next hit retries
+        CACHE_REFRESHES.inc(trigger=trigger, outcome="failed")
+        logger.warning("Background refresh of video %s failed: %s", video_id, e)
+    finally:
+        refreshing_keys.discard(cache_key)
+
+async def analyze_cache_miss(
+    video_id: str,
+    transcription_data: List[TranscriptionResult],
+    total_duration: float,
+    user_preferences: Optional[UserPreferences],
+    preferences_hash: str,
+    cache_key: str,
+    start_time: float,
+    mode: str = "balanced",
+    community_segments: Optional[List[SkipSegment]] = None
+) -> Response:
+    """Full analysis of a cache miss at the given tier, cached and serialized"""
+    with corpus_capture() as capture:
+        analysis, skip_segments, skip_percentage = await analyze_and_cache(
+            video_id, transcription_data, total_duration, user_preferences, preferences_hash, cache_key,
+            mode=mode, community_segments=community_segments
+        )
     
     processing_time = time.time() - start_time
     
-    return ProcessResult(
+    response = serialize_result(ProcessResult(
         transcription=transcription_data,
         remove=skip_segments,
         processing_time=processing_time,
         total_duration=total_duration,
-        skip_percentage=skip_percentage
-    )
+        skip_percentage=skip_percentage,
+        mode=mode
+    ))
+    REQUEST_DURATION.observe(time.time() - start_time, cache="miss")
+    logger.info("process_video summary", extra={
+        "event": "request_summary",
+        "video_id": video_id,
+        "cache": "miss",
+        "mode": mode,
+        "route": analysis.route,
+        "captions": len(transcription_data),
+        "prompt_chars": analysis.prompt_chars,
+        "response_chars": analysis.response_chars,
+        "llm_segments": len(analysis.segments),
+        "skip_segments": len(skip_segments),
+        "skip_percentage": round(skip_percentage, 1),
+        "duration_ms": round(processing_time * 1000, 1)
+    })
+    if capture is not None:
+        record = build_record(
+            video_id,
+            user_preferences.model_dump() if user_preferences else None,
+            [seg.model_dump() for seg in transcription_data],
+            capture["llm_responses"],
+            capture["stage_timings"],
+            {
+                "route": analysis.route,
+                "mode": mode,
+                "skip_segments": [seg.model_dump() for seg in skip_segments],
+                "skip_percentage": skip_percentage
+            }
+        )
+        task = asyncio.create_task(asyncio.to_thread(corpus_recorder.append, record))
+        background_jobs.add(task)
+        task.add_done_callback(background_jobs.discard)
+    return response
 
 @app.post("/process_video", response_model=ProcessResult)
 async def process_video_post(request: ProcessVideoRequest):
     """Process video with user preferences via POST request"""
-    return await process_video(request.video_id, request.user_preferences)
+    return await handle_process_video(
+        request.video_id, request.user_preferences, request.current_time, request.profile_id, request.captions,
+        request.mode, request.upgrade
+    )
+
+@app.get("/results/{cache_key}")
+async def get_result(cache_key: str):
+    """Progress of a playhead analysis, then its full result; lets pollers skip resending the transcript"""
+    job = playhead_jobs.get(cache_key)
+    if job is not None:
+        return {
+            "cache_key": cache_key,
+            "complete": False,
+            "windows_done": job['windows_done'],
+            "windows_total": job['windows_total']
+        }
+    # Client-caption results only ever live in their own cache
+    cache = client_result_cache if cache_key.endswith("_client") else video_cache
+    cached_result = cache.get(cache_key)
+    if cached_result is None or not is_cache_valid(cached_result):
+        # Failed, evicted, or analyzed by another worker: the caller sends the full request again
+        raise HTTPException(status_code=404, detail="Unknown or expired cache_key; send the full request again.")
+    return {
+        "cache_key": cache_key,
+        "complete": True,
+        "remove": cached_result['skip_segments'],
+        "skip_percentage": cached_result['skip_percentage'],
+        "mode": cached_result.get('mode', 'balanced')
+    }
+
+@app.post("/profiles")
+async def create_profile(preferences: UserPreferences):
+    """Register a preference set; pass the returned profile_id to /process_video instead of the full preferences"""
+    profile_id = register_profile(preferences)
+    compiled = compile_preferences(preferences)
+    return {
+        "profile_id": profile_id,
+        "preferences_hash": compiled.preferences_hash,
+        "match_rules": len(compiled.rules),
+        "prompt_section_chars": len(compiled.prompt_section)
+    }
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Preferences stored under a profile id"""
+    preferences = preference_profiles.get(profile_id)
+    if preferences is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {"profile_id": profile_id, "preferences": preferences}
+
+async def periodic_snapshot_writer():
+    """Rewrite the corpus snapshot every SNAPSHOT_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            videos = await asyncio.to_thread(save_corpus_snapshot, SNAPSHOT_PATH)
+            logger.info("Wrote periodic corpus snapshot with %d videos", videos)
+        except Exception as e:
+            logger.error("Periodic corpus snapshot failed: %s", e)
+
+@app.on_event("startup")
+async def warm_up_on_startup():
+    """Initialize providers in the background so the first request doesn't pay for it"""
+    if not WARMUP_ON_STARTUP:
+        return
+    task = asyncio.create_task(asyncio.to_thread(warm_up_providers))
+    background_jobs.add(task)
+    task.add_done_callback(background_jobs.discard)
+
+@app.on_event("startup")
+async def load_snapshot_on_startup():
+    """Warm start from the corpus snapshot and schedule periodic snapshots"""
+    if not SNAPSHOT_PATH:
+        return
+    if os.path.exists(SNAPSHOT_PATH):
+        try:
+            load_corpus_snapshot(SNAPSHOT_PATH)
+        except (OSError, ValueError) as e:
+            logger.error("Could not load corpus snapshot %s: %s", SNAPSHOT_PATH, e)
+    if SNAPSHOT_INTERVAL_SECONDS > 0:
+        task = asyncio.create_task(periodic_snapshot_writer())
+        periodic_jobs.add(task)
+        task.add_done_callback(periodic_jobs.discard)
+
+@app.on_event("startup")
+async def load_community_segments_on_startup():
+    """Memory-map the imported community segment store"""
+    global community_store
+    if not COMMUNITY_SEGMENTS_PATH:
+        return
+    try:
+        community_store = CommunitySegmentStore(COMMUNITY_SEGMENTS_PATH)
+        logger.info("Loaded community segment store %s with %d videos", COMMUNITY_SEGMENTS_PATH, len(community_store))
+    except (OSError, ValueError) as e:
+        logger.error("Could not load community segment store %s: %s", COMMUNITY_SEGMENTS_PATH, e)
+
+async def periodic_fingerprint_writer():
+    """Persist the fingerprint index every FINGERPRINT_SAVE_INTERVAL_SECONDS when it changed"""
+    while True:
+        await asyncio.sleep(FINGERPRINT_SAVE_INTERVAL_SECONDS)
+        if not sponsor_index.dirty:
+            continue
+        try:
+            entries = await asyncio.to_thread(sponsor_index.save, FINGERPRINT_INDEX_PATH)
+            logger.info("Wrote fingerprint index with %d entries", entries)
+        except Exception as e:
+            logger.error("Periodic fingerprint index write failed: %s", e)
+
+@app.on_event("startup")
+async def load_fingerprints_on_startup():
+    """Load the persisted fingerprint index and schedule periodic writes"""
+    if not FINGERPRINT_INDEX_ENABLED or not FINGERPRINT_INDEX_PATH:
+        return
+    if os.path.exists(FINGERPRINT_INDEX_PATH):
+        try:
+            entries = await asyncio.to_thread(sponsor_index.load, FINGERPRINT_INDEX_PATH)
+            logger.info("Loaded fingerprint index %s with %d entries", FINGERPRINT_INDEX_PATH, entries)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Could not load fingerprint index %s: %s", FINGERPRINT_INDEX_PATH, e)
+    if FINGERPRINT_SAVE_INTERVAL_SECONDS > 0:
+        task = asyncio.create_task(periodic_fingerprint_writer())
+        periodic_jobs.add(task)
+        task.add_done_callback(periodic_jobs.discard)
+
+async def periodic_llm_cache_writer():
+    """Persist the LLM response cache every LLM_CACHE_SAVE_INTERVAL_SECONDS when it changed"""
+    while True:
+        await asyncio.sleep(LLM_CACHE_SAVE_INTERVAL_SECONDS)
+        if not llm_response_cache.dirty:
+            continue
+        try:
+            entries = await asyncio.to_thread(llm_response_cache.save, LLM_CACHE_PATH)
+            logger.info("Wrote LLM response cache with %d entries", entries)
+        except Exception as e:
+            logger.error("Periodic LLM response cache write failed: %s", e)
+
+@app.on_event("startup")
+async def load_llm_cache_on_startup():
+    """Load the persisted LLM response cache and schedule periodic writes"""
+    if not LLM_CACHE_ENABLED or not LLM_CACHE_PATH:
+        return
+    if os.path.exists(LLM_CACHE_PATH):
+        try:
+            entries = await asyncio.to_thread(llm_response_cache.load, LLM_CACHE_PATH)
+            logger.info("Loaded LLM response cache %s with %d entries", LLM_CACHE_PATH, entries)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Could not load LLM response cache %s: %s", LLM_CACHE_PATH, e)
+    if LLM_CACHE_SAVE_INTERVAL_SECONDS > 0:
+        task = asyncio.create_task(periodic_llm_cache_writer())
+        periodic_jobs.add(task)
+        task.add_done_callback(periodic_jobs.discard)
+
+@app.on_event("shutdown")
+async def drain_background_jobs():
+    """Let background analyses finish before the pools they use are closed"""
+    for task in list(periodic_jobs):
+        task.cancel()
+    pending = list(background_jobs)
+    if not pending:
+        return
+    logger.info("Draining %d background jobs", len(pending))
+    _, still_running = await asyncio.wait(pending, timeout=SHUTDOWN_DRAIN_SECONDS)
+    if still_running:
+        logger.warning("Abandoning %d background jobs still running after %.0fs", len(still_running), SHUTDOWN_DRAIN_SECONDS)
+
+@app.on_event("shutdown")
+async def shutdown_cpu_pool():
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+@app.on_event("shutdown")
+async def close_transcript_fetcher():
+    if "transcript_fetcher" in _providers:
+        _providers["transcript_fetcher"].close()
+
+@app.on_event("shutdown")
+async def write_snapshot_on_shutdown():
+    """Persist caches so the next worker starts warm"""
+    if not SNAPSHOT_PATH:
+        return
+    try:
+        videos = await asyncio.to_thread(save_corpus_snapshot, SNAPSHOT_PATH)
+        logger.info("Wrote corpus snapshot with %d videos on shutdown", videos)
+    except Exception as e:
+        logger.error("Corpus snapshot on shutdown failed: %s", e)
+
+@app.on_event("shutdown")
+async def write_fingerprints_on_shutdown():
+    if not FINGERPRINT_INDEX_ENABLED or not FINGERPRINT_INDEX_PATH or not sponsor_index.dirty:
+        return
+    try:
+        entries = await asyncio.to_thread(sponsor_index.save, FINGERPRINT_INDEX_PATH)
+        logger.info("Wrote fingerprint index with %d entries on shutdown", entries)
+    except Exception as e:
+        logger.error("Fingerprint index write on shutdown failed: %s", e)
+
+@app.on_event("shutdown")
+async def write_llm_cache_on_shutdown():
+    if not LLM_CACHE_ENABLED or not LLM_CACHE_PATH or not llm_response_cache.dirty:
+        return
+    try:
+        entries = await asyncio.to_thread(llm_response_cache.save, LLM_CACHE_PATH)
+        logger.info("Wrote LLM response cache with %d entries on shutdown", entries)
+    except Exception as e:
+        logger.error("LLM response cache write on shutdown failed: %s", e)
+
+@app.post("/admin/snapshot")
+async def trigger_snapshot(request: Request, reload: bool = False):
+    """Write the corpus snapshot now, optionally re-mapping it in this worker"""
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if not SNAPSHOT_PATH:
+        raise HTTPException(status_code=400, detail="SNAPSHOT_PATH is not configured")
+    videos = await asyncio.to_thread(save_corpus_snapshot, SNAPSHOT_PATH)
+    if reload:
+        load_corpus_snapshot(SNAPSHOT_PATH)
+    return {"path": SNAPSHOT_PATH, "videos": videos}
 
 @app.get("/health")
 async def health_check():
@@ -684,31 +2984,167 @@ async def health_check():
     return {
         "status": "healthy", 
         "cache_size": len(video_cache),
-        "model": "meta-llama/llama-4-scout-17b-16e-instruct",
+        "chunk_cache_size": len(chunk_cache),
+        "model": LARGE_MODEL,
         "provider": "Groq"
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once every provider is initialized, 503 while still warming up"""
+    providers = {
+        name: {"initialized": name in _providers, "init_seconds": round(provider_init_seconds[name], 4) if name in provider_init_seconds else None}
+        for name in PROVIDER_NAMES
+    }
+    ready = all(provider["initialized"] for provider in providers.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "providers": providers,
+            "warmup_on_startup": WARMUP_ON_STARTUP,
+            "snapshot_loaded": corpus_snapshot is not None,
+            "uptime_seconds": round(time.time() - process_started_at, 3)
+        }
+    )
+
 @app.delete("/cache/{video_id}")
 async def clear_video_cache(video_id: str):
-    """Clear cache for specific video"""
-    removed_keys = [key for key in video_cache.keys() if key.startswith(video_id)]
-    for key in removed_keys:
-        del video_cache[key]
-    return {"message": f"Cleared {len(removed_keys)} cache entries for video {video_id}"}
+    """Clear every cache layer for a specific video"""
+    removed_keys = []
+    for cache in (video_cache, client_result_cache):
+        keys = [key for key, entry in cache.items() if entry.get('video_id') == video_id]
+        for key in keys:
+            del cache[key]
+        removed_keys += keys
+    for key in [key for key, entry in chunk_cache.items() if entry['video_id'] == video_id]:
+        del chunk_cache[key]
+    transcript_cache.pop(video_id, None)
+    llm_entries = llm_response_cache.discard_video(video_id)
+    # The snapshot is read-only; entries written before now are ignored for this video
+    cleared_videos[video_id] = time.time()
+    return {
+        "message": f"Cleared {len(removed_keys)} cache entries for video {video_id}",
+        "llm_responses": llm_entries
+    }
+
+def hot_videos(limit: int) -> List[dict]:
+    """Most requested videos by sketch estimate, most popular first"""
+    return [
+        {"video_id": video_id, "estimated_requests": requests}
+        for video_id, requests in video_popularity.hot(limit)
+    ]
+
+@app.get("/api/hot_videos")
+async def get_hot_videos(limit: int = HOT_VIDEOS_TRACKED):
+    """Most requested videos on this worker, e.g. to warm a new node's caches"""
+    return {"videos": hot_videos(min(max(limit, 0), HOT_VIDEOS_TRACKED))}
+
+def cache_layer_stats(counter, hit_results: Tuple[str, ...]) -> dict:
+    """Hits, misses and hit rate of a cache layer from its lookup counter"""
+    hits = sum(counter.value(result=result) for result in hit_results)
+    misses = counter.value(result="miss")
+    lookups = hits + misses
+    return {"hits": int(hits), "misses": int(misses), "hit_rate": round(hits / lookups, 3) if lookups else None}
 
 @app.get("/api/stats")
 async def get_api_stats():
     """Get API usage statistics"""
     return {
         "total_cached_videos": len(video_cache),
+        "cached_transcripts": len(transcript_cache),
+        "cache_layers": {
+            # Final skip segments, per-window LLM start times, raw LLM output by exact request
+            "result": {**cache_layer_stats(CACHE_REQUESTS, ("hit", "stale")), "entries": len(video_cache)},
+            "chunk": {**cache_layer_stats(CHUNK_REQUESTS, ("hit",)), "entries": len(chunk_cache)},
+            "llm_response": {**llm_response_cache.stats(), "enabled": LLM_CACHE_ENABLED, "path": LLM_CACHE_PATH},
+            "postprocess_signature": POSTPROCESS_SIGNATURE
+        },
+        "cache_admission": {
+            # TinyLFU admission of the result and transcript caches
+            "result": video_cache.stats(),
+            "client_result": client_result_cache.stats(),
+            "transcript": transcript_cache.stats(),
+            "chunk": chunk_cache.stats(),
+            "sketch": video_popularity.stats()
+        },
+        "hot_videos": hot_videos(20),
+        "cache_refresh": {
+            "in_progress": len(refreshing_keys),
+            "max_concurrent": MAX_CONCURRENT_REFRESHES,
+            "stale_serve_hours": CACHE_STALE_SERVE_HOURS,
+            "refresh_ahead_fraction": REFRESH_AHEAD_FRACTION,
+            "refresh_ahead_min_hits": REFRESH_AHEAD_MIN_HITS
+        },
+        "preference_profiles": len(preference_profiles),
+        "admission": {**admission.stats(), "overload_action": OVERLOAD_ACTION},
+        "snapshot_videos": len(corpus_snapshot) if corpus_snapshot is not None else 0,
+        "community_segments": {
+            "path": COMMUNITY_SEGMENTS_PATH,
+            "videos": len(community_store) if community_store is not None else 0,
+            "segments": community_store.segment_count if community_store is not None else 0,
+            "default_categories": COMMUNITY_DEFAULT_CATEGORIES,
+            "lookups": {
+                result: COMMUNITY_LOOKUPS.value(result=result)
+                for result in ("covered", "other_categories", "duration_mismatch", "absent")
+            }
+        },
+        "corpus_recording": corpus_recorder.stats() if corpus_recorder is not None else None,
+        "fingerprint_index": {**sponsor_index.stats(), "enabled": FINGERPRINT_INDEX_ENABLED, "path": FINGERPRINT_INDEX_PATH},
+        "transcript_fetch": _providers["transcript_fetcher"].stats() if "transcript_fetcher" in _providers else None,
         "model_info": {
-            "name": "meta-llama/llama-4-scout-17b-16e-instruct",
+            "name": LARGE_MODEL,
             "provider": "Groq",
             "context_window": "128K tokens",
             "features": ["ultra-fast inference", "multimodal", "JSON mode"]
+        },
+        "prompt_packing": {**prompt_packer.stats(), "enabled": PROMPT_PACKING_ENABLED, "max_words": PACK_MAX_WORDS},
+        "routing": {
+            "routes": {
+                name: {"model": route.model, "max_completion_tokens": route.max_completion_tokens}
+                for name, route in MODEL_ROUTES.items()
+            },
+            "thresholds": {
+                "heuristic_max_words": ROUTE_HEURISTIC_MAX_WORDS,
+                "heuristic_max_duration": ROUTE_HEURISTIC_MAX_DURATION,
+                "small_max_words": ROUTE_SMALL_MAX_WORDS,
+                "low_density_wpm": ROUTE_LOW_DENSITY_WPM
+            },
+            "decisions": {
+                name: {
+                    "requests": stats["requests"],
+                    "avg_latency_seconds": round(stats["total_seconds"] / stats["requests"], 4)
+                }
+                for name, stats in route_stats.items()
+            }
         }
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Per-stage latency histograms and pipeline counters in Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/admin/profiling")
+async def get_profiling_settings(request: Request):
+    """Current profiling toggle and sample rate"""
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return {**profiling_state, "profile_dir": PROFILE_DIR}
+
+@app.post("/admin/profiling")
+async def set_profiling_settings(request: Request, enabled: Optional[bool] = None, sample_rate: Optional[float] = None):
+    """Toggle profiling for every request, or set a sample rate between 0 and 1"""
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if sample_rate is not None:
+        if not 0.0 <= sample_rate <= 1.0:
+            raise HTTPException(status_code=400, detail="sample_rate must be between 0 and 1")
+        profiling_state["sample_rate"] = sample_rate
+    if enabled is not None:
+        profiling_state["enabled"] = enabled
+    return {**profiling_state, "profile_dir": PROFILE_DIR}
+
 @app.get("/preferences/categories")
 async def get_default_categories():
     """Get available default skip categories"""
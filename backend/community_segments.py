@@ -0,0 +1,210 @@
+"""
+Compact on-disk store of crowd-sourced skip segments, keyed by video id.
+
+Community skip databases publish bulk dumps of voted segments (for example
+SponsorBlock's sponsorTimes.csv). import_dump() maps their categories onto our
+DEFAULT_SKIP_CATEGORIES names, drops hidden, downvoted and non-skip entries,
+and writes a file that is memory-mapped and queried in place:
+
+    header          magic, version, counts and section offsets
+    video table     fixed-width records sorted by video_id (binary searched)
+    segments        fixed-width records: start, end, category index, locked flag
+    categories      JSON list of category names, indexed by the segment records
+
+Like the corpus snapshot (backend/snapshot.py), a lookup only touches the video
+table and the requested video's segments, so a store with millions of videos
+opens instantly and costs no heap.
+"""
+
+import os
+import csv
+import sys
+import gzip
+import json
+import mmap
+import struct
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"YTCSEG01"
+VERSION = 1
+VIDEO_ID_BYTES = 32
+
+# magic, version, video count, segment count, then offsets of the three sections
+HEADER = struct.Struct("<8sIIQ3Q")
+# video_id, first segment index, segment count, video duration (0 = unknown)
+VIDEO_RECORD = struct.Struct(f"<{VIDEO_ID_BYTES}sQId")
+# start, end, category index, locked
+SEGMENT_RECORD = struct.Struct("<ddBB")
+
+# Dump category -> DEFAULT_SKIP_CATEGORIES name; unmapped categories are not imported
+CATEGORY_MAP = {
+    "sponsor": "advertisements",
+    "exclusive_access": "advertisements",
+    "selfpromo": "self_promotion",
+    "interaction": "calls_to_action",
+    "preview": "repetitive_content",
+    "filler": "filler_speech",
+}
+
+
+def _encode_video_id(video_id: str) -> bytes:
+    encoded = video_id.encode()
+    if len(encoded) > VIDEO_ID_BYTES:
+        raise ValueError(f"video_id too long for community store: {video_id!r}")
+    return encoded.ljust(VIDEO_ID_BYTES, b"\0")
+
+
+def _open_dump(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    return open(path, newline="", encoding="utf-8")
+
+
+def read_dump(path: str, min_votes: int = 0, stats: Optional[Dict[str, int]] = None) -> Iterator[tuple]:
+    """(video_id, start, end, category, locked, video_duration) for each usable row of a CSV dump"""
+    stats = stats if stats is not None else {}
+    csv.field_size_limit(sys.maxsize)
+    with _open_dump(path) as f:
+        for row in csv.DictReader(f):
+            stats["rows"] = stats.get("rows", 0) + 1
+            category = CATEGORY_MAP.get(row.get("category") or "sponsor")
+            if category is None:
+                stats["unmapped_category"] = stats.get("unmapped_category", 0) + 1
+                continue
+            try:
+                start = float(row["startTime"])
+                end = float(row["endTime"])
+                votes = int(row.get("votes") or 0)
+                locked = (row.get("locked") or "0") == "1"
+                duration = float(row.get("videoDuration") or 0)
+            except (KeyError, ValueError):
+                stats["malformed"] = stats.get("malformed", 0) + 1
+                continue
+            video_id = row.get("videoID") or ""
+            if (
+                (row.get("actionType") or "skip") != "skip"
+                or (row.get("service") or "YouTube") != "YouTube"
+                or (row.get("hidden") or "0") != "0"
+                or (row.get("shadowHidden") or "0") != "0"
+                or (votes < min_votes and not locked)
+            ):
+                stats["filtered"] = stats.get("filtered", 0) + 1
+                continue
+            if not video_id or len(video_id.encode()) > VIDEO_ID_BYTES or not 0 <= start < end:
+                stats["malformed"] = stats.get("malformed", 0) + 1
+                continue
+            stats["imported"] = stats.get("imported", 0) + 1
+            yield video_id, start, end, category, locked, duration
+
+
+def write_store(path: str, rows: Iterable[tuple]) -> Tuple[int, int]:
+    """Write a store atomically from read_dump() rows; returns (videos, segments) written"""
+    videos: Dict[str, list] = {}
+    durations: Dict[str, float] = {}
+    categories: List[str] = []
+    category_index: Dict[str, int] = {}
+    for video_id, start, end, category, locked, duration in rows:
+        index = category_index.get(category)
+        if index is None:
+            index = category_index[category] = len(categories)
+            categories.append(category)
+        videos.setdefault(video_id, []).append((start, end, index, 1 if locked else 0))
+        if duration > 0:
+            durations[video_id] = max(durations.get(video_id, 0.0), duration)
+
+    records = []
+    segment_count = 0
+    for video_id in sorted(videos, key=_encode_video_id):
+        segments = sorted(set(videos[video_id]))
+        records.append((video_id, segment_count, segments))
+        segment_count += len(segments)
+
+    table_offset = HEADER.size
+    segments_offset = table_offset + len(records) * VIDEO_RECORD.size
+    categories_offset = segments_offset + segment_count * SEGMENT_RECORD.size
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".community-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, len(records), segment_count, table_offset, segments_offset, categories_offset
+            ))
+            for video_id, first, segments in records:
+                f.write(VIDEO_RECORD.pack(_encode_video_id(video_id), first, len(segments), durations.get(video_id, 0.0)))
+            for _, _, segments in records:
+                for segment in segments:
+                    f.write(SEGMENT_RECORD.pack(*segment))
+            f.write(json.dumps(categories).encode())
+        # Readers keep their mapping of the old inode; new readers see the new file
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(records), segment_count
+
+
+def import_dump(dump_path: str, store_path: str, min_votes: int = 0) -> Dict[str, int]:
+    """Convert a community CSV dump (optionally .gz) into a store; returns row statistics"""
+    stats: Dict[str, int] = {}
+    videos, segments = write_store(store_path, read_dump(dump_path, min_votes, stats))
+    stats.update(videos=videos, segments=segments)
+    return stats
+
+
+class CommunitySegmentStore:
+    """Read-only, memory-mapped view of a community segment store"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.video_count, self.segment_count,
+         self._table, self._segments, self._categories) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Not a v{VERSION} community segment store: {path}")
+        self.categories: List[str] = json.loads(self._mm[self._categories:])
+
+    def close(self):
+        self._mm.close()
+
+    def __len__(self) -> int:
+        return self.video_count
+
+    def _record(self, index: int) -> tuple:
+        return VIDEO_RECORD.unpack_from(self._mm, self._table + index * VIDEO_RECORD.size)
+
+    def _find(self, video_id: str) -> Optional[tuple]:
+        """Binary search the sorted video table"""
+        try:
+            key = _encode_video_id(video_id)
+        except ValueError:
+            return None
+        lo, hi = 0, self.video_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            if record[0] < key:
+                lo = mid + 1
+            elif record[0] > key:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def get_segments(self, video_id: str) -> Optional[Tuple[float, List[Tuple[float, float, str, bool]]]]:
+        """(video duration or 0, [(start, end, category, locked), ...]) for a video, or None"""
+        record = self._find(video_id)
+        if record is None:
+            return None
+        _, first, count, duration = record
+        base = self._segments + first * SEGMENT_RECORD.size
+        segments = []
+        for i in range(count):
+            start, end, category, locked = SEGMENT_RECORD.unpack_from(self._mm, base + i * SEGMENT_RECORD.size)
+            segments.append((start, end, self.categories[category], bool(locked)))
+        return duration, segments
@@ -0,0 +1,100 @@
+"""
+Request corpus for offline record/replay runs.
+
+Each line of the corpus is one JSON record of a cache-miss analysis:
+
+    video_id        the analyzed video
+    preferences     the UserPreferences dict (null for defaults)
+    transcript      [[start, duration, text], ...]
+    llm_responses   [{"model", "response"}, ...] raw model output, in call order
+    stage_timings   {stage: seconds} measured while it was analyzed
+    output          {"route", "skip_segments", "skip_percentage"}
+
+Records are sanitized by construction: only these fields are written, never
+request headers, client addresses, profile ids or tokens. replay_corpus.py
+feeds them back through the pipeline without network access.
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from typing import Iterator, List, Optional
+
+CORPUS_VERSION = 1
+
+
+def build_record(
+    video_id: str,
+    preferences: Optional[dict],
+    transcript: List[dict],
+    llm_responses: List[dict],
+    stage_timings: dict,
+    output: dict
+) -> dict:
+    return {
+        "version": CORPUS_VERSION,
+        "recorded_at": round(time.time(), 3),
+        "video_id": video_id,
+        "preferences": preferences,
+        "transcript": [[cue["start"], cue["duration"], cue["text"]] for cue in transcript],
+        "llm_responses": llm_responses,
+        "stage_timings": {stage: round(seconds, 6) for stage, seconds in stage_timings.items()},
+        "output": output,
+    }
+
+
+def read_corpus(path: str) -> Iterator[dict]:
+    """Records of a corpus file, skipping blank and truncated lines"""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-append can leave a partial last line
+                continue
+            if record.get("version") == CORPUS_VERSION:
+                yield record
+
+
+class CorpusRecorder:
+    """Appends sampled records to a JSONL file until it reaches max_bytes (thread-safe)"""
+
+    def __init__(self, path: str, sample_rate: float = 1.0, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def should_record(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def append(self, record: dict) -> bool:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if size + len(line) > self.max_bytes:
+                self.dropped += 1
+                return False
+            with open(self.path, "a") as f:
+                f.write(line)
+            self.recorded += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "sample_rate": self.sample_rate,
+                "recorded": self.recorded,
+                "dropped_full": self.dropped,
+                "bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            }
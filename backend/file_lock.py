@@ -0,0 +1,33 @@
+"""
+Advisory lock around read-merge-write of the files the workers persist.
+
+serve.py can run several worker processes that share SNAPSHOT_PATH,
+LLM_CACHE_PATH and FINGERPRINT_INDEX_PATH. Each writer holds an exclusive
+flock on "<path>.lock" while it reads the current file, merges in its own
+entries and atomically replaces it, so one worker's save never drops what
+another wrote. The lock is advisory and local to the host; on platforms
+without fcntl the block runs unlocked.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def locked(path: str):
+    """Hold an exclusive lock for path while the block runs"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
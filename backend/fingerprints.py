@@ -0,0 +1,255 @@
+"""
+Cross-video fingerprint index of skippable transcript spans (MinHash + LSH).
+
+Creators reuse sponsor reads, intros and outros across videos. Every run of
+consecutive captions that was classified as skippable is fingerprinted in
+fixed windows of `window_captions` captions:
+
+  * each caption is shingled into word trigrams, hashed with crc32 and reduced
+    to a MinHash signature of `num_perm` multiply-add hashes mod 2^32 (small
+    ints keep this about twice as fast as hashing mod a Mersenne prime)
+  * a window's signature is the element-wise min of its captions' signatures
+  * signatures are split into `bands` bands; each band is a bucket key
+
+A new transcript is checked window by window: only entries sharing at least one
+bucket are compared, so a lookup costs a few dict probes regardless of index
+size. A candidate matches when the fraction of equal signature positions (the
+Jaccard estimate) reaches `threshold`.
+
+The index is persisted as JSON by save() and rebuilt (buckets included) by load().
+save() merges with the entries already in the file, so several workers can
+share one path.
+"""
+
+import os
+import json
+import time
+import zlib
+import random
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.file_lock import locked
+
+SHINGLE_WORDS = 3
+HASH_MASK = 0xFFFFFFFF
+FORMAT_VERSION = 1
+
+
+def _shingle_hashes(text: str) -> List[int]:
+    words = text.lower().split()
+    if len(words) <= SHINGLE_WORDS:
+        return [zlib.crc32(" ".join(words).encode())] if words else []
+    return [
+        zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode())
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    ]
+
+
+class SponsorFingerprintIndex:
+    """MinHash LSH index over windows of skippable captions (thread-safe)"""
+
+    def __init__(
+        self,
+        num_perm: int = 32,
+        bands: int = 8,
+        window_captions: int = 2,
+        threshold: float = 0.6,
+        max_entries: int = 100000,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.window_captions = window_captions
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.seed = seed
+        rng = random.Random(seed)
+        # Odd multipliers, so each hash is a bijection on 32-bit values
+        self._hash_params = [(rng.getrandbits(32) | 1, rng.getrandbits(32)) for _ in range(num_perm)]
+        self._lock = threading.Lock()
+        # entry id -> (signature, source video id, reason), oldest first
+        self._entries: "OrderedDict[int, Tuple[Tuple[int, ...], str, str]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._next_id = 0
+        self.dirty = False
+        self.windows_checked = 0
+        self.windows_matched = 0
+        self.captions_matched = 0
+        self.candidates_compared = 0
+        self.added = 0
+        self.evicted = 0
+        self.lookup_seconds = 0.0
+
+    def caption_signature(self, text: str) -> Optional[List[int]]:
+        hashes = _shingle_hashes(text)
+        if not hashes:
+            return None
+        rows = [[(a * h + b) & HASH_MASK for a, b in self._hash_params] for h in hashes]
+        return list(map(min, *rows)) if len(rows) > 1 else rows[0]
+
+    def window_signatures(self, texts: Sequence[str]) -> List[Tuple[int, Tuple[int, ...]]]:
+        """(first caption index, signature) for each full window; windows of blank captions are dropped"""
+        caption_signatures = [self.caption_signature(text) for text in texts]
+        windows = []
+        for i in range(len(texts) - self.window_captions + 1):
+            parts = [sig for sig in caption_signatures[i:i + self.window_captions] if sig is not None]
+            if parts:
+                windows.append((i, tuple(map(min, *parts)) if len(parts) > 1 else tuple(parts[0])))
+        return windows
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _similarity(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_perm
+
+    def _best_match(self, signature: Tuple[int, ...]) -> Optional[int]:
+        """Id of an entry estimated at least `threshold` similar; call with the lock held"""
+        seen = set()
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            # Evicted ids are dropped from buckets lazily, here
+            bucket[:] = [entry_id for entry_id in bucket if entry_id in self._entries]
+            if not bucket:
+                del self._buckets[key]
+            for entry_id in bucket:
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                self.candidates_compared += 1
+                if self._similarity(signature, self._entries[entry_id][0]) >= self.threshold:
+                    return entry_id
+        return None
+
+    def match(self, texts: Sequence[str]) -> List[int]:
+        """Indices of captions covered by a window that matches the index"""
+        started = time.perf_counter()
+        windows = self.window_signatures(texts)
+        matched = set()
+        with self._lock:
+            self.windows_checked += len(windows)
+            for i, signature in windows:
+                if self._best_match(signature) is not None:
+                    self.windows_matched += 1
+                    matched.update(range(i, i + self.window_captions))
+            self.captions_matched += len(matched)
+            self.lookup_seconds += time.perf_counter() - started
+        return sorted(matched)
+
+    def add_spans(self, texts: Sequence[str], flagged: Sequence[bool], source: str, reason: str = "") -> int:
+        """Index every window lying inside a run of flagged captions; returns new entries"""
+        runs = []
+        run_start = None
+        for i, flag in enumerate(list(flagged) + [False]):
+            if flag and run_start is None:
+                run_start = i
+            elif not flag and run_start is not None:
+                if i - run_start >= self.window_captions:
+                    runs.append((run_start, i))
+                run_start = None
+
+        added = 0
+        for start, end in runs:
+            for _, signature in self.window_signatures(texts[start:end]):
+                with self._lock:
+                    # Near-duplicates of an indexed window add nothing
+                    if self._best_match(signature) is not None:
+                        continue
+                    self._insert(signature, source, reason)
+                    added += 1
+        return added
+
+    def _insert(self, signature: Tuple[int, ...], source: str, reason: str) -> None:
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (signature, source, reason)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(entry_id)
+        self.added += 1
+        self.dirty = True
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self, path: str) -> int:
+        """Atomically write the index, merged with the entries already saved at path; returns the number written"""
+        with self._lock:
+            own = [[list(signature), source, reason] for signature, source, reason in self._entries.values()]
+            self.dirty = False
+        with locked(path):
+            # Other workers save to the same file: keep their entries (older first), then ours
+            seen = {tuple(entry[0]) for entry in own}
+            entries = [entry for entry in self._read(path) if tuple(entry[0]) not in seen] + own
+            entries = entries[-self.max_entries:]
+            document = {
+                "version": FORMAT_VERSION,
+                "num_perm": self.num_perm,
+                "seed": self.seed,
+                "window_captions": self.window_captions,
+                "entries": entries,
+            }
+            directory = os.path.dirname(os.path.abspath(path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".fingerprints-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(document, f, separators=(",", ":"))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return len(entries)
+
+    def _read(self, path: str) -> list:
+        """Entries saved at path with this index's parameters, or none"""
+        try:
+            with open(path) as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            return []
+        params = (document.get("version"), document.get("num_perm"), document.get("seed"), document.get("window_captions"))
+        if params != (FORMAT_VERSION, self.num_perm, self.seed, self.window_captions):
+            return []
+        return document.get("entries", [])
+
+    def load(self, path: str) -> int:
+        """Add the entries saved at path; returns the number loaded"""
+        with open(path) as f:
+            document = json.load(f)
+        params = (document.get("version"), document.get("num_perm"), document.get("seed"), document.get("window_captions"))
+        if params != (FORMAT_VERSION, self.num_perm, self.seed, self.window_captions):
+            raise ValueError(f"Fingerprint index {path} was built with different parameters")
+        with self._lock:
+            for signature, source, reason in document["entries"]:
+                self._insert(tuple(signature), source, reason)
+            self.added -= len(document["entries"])
+            self.dirty = False
+        return len(document["entries"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "buckets": len(self._buckets),
+                "max_entries": self.max_entries,
+                "added": self.added,
+                "evicted": self.evicted,
+                "windows_checked": self.windows_checked,
+                "windows_matched": self.windows_matched,
+                "window_match_rate": round(self.windows_matched / self.windows_checked, 4) if self.windows_checked else None,
+                "captions_matched": self.captions_matched,
+                "candidates_compared": self.candidates_compared,
+                "lookup_seconds": round(self.lookup_seconds, 4),
+            }
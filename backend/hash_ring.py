@@ -0,0 +1,96 @@
+"""
+Consistent-hash ring mapping keys (video ids) to nodes.
+
+Each node is placed on the ring at `vnodes` points (md5 of "node#i"), and a key
+belongs to the first node point clockwise from the key's hash. When a node joins
+or leaves, only the keys between its points and their predecessors move, about
+1/N of all keys, so the other nodes' caches stay warm.
+"""
+
+import bisect
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """Thread-safe ring of nodes with virtual points"""
+
+    def __init__(self, nodes: Optional[List[str]] = None, vnodes: int = 128):
+        self.vnodes = vnodes
+        self._lock = threading.Lock()
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: List[str] = []
+        for node in nodes or []:
+            self.add(node)
+
+    def _rebuild(self) -> None:
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self._nodes for i in range(self.vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def add(self, node: str) -> bool:
+        """Add a node; returns False if it was already on the ring"""
+        with self._lock:
+            if node in self._nodes:
+                return False
+            self._nodes.append(node)
+            self._rebuild()
+            return True
+
+    def remove(self, node: str) -> bool:
+        """Remove a node; returns False if it wasn't on the ring"""
+        with self._lock:
+            if node not in self._nodes:
+                return False
+            self._nodes.remove(node)
+            self._rebuild()
+            return True
+
+    def nodes(self) -> List[str]:
+        with self._lock:
+            return list(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    def owners(self, key: str, count: int = 1) -> List[str]:
+        """The first `count` distinct nodes clockwise from key: the owner, then its fallbacks"""
+        with self._lock:
+            if not self._points:
+                return []
+            start = bisect.bisect(self._points, _hash(key)) % len(self._points)
+            found: List[str] = []
+            for i in range(len(self._points)):
+                node = self._owners[(start + i) % len(self._points)]
+                if node not in found:
+                    found.append(node)
+                    if len(found) == count:
+                        break
+            return found
+
+    def owner(self, key: str) -> Optional[str]:
+        owners = self.owners(key)
+        return owners[0] if owners else None
+
+    def distribution(self) -> Dict[str, float]:
+        """Share of the hash space owned by each node"""
+        with self._lock:
+            if not self._points:
+                return {}
+            space = 1 << 64
+            shares = {node: 0 for node in self._nodes}
+            for i, point in enumerate(self._points):
+                previous = self._points[i - 1] if i else self._points[-1] - space
+                shares[self._owners[i]] += point - previous
+            return {node: round(share / space, 4) for node, share in shares.items()}
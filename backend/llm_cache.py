@@ -0,0 +1,185 @@
+"""
+Cache of raw LLM output, keyed by the exact request sent to the model.
+
+The key is a hash of the model, the messages and the generation settings, so any
+change to the prompt template, the transcript text or the model is a miss. The
+value is what the model said (the parsed skip start times and the raw response
+text), before any post-processing. Post-processing rules can therefore change and
+be re-applied without calling the model again.
+
+Entries are kept in LRU order up to max_entries and expire after ttl_seconds. The
+cache can be persisted to a JSON file so it survives redeploys. Saves merge with
+the entries already in the file, so several workers can share one path. Entries
+stored with a video id can be dropped per video (discard_video()).
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from backend.file_lock import locked
+
+FORMAT_VERSION = 1
+
+
+def request_key(model: str, messages: List[dict], **settings) -> str:
+    """Hash of everything that determines the model's answer"""
+    payload = json.dumps({"model": model, "messages": messages, "settings": settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """LRU cache of model output by request key (thread-safe)"""
+
+    def __init__(self, max_entries: int = 50000, ttl_seconds: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (timestamp, segments, raw_response, video_id or None)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._video_keys: Dict[str, Set[str]] = {}
+        # Discarded since the last save: kept out of the entries merged from the file
+        self._removed: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        # Set by clear(): the next save() replaces the file instead of merging with it
+        self._cleared = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] >= self.ttl_seconds:
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return {"segments": list(entry[1]), "raw_response": entry[2]}
+
+    def put(
+        self,
+        key: str,
+        segments: List[float],
+        raw_response: str,
+        timestamp: Optional[float] = None,
+        video_id: Optional[str] = None
+    ) -> None:
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (
+                timestamp if timestamp is not None else time.time(), list(segments), raw_response, video_id
+            )
+            if video_id is not None:
+                self._video_keys.setdefault(video_id, set()).add(key)
+            self._removed.discard(key)
+            while len(self._entries) > self.max_entries:
+                self._pop(next(iter(self._entries)))
+            self.dirty = True
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[3] is not None:
+            keys = self._video_keys.get(entry[3])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._video_keys[entry[3]]
+
+    def discard_video(self, video_id: str) -> int:
+        """Drop every entry stored for video_id, also from the file on the next save; returns the number dropped"""
+        with self._lock:
+            keys = list(self._video_keys.get(video_id, ()))
+            for key in keys:
+                self._pop(key)
+            self._removed.update(keys)
+            if keys:
+                self.dirty = True
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._video_keys.clear()
+            self._removed.clear()
+            self._cleared = True
+            self.dirty = True
+
+    def save(self, path: str) -> int:
+        """Atomically write the unexpired entries, merged with those already saved at path; returns the number written"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            own = {key: entry for key, entry in self._entries.items() if entry[0] > cutoff}
+            replace, self._cleared = self._cleared, False
+            removed, self._removed = self._removed, set()
+            self.dirty = False
+        with locked(path):
+            # Other workers save to the same file; keep their entries, the newer copy of a key wins
+            merged = {}
+            for key, timestamp, segments, raw_response, *video_id in ([] if replace else self._read(path)):
+                if timestamp > cutoff and key not in removed:
+                    merged[key] = (timestamp, segments, raw_response, video_id[0] if video_id else None)
+            for key, entry in own.items():
+                if key not in merged or entry[0] >= merged[key][0]:
+                    merged[key] = entry
+            entries = sorted(([key, *entry] for key, entry in merged.items()), key=lambda item: item[1])
+            entries = entries[-self.max_entries:]
+            directory = os.path.dirname(os.path.abspath(path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".llm-cache-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"version": FORMAT_VERSION, "entries": entries}, f, separators=(",", ":"))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return len(entries)
+
+    @staticmethod
+    def _read(path: str) -> list:
+        """Saved entries at path, or none when there is no usable file"""
+        try:
+            with open(path) as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return document.get("entries", []) if document.get("version") == FORMAT_VERSION else []
+
+    def load(self, path: str) -> int:
+        """Add the unexpired entries saved at path; returns the number loaded"""
+        with open(path) as f:
+            document = json.load(f)
+        if document.get("version") != FORMAT_VERSION:
+            raise ValueError(f"LLM response cache {path} has an unsupported format")
+        cutoff = time.time() - self.ttl_seconds
+        loaded = 0
+        dirty = self.dirty
+        # Entries saved before per-video tracking have no video id
+        for key, timestamp, segments, raw_response, *video_id in document["entries"]:
+            if timestamp > cutoff:
+                self.put(key, segments, raw_response, timestamp, video_id[0] if video_id else None)
+                loaded += 1
+        self.dirty = dirty
+        return loaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
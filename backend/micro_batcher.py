@@ -0,0 +1,123 @@
+"""
+Micro-batching of blocking calls made from many threads.
+
+Callers submit(key, item) and block until their result is ready. Items with the
+same key that arrive within `max_wait` seconds of the first are handed to
+`run_batch` together, at most `max_batch_size` at a time:
+
+  * the first caller of a batch is its leader and flushes it after max_wait
+  * the caller that fills a batch flushes it immediately
+  * a batch of one goes to `run_single` instead, so a lone request pays only
+    the wait, never a batched prompt
+
+run_batch returns one result per item, an Exception instance for items that
+failed on their own, or None for items to retry alone through run_single; an
+exception raised by run_batch fails the whole batch.
+
+Each submission's contextvars are captured when it is enqueued. run_single runs
+in the item's own context; the shared run_batch call belongs to no single
+caller and runs in an empty one, so the leader's request-scoped state does not
+leak into the other items.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, Hashable, List, Tuple
+
+
+class MicroBatcher:
+    """Groups concurrent submissions by key into batches (thread-safe)"""
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[object]], List[object]],
+        run_single: Callable[[object], object],
+        max_batch_size: int = 8,
+        max_wait: float = 0.015
+    ):
+        self.run_batch = run_batch
+        self.run_single = run_single
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        # key -> (generation, pending (item, future, context) entries)
+        self._pending: Dict[Hashable, Tuple[int, List[Tuple[object, Future, contextvars.Context]]]] = {}
+        self._generation = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.single_items = 0
+
+    def _take(self, key: Hashable, generation: int) -> List[Tuple[object, Future, contextvars.Context]]:
+        """Remove the pending batch for key if it is still `generation`; call with the lock held"""
+        current = self._pending.get(key)
+        if current is None or current[0] != generation:
+            return []
+        del self._pending[key]
+        return current[1]
+
+    def _run_single(self, item: object, context: contextvars.Context) -> object:
+        try:
+            return context.run(self.run_single, item)
+        except Exception as e:
+            return e
+
+    def _execute(self, batch: List[Tuple[object, Future, contextvars.Context]]) -> None:
+        items = [item for item, _, _ in batch]
+        if len(batch) == 1:
+            results = [self._run_single(items[0], batch[0][2])]
+        else:
+            try:
+                results = contextvars.Context().run(self.run_batch, items)
+            except Exception as e:
+                results = [e] * len(batch)
+            results = [
+                self._run_single(item, context) if result is None else result
+                for (item, _, context), result in zip(batch, results)
+            ]
+        with self._lock:
+            if len(batch) == 1:
+                self.single_items += 1
+            else:
+                self.batches += 1
+                self.batched_items += len(batch)
+        for (_, future, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def submit(self, key: Hashable, item: object) -> object:
+        """Run item, possibly batched with others of the same key; blocks for its result"""
+        future: Future = Future()
+        batch: List[Tuple[object, Future, contextvars.Context]] = []
+        with self._lock:
+            if key not in self._pending:
+                self._generation += 1
+                self._pending[key] = (self._generation, [])
+            generation, pending = self._pending[key]
+            pending.append((item, future, contextvars.copy_context()))
+            leader = len(pending) == 1
+            if len(pending) >= self.max_batch_size:
+                batch = self._take(key, generation)
+
+        if batch:
+            self._execute(batch)
+        elif leader:
+            wait([future], timeout=self.max_wait)
+            with self._lock:
+                batch = self._take(key, generation)
+            if batch:
+                self._execute(batch)
+        return future.result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 1),
+                "batches": self.batches,
+                "batched_requests": self.batched_items,
+                "single_requests": self.single_items,
+                "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else None,
+            }
@@ -0,0 +1,135 @@
+"""
+Hashed TF-IDF linear classifier for cheap local pre-screening of transcript windows.
+
+Each window of captions is one document. Features are hashed unigrams and
+bigrams (crc32, so stable across processes) weighted by TF-IDF, where IDF is
+computed over the windows of the same video: words that run through the whole
+video carry little signal, a sponsor read in two windows stands out. The
+L2-normalized vector is scored with a sparse linear model plus a per-window
+offset supplied by the caller, and squashed to a skip probability.
+
+Weights come either from a vocabulary of weighted terms (the default, see
+from_terms) or from a JSON file written by save().
+"""
+
+import re
+import json
+import math
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+N_FEATURES = 1 << 18
+# Crude suffix stripping so "sponsoring"/"sponsored"/"sponsors" share a feature
+SUFFIXES = ("ing", "ed", "s")
+MIN_STEM = 4
+
+
+def _stem(token: str) -> str:
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def _tokens(text: str) -> List[str]:
+    return [_stem(token) for token in TOKEN_RE.findall(text.lower())]
+
+
+def _ngrams(tokens: List[str]) -> List[str]:
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _feature(term: str) -> int:
+    return zlib.crc32(term.encode()) & (N_FEATURES - 1)
+
+
+def term_features(term: str) -> List[int]:
+    """Feature ids a vocabulary term maps to: itself if one or two words, else its bigrams"""
+    tokens = _tokens(term)
+    if len(tokens) <= 2:
+        return [_feature(" ".join(tokens))] if tokens else []
+    return [_feature(f"{a} {b}") for a, b in zip(tokens, tokens[1:])]
+
+
+class HashedTfidfClassifier:
+    """Sparse linear model over hashed TF-IDF window vectors"""
+
+    def __init__(self, weights: Dict[int, float], bias: float):
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def from_terms(cls, term_weights: Dict[str, float], bias: float) -> "HashedTfidfClassifier":
+        weights: Dict[int, float] = {}
+        for term, weight in term_weights.items():
+            features = term_features(term)
+            for feature in features:
+                # A long phrase spreads its weight over its bigrams
+                weights[feature] = weights.get(feature, 0.0) + weight / len(features)
+        return cls(weights, bias)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedTfidfClassifier":
+        with open(path) as f:
+            model = json.load(f)
+        return cls({int(feature): weight for feature, weight in model["weights"].items()}, model["bias"])
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"bias": self.bias, "weights": {str(k): v for k, v in self.weights.items()}}, f)
+
+    @staticmethod
+    def vectorize(documents: Sequence[str]) -> List[Dict[int, float]]:
+        """L2-normalized TF-IDF vectors, IDF taken over `documents`"""
+        counts: List[Dict[int, int]] = []
+        document_frequency: Dict[int, int] = {}
+        for document in documents:
+            tf: Dict[int, int] = {}
+            for term in _ngrams(_tokens(document)):
+                feature = _feature(term)
+                tf[feature] = tf.get(feature, 0) + 1
+            for feature in tf:
+                document_frequency[feature] = document_frequency.get(feature, 0) + 1
+            counts.append(tf)
+
+        n = len(documents)
+        idf = {feature: math.log((1 + n) / (1 + df)) + 1 for feature, df in document_frequency.items()}
+        vectors = []
+        for tf in counts:
+            vector = {feature: (1 + math.log(count)) * idf[feature] for feature, count in tf.items()}
+            norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+            vectors.append({feature: value / norm for feature, value in vector.items()})
+        return vectors
+
+    def score(
+        self,
+        documents: Sequence[str],
+        offsets: Optional[Iterable[float]] = None,
+        extra_weights: Optional[Dict[int, float]] = None
+    ) -> List[Tuple[float, bool]]:
+        """(skip probability, contains any positively weighted feature) per document.
+
+        offsets are added to each logit, extra_weights to the model's weights.
+        """
+        weights = self.weights
+        if extra_weights:
+            weights = dict(weights)
+            for feature, weight in extra_weights.items():
+                weights[feature] = weights.get(feature, 0.0) + weight
+        offsets = list(offsets) if offsets is not None else [0.0] * len(documents)
+
+        scores = []
+        for vector, offset in zip(self.vectorize(documents), offsets):
+            logit = self.bias + offset
+            has_signal = False
+            for feature, value in vector.items():
+                weight = weights.get(feature)
+                if weight:
+                    logit += weight * value
+                    has_signal = has_signal or weight > 0
+            scores.append((1 / (1 + math.exp(-max(min(logit, 50.0), -50.0))), has_signal))
+        return scores
+
+    def predict_proba(self, documents: Sequence[str], offsets=None, extra_weights=None) -> List[float]:
+        return [probability for probability, _ in self.score(documents, offsets, extra_weights)]
@@ -0,0 +1,89 @@
+"""
+Helpers for on-demand request profiling.
+
+Profiles are written as a .pstats file (loadable with pstats, snakeviz,
+gprof2dot, ...) plus a .collapsed file in Brendan Gregg's folded-stack format
+that flamegraph.pl / speedscope / inferno can render directly.
+"""
+
+import os
+import re
+import pstats
+import cProfile
+from typing import Dict, Sequence
+
+# Stacks deeper than this are truncated when folding the call graph
+MAX_STACK_DEPTH = 64
+# Branches cheaper than this are pruned; keeps the fold from exploding on dense call graphs
+MIN_BRANCH_SECONDS = 5e-5
+
+
+def _frame_name(func) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        # Builtins are reported as ('~', 0, '<built-in method ...>')
+        return name.strip("<>")
+    return f"{os.path.basename(filename)}:{name}:{lineno}"
+
+
+def collapse_stats(stats: pstats.Stats) -> Dict[str, int]:
+    """Fold a pstats call graph into "root;child;leaf" -> microseconds.
+
+    cProfile only records caller/callee edges, not full stacks, so each stack
+    is weighted by the time the callee spent under that specific caller.
+    """
+    raw = stats.stats
+    callees: Dict[tuple, Dict[tuple, float]] = {}
+    for func, (_, _, tottime, cumtime, callers) in raw.items():
+        for caller, caller_stats in callers.items():
+            # caller_stats: (primitive calls, total calls, tottime, cumtime)
+            callees.setdefault(caller, {})[func] = caller_stats[3]
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    folded: Dict[str, int] = {}
+
+    def walk(func, path, budget, seen):
+        entry = raw.get(func)
+        if entry is None or budget < MIN_BRANCH_SECONDS:
+            return
+        cumtime = entry[3] or 1e-12
+        # Self time is scaled by the share of this function's time reached via this path
+        self_time = entry[2] * min(budget / cumtime, 1.0)
+        stack = path + [_frame_name(func)]
+        key = ";".join(stack)
+        if self_time > 0:
+            folded[key] = folded.get(key, 0) + int(self_time * 1e6)
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for child, child_time in callees.get(func, {}).items():
+            if child in seen:
+                continue
+            walk(child, stack, min(child_time, budget), seen | {child})
+
+    for root in roots:
+        walk(root, [], max(raw[root][3], MIN_BRANCH_SECONDS), {root})
+    return {stack: micros for stack, micros in folded.items() if micros > 0}
+
+
+def write_profile(
+    profiler: cProfile.Profile, directory: str, basename: str, thread_profilers: Sequence[cProfile.Profile] = ()
+) -> str:
+    """Dump a finished profile as <basename>.pstats and <basename>.collapsed, return the base path.
+
+    thread_profilers (from work the request ran in worker threads) are merged into the same files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", basename)
+    base_path = os.path.join(directory, safe_name)
+
+    stats = pstats.Stats(profiler, *thread_profilers)
+    stats.dump_stats(base_path + ".pstats")
+    with open(base_path + ".collapsed", "w") as f:
+        for stack, micros in sorted(collapse_stats(stats).items()):
+            f.write(f"{stack} {micros}\n")
+    return base_path
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Render stage -> seconds as a Server-Timing header value (durations in ms)"""
+    return ", ".join(f"{re.sub(r'[^A-Za-z0-9_-]', '_', stage)};dur={seconds * 1000:.2f}" for stage, seconds in timings.items())
@@ -0,0 +1,308 @@
+"""
+Optional routing tier for multi-node deployments.
+
+Every backend node keeps its own in-memory caches, so a video analyzed on one
+node is a miss on the others. This front sends every request for a video_id to
+the same node, chosen on a consistent-hash ring:
+
+    uvicorn backend.router:app --port 8000
+    CLUSTER_NODES=http://127.0.0.1:8001,http://127.0.0.1:8002,http://127.0.0.1:8003
+
+/process_video (GET ?video_id= or POST {"video_id"}) is proxied to the owner
+node, or redirected to it with ROUTER_MODE=redirect. If the owner refuses the
+connection it is taken off the ring and the next node clockwise serves the
+request. A node that accepted the request but is slow to answer is left in
+place and the client gets 504: it may still be running the analysis, and
+replaying it elsewhere would double the LLM work. A health loop puts nodes back
+once /health answers again. Nodes can also join or leave at runtime through
+/cluster/nodes. Only the keys of the node that joined or left move.
+
+POST /profiles is sent to every node, so a profile_id works wherever its videos
+land. The router remembers the last ROUTER_MAX_PROFILES registrations and
+replays them to a node when it is put back on the ring, since a restarted node
+has lost its profiles. DELETE /cache/{video_id} goes to the video's owner. Any
+other path is proxied to the node owning the path.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import RedirectResponse
+
+from backend.hash_ring import ConsistentHashRing
+from backend.structured_logging import setup_logging
+
+setup_logging(level=logging.INFO, log_format=os.environ.get("LOG_FORMAT", "text"))
+logger = logging.getLogger(__name__)
+
+CLUSTER_NODES = [node.strip().rstrip("/") for node in os.environ.get("CLUSTER_NODES", "").split(",") if node.strip()]
+ROUTER_MODE = os.environ.get("ROUTER_MODE", "proxy")  # proxy or redirect
+ROUTER_VNODES = int(os.environ.get("ROUTER_VNODES", "128"))
+ROUTER_HEALTH_INTERVAL_SECONDS = float(os.environ.get("ROUTER_HEALTH_INTERVAL_SECONDS", "2"))
+ROUTER_TIMEOUT_SECONDS = float(os.environ.get("ROUTER_TIMEOUT_SECONDS", "60"))
+ROUTER_MAX_PROFILES = int(os.environ.get("ROUTER_MAX_PROFILES", "10000"))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# The node can't have seen the request: safe to eject it and try the next one
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Hop-by-hop and length/encoding headers are recomputed for the proxied response
+DROPPED_HEADERS = {"host", "content-length", "transfer-encoding", "connection", "keep-alive", "content-encoding"}
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[
+        "https://www.youtube.com",
+        "https://youtube.com",
+        "chrome-extension://*"
+    ],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["*"]
+)
+
+# Every known node; the ring holds only the ones currently passing health checks
+members: List[str] = list(CLUSTER_NODES)
+ring = ConsistentHashRing(CLUSTER_NODES, vnodes=ROUTER_VNODES)
+router_stats: Dict[str, object] = {
+    "forwarded": {}, "failovers": 0, "ejections": 0, "rejoins": 0, "timeouts": 0, "profiles_replayed": 0
+}
+# Registered profile bodies (oldest first), replayed to nodes that rejoin the ring
+registered_profiles: "OrderedDict[bytes, None]" = OrderedDict()
+_client: Optional[httpx.AsyncClient] = None
+background_jobs = set()
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=ROUTER_TIMEOUT_SECONDS, limits=httpx.Limits(max_keepalive_connections=64))
+    return _client
+
+
+def is_admin_request(request: Request) -> bool:
+    """Admin features are open when ADMIN_TOKEN is unset, otherwise require the X-Admin-Token header"""
+    return not ADMIN_TOKEN or request.headers.get("x-admin-token") == ADMIN_TOKEN
+
+
+def eject(node: str, reason: str) -> None:
+    if ring.remove(node):
+        router_stats["ejections"] += 1
+        logger.warning("Removed node %s from the ring: %s", node, reason)
+
+
+async def forward(node: str, request: Request, body: bytes) -> Response:
+    """Proxy request to node and relay its response"""
+    url = f"{node}{request.url.path}"
+    if request.url.query:
+        url = f"{url}?{request.url.query}"
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in DROPPED_HEADERS}
+    upstream = await get_client().request(request.method, url, content=body, headers=headers)
+    forwarded = router_stats["forwarded"]
+    forwarded[node] = forwarded.get(node, 0) + 1
+    response_headers = {k: v for k, v in upstream.headers.items() if k.lower() not in DROPPED_HEADERS}
+    response_headers["X-Routed-To"] = node
+    return Response(content=upstream.content, status_code=upstream.status_code, headers=response_headers)
+
+
+async def route(key: str, request: Request) -> Response:
+    """Send request to the owner of key, falling back clockwise when a node is unreachable"""
+    body = await request.body()
+    candidates = ring.owners(key, count=len(ring))
+    if not candidates:
+        raise HTTPException(status_code=503, detail="No healthy backend nodes")
+    if ROUTER_MODE == "redirect":
+        location = f"{candidates[0]}{request.url.path}"
+        if request.url.query:
+            location = f"{location}?{request.url.query}"
+        # 307 keeps the method and body of a POST
+        return RedirectResponse(location, status_code=307)
+    for i, node in enumerate(candidates):
+        try:
+            response = await forward(node, request, body)
+        except CONNECT_ERRORS as e:
+            eject(node, str(e) or type(e).__name__)
+            continue
+        except httpx.TimeoutException:
+            # The node has the request and may still finish it; don't fail over or eject
+            router_stats["timeouts"] += 1
+            raise HTTPException(status_code=504, detail=f"Backend node {node} timed out")
+        except httpx.TransportError as e:
+            raise HTTPException(status_code=502, detail=f"Backend node {node} failed: {str(e) or type(e).__name__}")
+        if i:
+            router_stats["failovers"] += 1
+        return response
+    raise HTTPException(status_code=502, detail="No backend node could be reached")
+
+
+async def check_node(node: str) -> bool:
+    try:
+        response = await get_client().get(f"{node}/health", timeout=min(ROUTER_HEALTH_INTERVAL_SECONDS, 5.0))
+        return response.status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+async def replay_profiles(node: str, batch_size: int = 32) -> None:
+    """Register every remembered profile on a node that (re)joined the ring"""
+    bodies = list(registered_profiles)
+    replayed = 0
+    for start in range(0, len(bodies), batch_size):
+        results = await asyncio.gather(*(
+            get_client().post(f"{node}/profiles", content=body, headers={"Content-Type": "application/json"})
+            for body in bodies[start:start + batch_size]
+        ), return_exceptions=True)
+        replayed += sum(1 for result in results if isinstance(result, httpx.Response) and result.status_code == 200)
+        failure = next((result for result in results if isinstance(result, Exception)), None)
+        if failure is not None:
+            logger.warning("Replaying profiles to %s stopped after %d: %s", node, replayed, str(failure) or type(failure).__name__)
+            break
+    router_stats["profiles_replayed"] += replayed
+    if replayed:
+        logger.info("Replayed %d profiles to %s", replayed, node)
+
+
+async def add_to_ring(node: str) -> None:
+    """Put a healthy node on the ring once it has the registered profiles again"""
+    await replay_profiles(node)
+    ring.add(node)
+
+
+async def health_loop():
+    """Eject nodes failing /health and put recovered ones back on the ring"""
+    while True:
+        nodes = list(members)
+        results = await asyncio.gather(*(check_node(node) for node in nodes))
+        for node, healthy in zip(nodes, results):
+            if healthy and node not in ring:
+                await add_to_ring(node)
+                router_stats["rejoins"] += 1
+                logger.info("Node %s is healthy, added to the ring", node)
+            elif not healthy and node in ring:
+                eject(node, "health check failed")
+        await asyncio.sleep(ROUTER_HEALTH_INTERVAL_SECONDS)
+
+
+@app.on_event("startup")
+async def start_health_loop():
+    if ROUTER_HEALTH_INTERVAL_SECONDS > 0:
+        task = asyncio.create_task(health_loop())
+        background_jobs.add(task)
+        task.add_done_callback(background_jobs.discard)
+
+
+@app.on_event("shutdown")
+async def close_client():
+    if _client is not None:
+        await _client.aclose()
+
+
+@app.get("/process_video")
+async def route_process_video_get(request: Request, video_id: str):
+    return await route(video_id, request)
+
+
+@app.post("/process_video")
+async def route_process_video_post(request: Request):
+    try:
+        video_id = json.loads(await request.body()).get("video_id")
+    except (ValueError, AttributeError):
+        video_id = None
+    # Malformed bodies still go to a node so the client gets the backend's validation error
+    return await route(video_id or "", request)
+
+
+@app.post("/profiles")
+async def broadcast_profile(request: Request):
+    """Register the profile on every healthy node and relay the first success"""
+    body = await request.body()
+    nodes = ring.nodes()
+    if not nodes:
+        raise HTTPException(status_code=503, detail="No healthy backend nodes")
+    results = await asyncio.gather(*(forward(node, request, body) for node in nodes), return_exceptions=True)
+    responses = []
+    for node, result in zip(nodes, results):
+        if isinstance(result, CONNECT_ERRORS):
+            eject(node, str(result) or type(result).__name__)
+        elif isinstance(result, httpx.TransportError):
+            logger.warning("Profile registration on %s failed: %s", node, str(result) or type(result).__name__)
+        elif isinstance(result, Exception):
+            raise result
+        else:
+            responses.append(result)
+    if not responses:
+        raise HTTPException(status_code=502, detail="No backend node could be reached")
+    success = next((response for response in responses if response.status_code == 200), None)
+    if success is None:
+        return responses[0]
+    registered_profiles[body] = None
+    registered_profiles.move_to_end(body)
+    while len(registered_profiles) > ROUTER_MAX_PROFILES:
+        registered_profiles.popitem(last=False)
+    return success
+
+
+@app.get("/cluster")
+async def cluster_state():
+    """Known nodes, the ones on the ring, their share of the key space and forwarding counts"""
+    return {
+        "mode": ROUTER_MODE,
+        "members": members,
+        "ring": ring.nodes(),
+        "vnodes": ROUTER_VNODES,
+        "key_share": ring.distribution(),
+        "registered_profiles": len(registered_profiles),
+        **router_stats,
+    }
+
+
+@app.get("/cluster/owner")
+async def cluster_owner(video_id: str):
+    return {"video_id": video_id, "owner": ring.owner(video_id), "fallbacks": ring.owners(video_id, count=3)[1:]}
+
+
+@app.post("/cluster/nodes")
+async def join_node(request: Request, url: str):
+    """Add a node to the cluster; it serves its share of keys once /health answers"""
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    node = url.rstrip("/")
+    if node not in members:
+        members.append(node)
+    if await check_node(node) and node not in ring:
+        await add_to_ring(node)
+    return {"node": node, "on_ring": node in ring, "ring": ring.nodes()}
+
+
+@app.delete("/cluster/nodes")
+async def leave_node(request: Request, url: str):
+    """Remove a node from the cluster (drain it before stopping the process)"""
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    node = url.rstrip("/")
+    if node not in members:
+        raise HTTPException(status_code=404, detail="Unknown node")
+    members.remove(node)
+    ring.remove(node)
+    return {"node": node, "ring": ring.nodes()}
+
+
+@app.delete("/cache/{video_id}")
+async def route_clear_cache(request: Request, video_id: str):
+    """The video's cache lives on the node that owns it"""
+    return await route(video_id, request)
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def route_other(path: str, request: Request):
+    return await route(f"/{path}", request)
@@ -0,0 +1,179 @@
+"""
+Compact on-disk snapshot of transcripts and cached analysis results.
+
+The file is designed to be memory-mapped and queried in place, so a fresh
+worker can serve lookups without deserializing the whole corpus:
+
+    header          magic, version, counts and section offsets
+    video table     fixed-width records sorted by video_id (binary searched)
+    starts          float64[total_cues]   caption start times, all videos
+    durations       float64[total_cues]   caption durations, all videos
+    text offsets    uint64[total_cues+1]  byte offsets into the text blob
+    text blob       utf-8 caption texts, concatenated
+    results blob    one JSON document per video: {cache_key: cache entry}
+
+Only the video table is touched by a lookup; the arrays and blobs are sliced
+for the requested video alone. Arrays use native byte order, so snapshots are
+only portable between little-endian hosts (every platform we deploy on).
+"""
+
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"YTSNAP01"
+VERSION = 1
+VIDEO_ID_BYTES = 32
+
+# magic, version, video count, total cues, then offsets of the six sections
+HEADER = struct.Struct("<8sIIQ6Q")
+# video_id, first cue index, cue count, transcript timestamp, results offset, results length
+VIDEO_RECORD = struct.Struct(f"<{VIDEO_ID_BYTES}sQIdQI")
+
+
+def _encode_video_id(video_id: str) -> bytes:
+    encoded = video_id.encode()
+    if len(encoded) > VIDEO_ID_BYTES:
+        raise ValueError(f"video_id too long for snapshot: {video_id!r}")
+    return encoded.ljust(VIDEO_ID_BYTES, b"\0")
+
+
+def write_snapshot(path: str, transcripts: Dict[str, dict], results: Dict[str, Dict[str, dict]]) -> int:
+    """Write a snapshot atomically, return the number of videos written.
+
+    transcripts: video_id -> {"timestamp": float, "cues": [(text, start, duration), ...]}
+    results:     video_id -> {cache_key: JSON-serializable cache entry}
+    """
+    video_ids = sorted(set(transcripts) | set(results))
+    starts, durations, text_offsets = [], [], [0]
+    text_blob = bytearray()
+    results_blob = bytearray()
+    records = []
+
+    for video_id in video_ids:
+        transcript = transcripts.get(video_id, {"timestamp": 0.0, "cues": []})
+        first_cue = len(starts)
+        for text, start, duration in transcript["cues"]:
+            starts.append(start)
+            durations.append(duration)
+            text_blob += text.encode()
+            text_offsets.append(len(text_blob))
+        result_bytes = json.dumps(results.get(video_id, {}), separators=(",", ":")).encode()
+        records.append(VIDEO_RECORD.pack(
+            _encode_video_id(video_id), first_cue, len(transcript["cues"]),
+            float(transcript["timestamp"]), len(results_blob), len(result_bytes)
+        ))
+        results_blob += result_bytes
+
+    total_cues = len(starts)
+    table_offset = HEADER.size
+    starts_offset = table_offset + VIDEO_RECORD.size * len(records)
+    durations_offset = starts_offset + 8 * total_cues
+    text_offsets_offset = durations_offset + 8 * total_cues
+    text_offset = text_offsets_offset + 8 * (total_cues + 1)
+    results_offset = text_offset + len(text_blob)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, len(records), total_cues,
+                table_offset, starts_offset, durations_offset, text_offsets_offset, text_offset, results_offset
+            ))
+            for record in records:
+                f.write(record)
+            f.write(array.array("d", starts).tobytes())
+            f.write(array.array("d", durations).tobytes())
+            f.write(array.array("Q", text_offsets).tobytes())
+            f.write(text_blob)
+            f.write(results_blob)
+        # Readers keep their mapping of the old inode; new readers see the new file
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(records)
+
+
+class TranscriptSnapshot:
+    """Read-only, memory-mapped view of a snapshot file"""
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise ValueError("Transcript snapshots require a little-endian host")
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.video_count, self.total_cues, self._table, self._starts,
+         self._durations, self._text_offsets, self._text, self._results) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Not a v{VERSION} transcript snapshot: {path}")
+        self._view = memoryview(self._mm)
+        self._start_values = self._view[self._starts:self._durations].cast("d")
+        self._duration_values = self._view[self._durations:self._text_offsets].cast("d")
+        self._offset_values = self._view[self._text_offsets:self._text].cast("Q")
+
+    def close(self):
+        for values in (self._start_values, self._duration_values, self._offset_values, self._view):
+            values.release()
+        self._mm.close()
+
+    def __len__(self) -> int:
+        return self.video_count
+
+    def _record(self, index: int) -> tuple:
+        return VIDEO_RECORD.unpack_from(self._mm, self._table + index * VIDEO_RECORD.size)
+
+    def _find(self, video_id: str) -> Optional[tuple]:
+        """Binary search the sorted video table"""
+        try:
+            key = _encode_video_id(video_id)
+        except ValueError:
+            return None
+        lo, hi = 0, self.video_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            if record[0] < key:
+                lo = mid + 1
+            elif record[0] > key:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def video_ids(self) -> List[str]:
+        return [self._record(i)[0].rstrip(b"\0").decode() for i in range(self.video_count)]
+
+    def get_transcript(self, video_id: str) -> Optional[Tuple[float, List[Tuple[str, float, float]]]]:
+        """(timestamp, [(text, start, duration), ...]) for a video, or None"""
+        record = self._find(video_id)
+        if record is None or record[2] == 0:
+            return None
+        _, first, count, timestamp, _, _ = record
+        offsets = self._offset_values[first:first + count + 1].tolist()
+        starts = self._start_values[first:first + count].tolist()
+        durations = self._duration_values[first:first + count].tolist()
+        base = self._text
+        cues = [
+            (self._mm[base + offsets[i]:base + offsets[i + 1]].decode(), starts[i], durations[i])
+            for i in range(count)
+        ]
+        return timestamp, cues
+
+    def get_results(self, video_id: str) -> Dict[str, dict]:
+        """{cache_key: cache entry} stored for a video"""
+        record = self._find(video_id)
+        if record is None or record[5] == 0:
+            return {}
+        start = self._results + record[4]
+        return json.loads(self._mm[start:start + record[5]])
@@ -0,0 +1,105 @@
+"""
+Non-blocking structured logging.
+
+Log calls on the request path only enqueue the LogRecord; a QueueListener
+thread does the formatting and the actual I/O. Fields passed through
+`extra=` are rendered as JSON keys (LOG_FORMAT=json) or as trailing
+key=value pairs (LOG_FORMAT=text, the default).
+"""
+
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from typing import Optional
+
+# Attributes every LogRecord has; anything else came in through extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in record.__dict__.items() if key not in _STANDARD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the standard fields plus any extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(_extra_fields(record))
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format with extras appended as key=value pairs"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = _extra_fields(record)
+        if extras:
+            line += " | " + " ".join(f"{key}={value}" for key, value in extras.items())
+        return line
+
+
+_IMMUTABLE_TYPES = (str, bytes, int, float, complex, bool, type(None))
+
+
+def _is_frozen(value) -> bool:
+    """True when value can't change between the log call and the listener formatting it"""
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_frozen(item) for item in value)
+    return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers message formatting to the listener thread.
+
+    The stock prepare() formats the message (and merges args) on the calling
+    thread. Here a record whose msg and args are all immutable is passed
+    through untouched, so %-style arguments are only rendered off the event
+    loop. Anything else (a list, dict or object argument) could be mutated
+    before the listener gets to it, so that message is rendered now.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not (_is_frozen(record.msg) and _is_frozen(record.args or ())):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: int = logging.INFO, log_format: str = "text") -> logging.handlers.QueueListener:
+    """Route the root logger through a queue to a background stream handler"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(LazyQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
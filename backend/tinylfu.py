@@ -0,0 +1,214 @@
+"""
+Frequency-aware cache admission (W-TinyLFU) backed by a count-min sketch.
+
+Traffic is heavily skewed: a few thousand videos get most requests while a long
+tail is viewed once. With plain LRU every one-off video evicts something, often
+a popular result. TinyLFU keeps LRU order but only lets a new entry displace the
+least recently used one when the new key has been requested more often:
+
+  * FrequencySketch counts requests per key in a count-min sketch (`depth` rows
+    of `width` saturating 16-bit counters; the estimate is the row minimum, so
+    it can only over-count). After `sample_size` increments every counter is
+    halved, so popularity from last week fades out.
+  * It also keeps the `top_k` keys with the highest estimates (hot()), for
+    /api/stats and cache warming.
+  * TinyLFUCache is a mapping with a small admission window (plain LRU, about
+    1% of capacity) in front of the main LRU. Keys evicted from the window
+    enter the main area only if they are estimated to be more frequent than
+    the main area's LRU victim. The window lets a new video that is requested
+    again seconds later build up frequency before it has to compete.
+
+Frequencies are recorded by the caller (record()), not by cache lookups, so one
+sketch can back several caches whose keys map to the same popularity key.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterator, List, MutableMapping, Optional, Tuple
+
+COUNTER_MAX = 0xFFFF
+
+
+class FrequencySketch:
+    """Count-min sketch of request frequency with periodic halving and top-k tracking (thread-safe)"""
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, sample_size: Optional[int] = None, top_k: int = 100):
+        self.width = 1 << max(width - 1, 1).bit_length()
+        self.depth = depth
+        self.sample_size = sample_size or 10 * self.width
+        self.top_k = top_k
+        self._mask = self.width - 1
+        self._rows = [array("H", bytes(2 * self.width)) for _ in range(depth)]
+        self._lock = threading.Lock()
+        self._additions = 0
+        self._hot: Dict[Hashable, int] = {}
+        self._hot_floor = 0
+        self.resets = 0
+
+    def _indexes(self, key: Hashable) -> List[int]:
+        return [hash((row, key)) & self._mask for row in range(self.depth)]
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def record(self, key: Hashable) -> int:
+        """Count one request for key; returns its new estimate"""
+        indexes = self._indexes(key)
+        with self._lock:
+            estimate = min(row[index] for row, index in zip(self._rows, indexes))
+            # Conservative update: only the counters at the minimum are raised
+            if estimate < COUNTER_MAX:
+                estimate += 1
+                for row, index in zip(self._rows, indexes):
+                    if row[index] < estimate:
+                        row[index] = estimate
+            self._additions += 1
+            if self._additions >= self.sample_size:
+                self._halve()
+            self._track_hot(key, estimate)
+        return estimate
+
+    def _halve(self) -> None:
+        for i, row in enumerate(self._rows):
+            self._rows[i] = array("H", (count >> 1 for count in row))
+        self._additions //= 2
+        self._hot = {key: count >> 1 for key, count in self._hot.items() if count > 1}
+        self._hot_floor = min(self._hot.values(), default=0)
+        self.resets += 1
+
+    def _track_hot(self, key: Hashable, estimate: int) -> None:
+        hot = self._hot
+        if key in hot or len(hot) < self.top_k:
+            hot[key] = estimate
+        elif estimate > self._hot_floor:
+            # Estimates only grow between halvings, so the floor never overstates the minimum
+            victim = min(hot, key=hot.get)
+            if estimate <= hot[victim]:
+                self._hot_floor = hot[victim]
+                return
+            del hot[victim]
+            hot[key] = estimate
+        else:
+            return
+        if len(hot) >= self.top_k:
+            self._hot_floor = min(hot.values())
+
+    def hot(self, limit: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """Most requested keys first, as (key, estimated requests since the last halvings)"""
+        with self._lock:
+            items = sorted(self._hot.items(), key=lambda item: -item[1])
+        return items[:limit] if limit is not None else items
+
+    def stats(self) -> dict:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "sample_size": self.sample_size,
+            "additions_since_reset": self._additions,
+            "resets": self.resets,
+        }
+
+
+class TinyLFUCache(MutableMapping):
+    """Bounded mapping with LRU eviction and TinyLFU admission (thread-safe).
+
+    frequency_key(key, value) names the sketch key an entry is counted under.
+    Assigning to an existing key always replaces its value; only new keys have
+    to win admission, so a rejected insert simply isn't stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        sketch: FrequencySketch,
+        frequency_key: Callable[[Hashable, object], Hashable] = lambda key, value: key,
+        window_fraction: float = 0.01
+    ):
+        self.max_entries = max_entries
+        self.window_size = max(1, int(max_entries * window_fraction))
+        self.main_size = max(max_entries - self.window_size, 1)
+        self.sketch = sketch
+        self.frequency_key = frequency_key
+        self._lock = threading.RLock()
+        self._window: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._main: "OrderedDict[Hashable, object]" = OrderedDict()
+        self.admitted = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._main)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._window or key in self._main
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            return iter(list(self._main) + list(self._window))
+
+    def __getitem__(self, key: Hashable) -> object:
+        with self._lock:
+            for area in (self._window, self._main):
+                if key in area:
+                    area.move_to_end(key)
+                    return area[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: Hashable, value: object) -> None:
+        with self._lock:
+            for area in (self._window, self._main):
+                if key in area:
+                    area[key] = value
+                    area.move_to_end(key)
+                    return
+            self._window[key] = value
+            if len(self._window) > self.window_size:
+                self._admit(*self._window.popitem(last=False))
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._window:
+                del self._window[key]
+            else:
+                del self._main[key]
+
+    def items(self) -> List[Tuple[Hashable, object]]:
+        """Snapshot of the entries; unlike lookups, doesn't refresh their recency"""
+        with self._lock:
+            return list(self._main.items()) + list(self._window.items())
+
+    def values(self) -> List[object]:
+        return [value for _, value in self.items()]
+
+    def _frequency(self, key: Hashable, value: object) -> int:
+        return self.sketch.estimate(self.frequency_key(key, value))
+
+    def _admit(self, candidate_key: Hashable, candidate: object) -> None:
+        """Move an entry leaving the window into the main area if it beats the main area's LRU victim"""
+        if len(self._main) >= self.main_size:
+            victim_key, victim = next(iter(self._main.items()))
+            if self._frequency(candidate_key, candidate) <= self._frequency(victim_key, victim):
+                self.rejected += 1
+                return
+            del self._main[victim_key]
+            self.evicted += 1
+        self._main[candidate_key] = candidate
+        self.admitted += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._window.clear()
+            self._main.clear()
+
+    def stats(self) -> dict:
+        decided = self.admitted + self.rejected
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "window_entries": len(self._window),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "admission_rate": round(self.admitted / decided, 3) if decided else None,
+        }
@@ -0,0 +1,154 @@
+"""
+Pooled keep-alive transcript fetching.
+
+YouTubeTranscriptApi.list_transcripts opens a fresh requests.Session for every
+video, so each fetch pays new TCP/TLS handshakes for the watch page and again
+for the caption track. PooledTranscriptFetcher drives the same parsing code
+(TranscriptListFetcher) over one long-lived session instead:
+
+  * connections are kept alive and reused, at most `pool_maxsize` per host
+    (requests block for a free connection rather than opening more)
+  * `max_concurrency` caps concurrent fetches across all hosts
+  * connect/read timeouts apply to every request, and idempotent requests are
+    retried with exponential backoff on connection errors and 429/5xx
+  * `base_url` redirects all youtube.com traffic, e.g. to mock_youtube_server.py
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from youtube_transcript_api._transcripts import TranscriptListFetcher
+
+YOUTUBE_ORIGIN = "https://www.youtube.com"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with default timeouts, origin rewriting and connection accounting"""
+
+    def __init__(self, fetcher: "PooledTranscriptFetcher", **kwargs):
+        self._fetcher = fetcher
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        fetcher = self._fetcher
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                fetcher._record_new_connection(self.host)
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                fetcher._record_new_connection(self.host)
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        if self._fetcher.base_url and request.url.startswith(YOUTUBE_ORIGIN):
+            request.url = self._fetcher.base_url + request.url[len(YOUTUBE_ORIGIN):]
+        started = time.perf_counter()
+        try:
+            return super().send(request, timeout=timeout or self._fetcher.timeout, **kwargs)
+        finally:
+            self._fetcher._record_request(urlsplit(request.url).hostname or "", time.perf_counter() - started)
+
+
+class PooledTranscriptFetcher:
+    """Fetches transcripts over a shared keep-alive session (thread-safe)"""
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        max_concurrency: int = 8,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+        base_url: Optional[str] = None,
+        on_request: Optional[Callable[[str, float], None]] = None,
+        on_new_connection: Optional[Callable[[str], None]] = None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self._on_request = on_request
+        self._on_new_connection = on_new_connection
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = {}
+        self._connections: Dict[str, int] = {}
+        self.fetches = 0
+        self.fetch_seconds = 0.0
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = _PooledAdapter(self, pool_connections=4, pool_maxsize=pool_maxsize, pool_block=True, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _record_request(self, host: str, seconds: float) -> None:
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+        if self._on_request:
+            self._on_request(host, seconds)
+
+    def _record_new_connection(self, host: str) -> None:
+        with self._lock:
+            self._connections[host] = self._connections.get(host, 0) + 1
+        if self._on_new_connection:
+            self._on_new_connection(host)
+
+    def fetch(self, video_id: str, languages: Sequence[str] = ("en",)) -> List[dict]:
+        """[{'text', 'start', 'duration'}, ...] for the first available language; raises youtube_transcript_api errors"""
+        with self._semaphore:
+            started = time.perf_counter()
+            try:
+                transcript_list = TranscriptListFetcher(self.session).fetch(video_id)
+                return transcript_list.find_transcript(list(languages)).fetch()
+            finally:
+                with self._lock:
+                    self.fetches += 1
+                    self.fetch_seconds += time.perf_counter() - started
+
+    def prewarm(self) -> None:
+        """Open a keep-alive connection to the transcript origin ahead of the first fetch"""
+        self.session.head(self.base_url or YOUTUBE_ORIGIN, allow_redirects=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests_total = sum(self._requests.values())
+            connections_total = sum(self._connections.values())
+            return {
+                "fetches": self.fetches,
+                "avg_fetch_seconds": round(self.fetch_seconds / self.fetches, 4) if self.fetches else None,
+                "http_requests": requests_total,
+                "new_connections": connections_total,
+                # Failed connects that were retried also count as new connections
+                "connection_reuse_rate": round(max(0.0, 1 - connections_total / requests_total), 4) if requests_total else None,
+                "requests_by_host": dict(self._requests),
+                "connections_by_host": dict(self._connections),
+            }
+
+    def close(self) -> None:
+        self.session.close()
@@ -9,15 +9,59 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
         });
     } else if (message.type === 'processVideo') {
         // Handle video processing request with user preferences
-        processVideoRequest(message.videoId, message.userPreferences)
+        processVideoRequest(message.videoId, message.userPreferences, message.captions, message.currentTime, message.mode)
+            .then(response => sendResponse({ success: true, data: response }))
+            .catch(error => sendResponse({ success: false, error: error.message }));
+        return true; // Will respond asynchronously
+    } else if (message.type === 'pollResult') {
+        fetchAnalysisResult(message.cacheKey)
             .then(response => sendResponse({ success: true, data: response }))
             .catch(error => sendResponse({ success: false, error: error.message }));
         return true; // Will respond asynchronously
     }
 });
 
+// Progress or full result of a playhead analysis by its cache key; null once the server no longer knows it
+async function fetchAnalysisResult(cacheKey) {
+    const response = await fetch(`http://127.0.0.1:8000/results/${encodeURIComponent(cacheKey)}`, {
+        headers: { 'Accept': 'application/json' }
+    });
+    if (response.status === 404) {
+        return null;
+    }
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
+// Server-side preference profiles: serialized preferences -> profile_id
+const profileIds = new Map();
+
+// Register preferences once and reuse the returned profile_id
+async function getProfileId(preferences) {
+    const key = JSON.stringify(preferences);
+    if (profileIds.has(key)) {
+        return profileIds.get(key);
+    }
+    const response = await fetch(`http://127.0.0.1:8000/profiles`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        },
+        body: JSON.stringify(preferences)
+    });
+    if (!response.ok) {
+        return null;
+    }
+    const { profile_id } = await response.json();
+    profileIds.set(key, profile_id);
+    return profile_id;
+}
+
 // Function to process video request with user preferences
-async function processVideoRequest(videoId, userPreferences = null) {
+async function processVideoRequest(videoId, userPreferences = null, captions = null, currentTime = null, mode = null) {
     try {
         // Validate and clean user preferences
         let cleanedPreferences = null;
@@ -39,10 +83,31 @@ async function processVideoRequest(videoId, userPreferences = null) {
             };
         }
 
-        const requestBody = {
-            video_id: videoId,
-            user_preferences: cleanedPreferences
-        };
+        // Send a profile_id instead of the full preferences when the server has them registered
+        let profileId = null;
+        if (cleanedPreferences) {
+            try {
+                profileId = await getProfileId(cleanedPreferences);
+            } catch (profileError) {
+                console.warn('Could not register preference profile:', profileError);
+            }
+        }
+        // Fields sent with every attempt: the playhead lets the server answer for the upcoming
+        // part of a long video first (complete=false until the rest is analyzed)
+        const requestExtras = {};
+        if (Number.isFinite(currentTime)) {
+            requestExtras.current_time = Math.max(0, currentTime);
+        }
+        if (['fast', 'balanced', 'thorough'].includes(mode)) {
+            requestExtras.mode = mode;
+        }
+        // Captions already loaded by the page save the server a transcript fetch
+        if (captions) {
+            requestExtras.captions = captions;
+        }
+        const requestBody = profileId
+            ? { video_id: videoId, profile_id: profileId, ...requestExtras }
+            : { video_id: videoId, user_preferences: cleanedPreferences, ...requestExtras };
 
         console.log('Sending request to backend:', {
             videoId,
@@ -57,16 +122,31 @@ async function processVideoRequest(videoId, userPreferences = null) {
         const controller = new AbortController();
         const timeoutId = setTimeout(() => controller.abort(), 30000); // 30 second timeout
 
-        const response = await fetch(`http://127.0.0.1:8000/process_video`, {
+        const postProcessVideo = body => fetch(`http://127.0.0.1:8000/process_video`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
                 'Accept': 'application/json'
             },
-            body: JSON.stringify(requestBody),
+            body: JSON.stringify(body),
             signal: controller.signal
         });
 
+        let response = await postProcessVideo(requestBody);
+        if (response.status === 404 && profileId) {
+            // Profiles live in one server process: it restarted or another worker/node answered.
+            // Register again and retry; if that worker doesn't know the new id either, send the full preferences
+            profileIds.delete(JSON.stringify(cleanedPreferences));
+            const retryProfileId = await getProfileId(cleanedPreferences).catch(() => null);
+            if (retryProfileId) {
+                response = await postProcessVideo({ ...requestBody, profile_id: retryProfileId });
+            }
+            if (!retryProfileId || response.status === 404) {
+                profileIds.delete(JSON.stringify(cleanedPreferences));
+                response = await postProcessVideo({ video_id: videoId, user_preferences: cleanedPreferences, ...requestExtras });
+            }
+        }
+
         clearTimeout(timeoutId);
 
         if (!response.ok) {
@@ -86,6 +166,7 @@ async function processVideoRequest(videoId, userPreferences = null) {
             skipSegments: result.remove?.length || 0,
             skipPercentage: result.skip_percentage?.toFixed(1) || 0,
             processingTime: result.processing_time?.toFixed(2) || 0,
+            complete: result.complete !== false,
             userPreferencesApplied: !!cleanedPreferences
         });
 
@@ -10,6 +10,8 @@ let isProcessing = false;
 let temporarilyDisabledSegments = new Set(); // Track segments that are temporarily disabled
 let lastManualSeekTime = 0; // Track when manual seeking occurred
 let manualSeekGracePeriod = 3000; // 3 seconds grace period after manual seeking
+let completionPollTimer = null; // Polls for the full result while the server is still analyzing the video
+const COMPLETION_POLL_MAX_ATTEMPTS = 20;
 
 // Add URL change detection at the top of the file after variable declarations
 new MutationObserver(() => {
@@ -495,6 +497,10 @@ function rewindToLastSkip() {
 }
 
 function cleanup() {
+    if (completionPollTimer) {
+        clearTimeout(completionPollTimer);
+        completionPollTimer = null;
+    }
     if (skipOverlay) {
         skipOverlay.remove();
         skipOverlay = null;
@@ -515,6 +521,44 @@ function cleanup() {
     ratingSystem.hideRatingInterface();
 }
 
+// Caption track the page already references, as parallel arrays for the backend.
+// Returns null whenever it isn't available; the backend then fetches the transcript itself.
+async function getLoadedCaptions(videoId) {
+    try {
+        // The player response is embedded in the page; after in-app navigation it may belong to another video
+        const script = [...document.querySelectorAll('script')]
+            .find(s => s.textContent.includes('ytInitialPlayerResponse') && s.textContent.includes(videoId));
+        const match = script && script.textContent.match(/"captionTracks":(\[.*?\])/);
+        if (!match) {
+            return null;
+        }
+        const tracks = JSON.parse(match[1]);
+        const track = tracks.find(t => t.languageCode === 'en' && t.kind !== 'asr')
+            || tracks.find(t => t.languageCode === 'en');
+        if (!track) {
+            return null;
+        }
+        const response = await fetch(`${track.baseUrl}&fmt=json3`);
+        if (!response.ok) {
+            return null;
+        }
+        const { events = [] } = await response.json();
+        const captions = { start: [], duration: [], text: [] };
+        for (const event of events) {
+            const text = (event.segs || []).map(seg => seg.utf8).join('').trim();
+            if (text) {
+                captions.start.push(event.tStartMs / 1000);
+                captions.duration.push((event.dDurationMs || 0) / 1000);
+                captions.text.push(text);
+            }
+        }
+        return captions.text.length ? captions : null;
+    } catch (error) {
+        logger.warn('Could not read loaded captions', { error: error.message });
+        return null;
+    }
+}
+
 // Add new function processVideo
 async function processVideo() {
     logger.startPerformanceTimer('video_processing');
@@ -556,30 +600,13 @@ async function processVideo() {
         // Load user preferences
         const userPreferences = await loadUserPreferences();
         logger.info('User preferences loaded', { preferences: userPreferences });
+        const captions = await getLoadedCaptions(videoId);
+        logger.info('Loaded captions', { captions: captions ? captions.text.length : 0 });
+
+        const mode = await loadAnalysisMode();
 
         // Send request to background script with timeout and preferences
-        const response = await Promise.race([
-            new Promise((resolve, reject) => {
-                chrome.runtime.sendMessage(
-                    {
-                        type: 'processVideo',
-                        videoId,
-                        userPreferences
-                    },
-                    response => {
-                        if (chrome.runtime.lastError) {
-                            reject(new Error(chrome.runtime.lastError.message));
-                            return;
-                        }
-                        resolve(response);
-                    }
-                );
-            }),
-            // Timeout after 30 seconds
-            new Promise((_, reject) =>
-                setTimeout(() => reject(new Error('Request timeout - processing took too long')), 30000)
-            )
-        ]);
+        const response = await requestSkipSegments(videoId, userPreferences, captions, mode);
 
         logger.endPerformanceTimer('api_request');
 
@@ -590,6 +617,14 @@ async function processVideo() {
                 userPreferencesUsed: !!userPreferences
             });
 
+            if (data && data.complete === false && !data.degraded && data.cache_key) {
+                // Long video analyzed from the playhead: poll for the rest without resending the captions.
+                // A degraded answer under load has nothing pending and is not polled.
+                scheduleCompletionPoll(
+                    videoId, data.cache_key, () => requestSkipSegments(videoId, userPreferences, captions, mode), 0
+                );
+            }
+
             if (data && data.remove && Array.isArray(data.remove)) {
                 // Use skip segments directly from the API
                 skipPoints = data.remove;
@@ -654,6 +689,117 @@ async function processVideo() {
     }
 }
 
+// Ask the background script for skips; the playhead lets the server analyze the upcoming part first
+function requestSkipSegments(videoId, userPreferences, captions, mode) {
+    const video = document.querySelector('video');
+    const currentTime = video && Number.isFinite(video.currentTime) ? video.currentTime : null;
+    return Promise.race([
+        new Promise((resolve, reject) => {
+            chrome.runtime.sendMessage(
+                {
+                    type: 'processVideo',
+                    videoId,
+                    userPreferences,
+                    captions,
+                    currentTime,
+                    mode
+                },
+                response => {
+                    if (chrome.runtime.lastError) {
+                        reject(new Error(chrome.runtime.lastError.message));
+                        return;
+                    }
+                    resolve(response);
+                }
+            );
+        }),
+        // Timeout after 30 seconds
+        new Promise((_, reject) =>
+            setTimeout(() => reject(new Error('Request timeout - processing took too long')), 30000)
+        )
+    ]);
+}
+
+// Poll an incomplete playhead analysis by its cache key with backoff until it is complete.
+// Only a poll the server can't answer (restart, eviction, another worker) resends the full request.
+function scheduleCompletionPoll(videoId, cacheKey, resend, attempt) {
+    if (completionPollTimer) {
+        clearTimeout(completionPollTimer);
+        completionPollTimer = null;
+    }
+    if (attempt >= COMPLETION_POLL_MAX_ATTEMPTS) {
+        logger.warn('Giving up waiting for the full analysis', { videoId, attempts: attempt });
+        return;
+    }
+    const delay = Math.min(2000 * Math.pow(1.5, attempt), 15000);
+    completionPollTimer = setTimeout(async () => {
+        completionPollTimer = null;
+        // Stop once the user navigated to another video
+        if (new URL(window.location.href).searchParams.get('v') !== videoId) {
+            return;
+        }
+        try {
+            let response = await pollAnalysisResult(cacheKey);
+            if (response.success && response.data === null) {
+                logger.info('Server no longer knows the analysis, sending the full request again', { videoId });
+                response = await resend();
+            }
+            if (!response.success) {
+                logger.warn('Polling for the full analysis failed', { error: response.error });
+                scheduleCompletionPoll(videoId, cacheKey, resend, attempt + 1);
+                return;
+            }
+            const data = response.data;
+            if (data && data.complete === false) {
+                if (data.degraded) {
+                    // Answered without the LLM under load; nothing is being analyzed to wait for
+                    logger.info('Server is overloaded, stopped waiting for the full analysis', { videoId });
+                    return;
+                }
+                scheduleCompletionPoll(videoId, data.cache_key || cacheKey, resend, attempt + 1);
+                return;
+            }
+            if (data && Array.isArray(data.remove)) {
+                skipPoints = data.remove;
+                if (skipOverlay && videoElement && progressBar) {
+                    createSkipOverlay();
+                } else if (skipPoints.length > 0) {
+                    isEnabled = true;
+                    initializeSkipper();
+                }
+            }
+            logger.success('Full analysis loaded', { count: skipPoints.length });
+            statusNotifier.showCompleted(`Analysis complete: ${skipPoints.length} segments to skip.`);
+        } catch (error) {
+            logger.warn('Polling for the full analysis failed', { error: error.message });
+            scheduleCompletionPoll(videoId, cacheKey, resend, attempt + 1);
+        }
+    }, delay);
+}
+
+// Ask the background script for a playhead analysis' progress; data is null when the server doesn't know the key
+function pollAnalysisResult(cacheKey) {
+    return new Promise((resolve, reject) => {
+        chrome.runtime.sendMessage({ type: 'pollResult', cacheKey }, response => {
+            if (chrome.runtime.lastError) {
+                reject(new Error(chrome.runtime.lastError.message));
+                return;
+            }
+            resolve(response);
+        });
+    });
+}
+
+// Quality tier requested from the server: fast, balanced (default) or thorough
+async function loadAnalysisMode() {
+    return new Promise((resolve) => {
+        chrome.storage.local.get(['analysisMode'], function (result) {
+            const mode = result && result.analysisMode;
+            resolve(['fast', 'balanced', 'thorough'].includes(mode) ? mode : 'balanced');
+        });
+    });
+}
+
 // Add function to load user preferences
 async function loadUserPreferences() {
     return new Promise((resolve) => {
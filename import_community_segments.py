@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Import a community skip-segment dump into the store read by the backend.
+
+Takes a CSV dump in SponsorBlock's sponsorTimes.csv layout (plain or .gz) and
+writes the memory-mapped store described in backend/community_segments.py.
+Point COMMUNITY_SEGMENTS_PATH at the output and restart the backend. Videos in
+the store with segments in the user's categories are then answered without
+an LLM call.
+
+Dump categories are mapped onto DEFAULT_SKIP_CATEGORIES names (CATEGORY_MAP);
+others (intro, outro, music_offtopic, poi_highlight, chapter) are dropped, as
+are hidden, shadow-hidden and non-skip entries.
+
+Usage:
+    python import_community_segments.py sponsorTimes.csv.gz --output data/community_segments.bin
+    python import_community_segments.py sponsorTimes.csv --min-votes 1
+"""
+
+import os
+import time
+import argparse
+
+from backend.community_segments import CATEGORY_MAP, import_dump
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a community skip-segment dump")
+    parser.add_argument("dump", help="CSV dump (sponsorTimes.csv layout), optionally gzipped")
+    parser.add_argument(
+        "--output", default=os.environ.get("COMMUNITY_SEGMENTS_PATH", "community_segments.bin"),
+        help="Store to write (default: $COMMUNITY_SEGMENTS_PATH or community_segments.bin)"
+    )
+    parser.add_argument("--min-votes", type=int, default=0, help="Drop unlocked segments with fewer votes")
+    args = parser.parse_args()
+
+    print("📥 YT_Skip Community Segment Import")
+    print("=" * 60)
+    print(f"🗂️  Categories: {', '.join(f'{source} → {target}' for source, target in CATEGORY_MAP.items())}")
+    started = time.time()
+    stats = import_dump(args.dump, args.output, args.min_votes)
+    print(f"\n✅ Wrote {stats['segments']} segments for {stats['videos']} videos to {args.output} "
+          f"in {time.time() - started:.1f}s")
+    print(f"   {stats.get('rows', 0)} rows read, {stats.get('imported', 0)} imported")
+    for reason in ("unmapped_category", "filtered", "malformed"):
+        if stats.get(reason):
+            print(f"   {stats[reason]} skipped: {reason.replace('_', ' ')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the CPU-side pipeline functions in backend/app.py.
+
+Runs each function over synthetic transcripts from 1 minute to 12 hours,
+prints a scaling curve, and checks two kinds of regression thresholds:
+  - the fitted growth exponent (time ~ n^k over caption count n)
+  - the absolute time budget on the 12 hour stream
+Use --save/--compare to diff against a previously stored run.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+# The pipeline functions are pure; no Groq call is ever made from here
+os.environ.setdefault("GROQ_API_KEY", "microbenchmark-unused")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.app import (  # noqa: E402
+    TranscriptionResult,
+    ImportantSegments,
+    UserPreferences,
+    optimize_transcript_for_llm,
+    matches_user_preferences,
+    create_enhanced_skip_segments,
+    calculate_skip_confidence,
+    calculate_transcript_hash,
+    clean_llm_response,
+)
+from synthetic_transcripts import generate_transcript, generate_llm_segments, generate_llm_response  # noqa: E402
+
+# Stream lengths in minutes: 1 minute up to 12 hours
+DEFAULT_SIZES = [1, 10, 60, 180, 720]
+
+BENCH_PREFERENCES = UserPreferences(
+    default_categories=["advertisements", "calls_to_action", "filler_speech", "self_promotion"],
+    custom_keywords=["crypto", "giveaway"],
+    custom_phrases=["my personal opinion"],
+    sensitivity="medium"
+)
+
+# Regression thresholds: max growth exponent and max seconds on the 12h stream
+THRESHOLDS = {
+    "optimize_transcript_for_llm": {"max_exponent": 1.3, "max_seconds_12h": 0.25},
+    "matches_user_preferences": {"max_exponent": 1.3, "max_seconds_12h": 0.5},
+    "create_enhanced_skip_segments": {"max_exponent": 1.3, "max_seconds_12h": 1.0},
+    "calculate_skip_confidence": {"max_exponent": 1.3, "max_seconds_12h": 0.5},
+    "calculate_transcript_hash": {"max_exponent": 1.3, "max_seconds_12h": 0.05},
+    "clean_llm_response": {"max_exponent": 1.3, "max_seconds_12h": 0.05},
+}
+
+
+class Fixture:
+    """Synthetic transcript plus the derived inputs each benchmark needs"""
+
+    def __init__(self, minutes: float, seed: int = 0):
+        self.minutes = minutes
+        cues = generate_transcript(minutes * 60, seed=seed)
+        self.data = [TranscriptionResult(**cue) for cue in cues]
+        self.llm_segments = generate_llm_segments(cues, seed=seed)
+        self.llm_response = generate_llm_response(self.llm_segments, seed=seed)
+        self.size = len(self.data)
+
+
+BENCHMARKS = {
+    "optimize_transcript_for_llm": lambda f: optimize_transcript_for_llm(f.data),
+    "matches_user_preferences": lambda f: [matches_user_preferences(seg, BENCH_PREFERENCES) for seg in f.data],
+    "create_enhanced_skip_segments": lambda f: create_enhanced_skip_segments(
+        f.data, ImportantSegments(segments=f.llm_segments), BENCH_PREFERENCES
+    ),
+    "calculate_skip_confidence": lambda f: [calculate_skip_confidence(seg, f.data) for seg in f.data],
+    "calculate_transcript_hash": lambda f: calculate_transcript_hash(f.data),
+    "clean_llm_response": lambda f: clean_llm_response(f.llm_response),
+}
+
+
+def time_call(func, fixture: Fixture, min_time: float = 0.2, max_repeats: int = 20) -> float:
+    """Best-of-N wall time for one call, repeating until min_time has elapsed"""
+    best = math.inf
+    spent = 0.0
+    repeats = 0
+    while repeats < max_repeats and (repeats < 3 or spent < min_time):
+        start = time.perf_counter()
+        func(fixture)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        repeats += 1
+        # Very slow calls are not worth repeating many times
+        if elapsed > 2.0 and repeats >= 1:
+            break
+    return best
+
+
+def fit_exponent(points) -> float:
+    """Least-squares slope of log(time) against log(size)"""
+    xs = [math.log(size) for size, seconds in points if seconds > 0]
+    ys = [math.log(seconds) for size, seconds in points if seconds > 0]
+    if len(xs) < 2:
+        return 0.0
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    denom = sum((x - mean_x) ** 2 for x in xs)
+    if denom == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denom
+
+
+def run(sizes, names):
+    fixtures = [Fixture(minutes) for minutes in sizes]
+    results = {}
+    for name in names:
+        func = BENCHMARKS[name]
+        curve = []
+        for fixture in fixtures:
+            curve.append({
+                "minutes": fixture.minutes,
+                "captions": fixture.size,
+                "seconds": time_call(func, fixture)
+            })
+        results[name] = {
+            "curve": curve,
+            "exponent": fit_exponent([(p["captions"], p["seconds"]) for p in curve])
+        }
+    return results
+
+
+def check_thresholds(results, sizes):
+    failures = []
+    for name, result in results.items():
+        limits = THRESHOLDS.get(name, {})
+        if result["exponent"] > limits.get("max_exponent", math.inf):
+            failures.append(f"{name}: growth exponent {result['exponent']:.2f} > {limits['max_exponent']}")
+        if max(sizes) >= 720:
+            longest = result["curve"][-1]["seconds"]
+            if longest > limits.get("max_seconds_12h", math.inf):
+                failures.append(f"{name}: {longest:.3f}s on 12h stream > {limits['max_seconds_12h']}s")
+    return failures
+
+
+def compare_baseline(results, baseline, tolerance: float):
+    failures = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old_curve = {p["minutes"]: p["seconds"] for p in baseline[name]["curve"]}
+        for point in result["curve"]:
+            old = old_curve.get(point["minutes"])
+            # Ignore sub-millisecond points, they are dominated by noise
+            if old and old > 0.001 and point["seconds"] > old * tolerance:
+                failures.append(
+                    f"{name} @ {point['minutes']}min: {point['seconds']:.4f}s vs baseline {old:.4f}s "
+                    f"(> {tolerance:.1f}x)"
+                )
+    return failures
+
+
+def print_report(results):
+    for name, result in results.items():
+        print(f"\n📈 {name}  (growth exponent {result['exponent']:.2f})")
+        for point in result["curve"]:
+            per_caption = point["seconds"] / max(point["captions"], 1) * 1e6
+            print(f"   {point['minutes']:>5.0f} min  {point['captions']:>6} captions  "
+                  f"{point['seconds'] * 1000:>10.2f} ms  {per_caption:>7.2f} µs/caption")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for YT_Skip pipeline functions")
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES, help="Stream lengths in minutes")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run a subset of benchmarks")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previously saved JSON file")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed slowdown factor vs baseline")
+    parser.add_argument("--no-check", action="store_true", help="Report only, never fail")
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+    names = args.only or list(BENCHMARKS)
+
+    print("🚀 YT_Skip Pipeline Microbenchmarks")
+    print("=" * 60)
+    results = run(sizes, names)
+    print_report(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Saved results to {args.save}")
+
+    failures = check_thresholds(results, sizes)
+    if args.compare:
+        with open(args.compare) as f:
+            failures += compare_baseline(results, json.load(f), args.tolerance)
+
+    print("\n" + "=" * 60)
+    if failures:
+        print("❌ Regression thresholds exceeded:")
+        for failure in failures:
+            print(f"   • {failure}")
+        if not args.no_check:
+            sys.exit(1)
+    else:
+        print("✅ All benchmarks within thresholds")
+
+
+if __name__ == "__main__":
+    main()
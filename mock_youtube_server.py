@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the two YouTube endpoints the transcript fetcher calls:
+the watch page (caption track list) and the timedtext caption track.
+
+Captions come from synthetic_transcripts.generate_transcript. A video id ending
+in "_<minutes>" gets a transcript of that length (e.g. "talk_90"); ids starting
+with "nocaptions" simulate a video with transcripts disabled.
+
+Usage:
+    python mock_youtube_server.py --port 8765 --latency-ms 40
+    TRANSCRIPT_FETCH_BASE_URL=http://127.0.0.1:8765 uvicorn backend.app:app
+"""
+
+import json
+import time
+import argparse
+import zlib
+from functools import lru_cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from synthetic_transcripts import generate_transcript
+
+
+def video_minutes(video_id: str, default_minutes: float) -> float:
+    suffix = video_id.rsplit("_", 1)[-1] if "_" in video_id else ""
+    try:
+        return float(suffix)
+    except ValueError:
+        return default_minutes
+
+
+@lru_cache(maxsize=256)
+def caption_xml(video_id: str, minutes: float) -> bytes:
+    cues = generate_transcript(minutes * 60, seed=zlib.crc32(video_id.encode()))
+    body = "".join(
+        f'<text start="{cue["start"]}" dur="{cue["duration"]}">{escape(cue["text"])}</text>' for cue in cues
+    )
+    return f'<?xml version="1.0" encoding="utf-8" ?><transcript>{body}</transcript>'.encode()
+
+
+def watch_page(video_id: str, origin: str) -> bytes:
+    player_response = {"playabilityStatus": {"status": "OK"}}
+    if not video_id.startswith("nocaptions"):
+        player_response["captions"] = {
+            "playerCaptionsTracklistRenderer": {
+                "captionTracks": [{
+                    "baseUrl": f"{origin}/api/timedtext?v={video_id}&lang=en",
+                    "name": {"simpleText": "English (auto-generated)"},
+                    "languageCode": "en",
+                    "kind": "asr",
+                    "isTranslatable": False,
+                }],
+                "translationLanguages": [],
+            }
+        }
+    player_response["videoDetails"] = {"videoId": video_id}
+    # The fetcher splits the page on '"captions":' and ',"videoDetails', so no spaces after separators
+    payload = json.dumps(player_response, separators=(",", ":"))
+    return f"<html><body><script>var ytInitialPlayerResponse = {payload};</script></body></html>".encode()
+
+
+class MockYouTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse can be observed
+    default_minutes = 10.0
+    latency = 0.0
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        video_id = parse_qs(url.query).get("v", [""])[0]
+        if url.path == "/watch" and video_id:
+            origin = f"http://{self.headers.get('Host')}"
+            self._send(200, watch_page(video_id, origin), "text/html; charset=utf-8")
+        elif url.path == "/api/timedtext" and video_id:
+            self._send(200, caption_xml(video_id, video_minutes(video_id, self.default_minutes)), "text/xml; charset=utf-8")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_HEAD(self):
+        self._send(200, b"", "text/plain")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock YouTube watch page + caption server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--minutes", type=float, default=10.0, help="Transcript length for ids without a _<minutes> suffix")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    args = parser.parse_args()
+
+    MockYouTubeHandler.default_minutes = args.minutes
+    MockYouTubeHandler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer((args.host, args.port), MockYouTubeHandler)
+    print(f"🎭 Mock YouTube serving on http://{args.host}:{args.port}")
+    print(f"   export TRANSCRIPT_FETCH_BASE_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Offline replay of a recorded request corpus (see backend/corpus.py).
+
+Each record is fed back through the cache-miss pipeline (analyze_cache_miss)
+with its recorded transcript. The recorded raw LLM responses are returned in
+call order by a stand-in Groq client, so nothing touches the network and runs
+are deterministic. Per stage timings (min over --repeat runs) and a digest of
+each output are compared against a stored baseline, so CPU-side regressions
+and behaviour changes show up per commit.
+
+Usage:
+    RECORD_CORPUS_PATH=corpus/requests.jsonl uvicorn backend.app:app   # record
+    python replay_corpus.py corpus/requests.jsonl --save corpus/baseline.json
+    python replay_corpus.py corpus/requests.jsonl --compare corpus/baseline.json
+    python replay_corpus.py corpus/synthetic.jsonl --synthesize 30   # corpus without traffic
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import hashlib
+import logging
+import argparse
+from typing import Dict, List
+
+# Offline and one request at a time: no packing (each call gets its own recorded
+# response), no warm-up, and never record the replay itself
+os.environ.setdefault("GROQ_API_KEY", "replay-unused")
+os.environ["PROMPT_PACKING_ENABLED"] = "false"
+os.environ["WARMUP_ON_STARTUP"] = "false"
+os.environ.pop("RECORD_CORPUS_PATH", None)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import backend.app as pipeline  # noqa: E402
+from backend.corpus import build_record, read_corpus  # noqa: E402
+from backend.fingerprints import SponsorFingerprintIndex  # noqa: E402
+from synthetic_transcripts import generate_transcript, generate_llm_segments, generate_llm_response  # noqa: E402
+
+EMPTY_RESPONSE = '{"segments": []}'
+
+
+class ReplayGroqClient:
+    """Stands in for groq.Groq: returns the loaded responses in order"""
+
+    def __init__(self):
+        self.responses: List[str] = []
+        self.calls = 0
+        self.missing = 0
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def load(self, llm_responses: List[dict]) -> None:
+        self.responses = [entry["response"] for entry in llm_responses]
+        self.calls = 0
+
+    def create(self, **kwargs):
+        if self.calls < len(self.responses):
+            content = self.responses[self.calls]
+        else:
+            # The pipeline now makes more calls than were recorded
+            content = EMPTY_RESPONSE
+            self.missing += 1
+        self.calls += 1
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))],
+            usage=None
+        )
+
+
+def output_digest(skip_segments: List[dict]) -> str:
+    canonical = [[round(seg["start"], 3), round(seg["end"], 3), seg.get("reason")] for seg in skip_segments]
+    return hashlib.sha1(json.dumps(canonical).encode()).hexdigest()[:16]
+
+
+def reset_pipeline_state() -> None:
+    """Fresh caches and fingerprint index, so every pass sees the same state"""
+    pipeline.video_cache.clear()
+    pipeline.chunk_cache.clear()
+    pipeline.transcript_cache.clear()
+    pipeline.llm_response_cache.clear()
+    pipeline.sponsor_index = SponsorFingerprintIndex(
+        threshold=pipeline.FINGERPRINT_THRESHOLD, max_entries=pipeline.FINGERPRINT_MAX_ENTRIES
+    )
+
+
+def replay_record(record: dict, client: ReplayGroqClient) -> dict:
+    data = [
+        pipeline.TranscriptionResult(start=start, duration=duration, text=text)
+        for start, duration, text in record["transcript"]
+    ]
+    preferences = pipeline.UserPreferences(**record["preferences"]) if record["preferences"] else None
+    total_duration = data[-1].start + data[-1].duration if data else 0
+    preferences_hash = pipeline.compile_preferences(preferences).preferences_hash
+    mode = (record.get("output") or {}).get("mode", "balanced")
+    cache_key = pipeline.get_cache_key(
+        record["video_id"], pipeline.calculate_transcript_hash(data), preferences_hash, mode
+    )
+
+    client.load(record["llm_responses"])
+    timings: Dict[str, float] = {}
+    token = pipeline.stage_timings_var.set(timings)
+    started = time.perf_counter()
+    try:
+        response = asyncio.run(pipeline.analyze_cache_miss(
+            record["video_id"], data, total_duration, preferences, preferences_hash, cache_key, time.time(), mode
+        ))
+    finally:
+        pipeline.stage_timings_var.reset(token)
+    timings["total"] = time.perf_counter() - started
+
+    result = json.loads(response.body)
+    return {
+        "digest": output_digest(result["remove"]),
+        "skip_segments": len(result["remove"]),
+        "skip_percentage": round(result["skip_percentage"], 3),
+        "llm_calls": client.calls,
+        "llm_calls_recorded": len(record["llm_responses"]),
+        "stages": timings,
+    }
+
+
+def run(records: List[dict], repeat: int) -> dict:
+    client = ReplayGroqClient()
+    pipeline._providers["groq"] = client
+    results: Dict[str, dict] = {}
+    for _ in range(repeat):
+        reset_pipeline_state()
+        for i, record in enumerate(records):
+            key = f"{i:04d}:{record['video_id']}"
+            result = replay_record(record, client)
+            previous = results.get(key)
+            if previous is None:
+                results[key] = result
+                continue
+            # Keep the fastest run of each stage; outputs must not vary between passes
+            for stage, seconds in result["stages"].items():
+                previous["stages"][stage] = min(previous["stages"].get(stage, seconds), seconds)
+            if result["digest"] != previous["digest"]:
+                previous["nondeterministic"] = True
+
+    totals: Dict[str, float] = {}
+    for result in results.values():
+        for stage, seconds in result["stages"].items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+    matches_recording = sum(
+        1 for key, record in zip(results, records)
+        if record.get("output") and output_digest(record["output"]["skip_segments"]) == results[key]["digest"]
+    )
+    return {
+        "records": results,
+        "stage_totals": totals,
+        "matches_recording": matches_recording,
+        "llm_calls_missing": client.missing,
+    }
+
+
+def compare_baseline(summary: dict, baseline: dict, tolerance: float, min_seconds: float) -> List[str]:
+    failures = []
+    for key, result in summary["records"].items():
+        old = baseline["records"].get(key)
+        if old and old["digest"] != result["digest"]:
+            failures.append(
+                f"{key}: output changed ({old['skip_segments']} -> {result['skip_segments']} skip segments, "
+                f"{old['skip_percentage']}% -> {result['skip_percentage']}%)"
+            )
+    for stage, seconds in summary["stage_totals"].items():
+        old = baseline["stage_totals"].get(stage)
+        # Ignore stages too short to time reliably
+        if old and old > min_seconds and seconds > old * tolerance:
+            failures.append(f"stage {stage}: {seconds * 1000:.1f} ms vs baseline {old * 1000:.1f} ms (> {tolerance:.1f}x)")
+    return failures
+
+
+def synthesize(path: str, count: int) -> None:
+    """Write a corpus of synthetic records, for CI runs without recorded traffic"""
+    preferences = [
+        None,
+        {"default_categories": ["advertisements", "calls_to_action"], "custom_keywords": [], "custom_phrases": [],
+         "sensitivity": "medium", "enabled": True},
+        {"default_categories": ["filler_speech", "self_promotion"], "custom_keywords": ["giveaway"],
+         "custom_phrases": [], "sensitivity": "high", "enabled": True},
+    ]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        for i in range(count):
+            minutes = [1, 3, 10, 30, 90][i % 5]
+            cues = generate_transcript(minutes * 60, seed=i)
+            response = generate_llm_response(generate_llm_segments(cues, seed=i), seed=i)
+            record = build_record(
+                f"synthetic{i:04d}_{minutes}", preferences[i % len(preferences)], cues,
+                [{"model": None, "response": response}], {}, None
+            )
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    print(f"🧪 Wrote {count} synthetic records to {path}")
+
+
+def print_report(summary: dict, records: List[dict]) -> None:
+    print(f"\n📼 Replayed {len(summary['records'])} records")
+    recorded = sum(1 for record in records if record.get("output"))
+    if recorded:
+        print(f"   {summary['matches_recording']} of {recorded} outputs identical to the recording")
+    if summary["llm_calls_missing"]:
+        print(f"   ⚠️  {summary['llm_calls_missing']} LLM calls had no recorded response (answered with no segments)")
+    nondeterministic = [key for key, result in summary["records"].items() if result.get("nondeterministic")]
+    if nondeterministic:
+        print(f"   ⚠️  Outputs varied between passes: {', '.join(nondeterministic[:5])}")
+    print("\n⏱️  Stage totals (fastest pass per record):")
+    for stage, seconds in sorted(summary["stage_totals"].items(), key=lambda item: -item[1]):
+        print(f"   {stage:<24} {seconds * 1000:>10.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded request corpus offline")
+    parser.add_argument("corpus", help="JSONL corpus written by RECORD_CORPUS_PATH or --synthesize")
+    parser.add_argument("--synthesize", type=int, metavar="N", help="Write N synthetic records to the corpus and exit")
+    parser.add_argument("--limit", type=int, help="Replay only the first N records")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus; timings keep the fastest")
+    parser.add_argument("--save", help="Write the replay summary to this JSON baseline")
+    parser.add_argument("--compare", help="Compare against a previously saved baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed slowdown factor per stage vs baseline")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="Ignore stages whose baseline total is shorter")
+    parser.add_argument("--no-check", action="store_true", help="Report only, never fail")
+    args = parser.parse_args()
+
+    if args.synthesize:
+        synthesize(args.corpus, args.synthesize)
+        return
+
+    logging.disable(logging.INFO)
+    records = list(read_corpus(args.corpus))
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        print(f"❌ No records in {args.corpus}")
+        sys.exit(1)
+
+    print("🔁 YT_Skip Corpus Replay")
+    print("=" * 60)
+    summary = run(records, max(args.repeat, 1))
+    print_report(summary, records)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n💾 Saved baseline to {args.save}")
+
+    failures = []
+    if args.compare:
+        with open(args.compare) as f:
+            failures = compare_baseline(summary, json.load(f), args.tolerance, args.min_ms / 1000)
+
+    print("\n" + "=" * 60)
+    if failures:
+        print("❌ Replay differs from baseline:")
+        for failure in failures:
+            print(f"   • {failure}")
+        if not args.no_check:
+            sys.exit(1)
+    elif args.compare:
+        print("✅ Outputs identical and stage timings within tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Run a local multi-node cluster behind the consistent-hash router.
+
+Starts --nodes backend processes on consecutive ports after --port and the
+router (backend/router.py) on --port. All requests for a video_id land on the
+same node, so its cache is reused.
+
+With --demo, the script checks rebalancing instead of serving. It records the
+owner of --keys video ids, stops one node, and verifies that only that node's
+keys moved. It then restarts the node and verifies they all moved back.
+
+Usage:
+    python run_cluster.py --nodes 3 --port 8000
+    python run_cluster.py --nodes 4 --demo --keys 2000
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from typing import Dict, List
+
+import requests
+
+
+def start_process(args: List[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *args],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def start_node(port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "run-cluster-unused")
+    return start_process(["backend.app:app", "--host", "127.0.0.1", "--port", str(port)], env)
+
+
+def wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def wait_for_ring(router: str, size: int, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if len(requests.get(f"{router}/cluster", timeout=1).json()["ring"]) == size:
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f"ring did not reach {size} nodes within {timeout:.0f}s")
+
+
+def owners(router: str, keys: List[str]) -> Dict[str, str]:
+    session = requests.Session()
+    return {key: session.get(f"{router}/cluster/owner", params={"video_id": key}).json()["owner"] for key in keys}
+
+
+def run_demo(router: str, nodes: Dict[str, subprocess.Popen], keys: List[str]) -> bool:
+    before = owners(router, keys)
+    counts = {node: sum(1 for owner in before.values() if owner == node) for node in nodes}
+    print("📊 Keys per node:")
+    for node, count in counts.items():
+        print(f"   {node}: {count} ({count / len(keys):.1%})")
+
+    victim = list(nodes)[-1]
+    print(f"\n🛑 Stopping {victim}")
+    nodes[victim].terminate()
+    nodes[victim].wait()
+    wait_for_ring(router, len(nodes) - 1)
+    after = owners(router, keys)
+    moved = [key for key in keys if before[key] != after[key]]
+    only_victim = all(before[key] == victim for key in moved)
+    print(f"   {len(moved)} of {len(keys)} keys moved ({len(moved) / len(keys):.1%}), "
+          f"{'all' if only_victim else 'NOT all'} of them from the stopped node")
+
+    print(f"\n🔁 Restarting {victim}")
+    nodes[victim] = start_node(int(victim.rsplit(":", 1)[1]))
+    wait_for(f"{victim}/health")
+    wait_for_ring(router, len(nodes))
+    restored = owners(router, keys)
+    back = sum(1 for key in keys if restored[key] == before[key])
+    print(f"   {back} of {len(keys)} keys back on their original owner")
+    return only_victim and back == len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local multi-node cluster behind the consistent-hash router")
+    parser.add_argument("--nodes", type=int, default=3, help="Backend processes to start")
+    parser.add_argument("--port", type=int, default=8000, help="Router port; nodes use the following ports")
+    parser.add_argument("--mode", choices=["proxy", "redirect"], default="proxy")
+    parser.add_argument("--demo", action="store_true", help="Check rebalancing when a node leaves and rejoins, then exit")
+    parser.add_argument("--keys", type=int, default=1000, help="Video ids sampled by --demo")
+    args = parser.parse_args()
+
+    # Stop the child processes on SIGTERM too, not only on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    processes: Dict[str, subprocess.Popen] = {}
+    router_process = None
+    try:
+        for i in range(1, args.nodes + 1):
+            node = f"http://127.0.0.1:{args.port + i}"
+            processes[node] = start_node(args.port + i)
+        for node in processes:
+            wait_for(f"{node}/health")
+        print(f"🖥️  {args.nodes} nodes up: {', '.join(processes)}")
+
+        env = dict(os.environ)
+        env["CLUSTER_NODES"] = ",".join(processes)
+        env["ROUTER_MODE"] = args.mode
+        env.setdefault("ROUTER_HEALTH_INTERVAL_SECONDS", "0.5")
+        router_process = start_process(["backend.router:app", "--host", "127.0.0.1", "--port", str(args.port)], env)
+        router = f"http://127.0.0.1:{args.port}"
+        wait_for(f"{router}/cluster")
+        print(f"🔀 Router on {router} ({args.mode})")
+
+        if args.demo:
+            ok = run_demo(router, processes, [f"video{i:06d}" for i in range(args.keys)])
+            print(f"\n{'✅ Rebalancing moved only the affected keys' if ok else '❌ Unexpected key movement'}")
+            sys.exit(0 if ok else 1)
+
+        print("Press Ctrl-C to stop")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in [router_process, *processes.values()]:
+            if process is not None and process.poll() is None:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Production entrypoint: uvicorn tuned for throughput.
+
+    python serve.py
+
+Runs WEB_CONCURRENCY worker processes (default: 1) on the uvloop event loop and
+the httptools HTTP parser, falling back to asyncio/h11 when they are not installed.
+
+WARNING: workers share nothing in memory. With WEB_CONCURRENCY > 1, each one has
+its own result, transcript and LLM caches, preference profiles and admission
+limits, so hit rates drop and a profile_id registered with one worker is a 404 on
+another (clients re-register). Files are shared safely: SNAPSHOT_PATH,
+LLM_CACHE_PATH and FINGERPRINT_INDEX_PATH saves merge with what other workers
+wrote. Prefer one worker per container and the router (backend/router.py) to
+spread videos over containers; raise WEB_CONCURRENCY only for CPU-bound load.
+
+On SIGTERM or Ctrl-C, workers stop accepting connections and wait up to
+GRACEFUL_TIMEOUT_SECONDS for in-flight requests, including their LLM calls, to
+finish. The app's shutdown hooks then drain background jobs and persist caches.
+
+Settings (environment):
+    HOST=0.0.0.0  PORT=8000
+    WEB_CONCURRENCY=1                worker processes (see the warning above)
+    KEEPALIVE_TIMEOUT_SECONDS=75     idle keep-alive; keep above the load balancer's idle timeout
+    BACKLOG=2048                     pending connections queued by the kernel
+    GRACEFUL_TIMEOUT_SECONDS=90      drain window for in-flight requests on shutdown
+    ACCESS_LOG=false                 per-request access lines (request summaries are logged anyway)
+"""
+
+import os
+import importlib.util
+
+import uvicorn
+
+
+def env_bool(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+def has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def server_config() -> dict:
+    return {
+        "host": os.environ.get("HOST", "0.0.0.0"),
+        "port": int(os.environ.get("PORT", "8000")),
+        "workers": int(os.environ.get("WEB_CONCURRENCY", "1")),
+        "loop": "uvloop" if has_module("uvloop") else "asyncio",
+        "http": "httptools" if has_module("httptools") else "h11",
+        "timeout_keep_alive": int(os.environ.get("KEEPALIVE_TIMEOUT_SECONDS", "75")),
+        "backlog": int(os.environ.get("BACKLOG", "2048")),
+        "timeout_graceful_shutdown": int(os.environ.get("GRACEFUL_TIMEOUT_SECONDS", "90")),
+        # The app logs its own request summaries
+        "access_log": env_bool("ACCESS_LOG", "false"),
+        "log_level": os.environ.get("UVICORN_LOG_LEVEL", "info"),
+    }
+
+
+def main():
+    config = server_config()
+    print(
+        f"🚀 Serving backend.app on {config['host']}:{config['port']} with {config['workers']} worker(s), "
+        f"{config['loop']} loop, {config['http']} parser"
+    )
+    uvicorn.run("backend.app:app", **config)
+
+
+if __name__ == "__main__":
+    main()
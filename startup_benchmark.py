@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark for the backend.
+
+Measures, in fresh processes:
+  * import time of backend.app (what every new worker pays before serving)
+  * time until a uvicorn worker answers /health, and until /ready reports warm
+  * latency of the first /process_video request (with --video-id)
+
+Usage:
+    python startup_benchmark.py
+    python startup_benchmark.py --runs 5 --video-id dQw4w9WgXcQ
+    python startup_benchmark.py --no-warmup   # lazy providers only, no background warm-up
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+
+import requests
+
+IMPORT_SNIPPET = (
+    "import sys, time, json; t = time.perf_counter(); import backend.app; "
+    "print(json.dumps({'seconds': time.perf_counter() - t, "
+    "'groq_loaded': 'groq' in sys.modules, "
+    "'transcript_api_loaded': 'youtube_transcript_api' in sys.modules}))"
+)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def child_env(warmup: bool) -> dict:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "startup-benchmark-unused")
+    env["WARMUP_ON_STARTUP"] = "true" if warmup else "false"
+    return env
+
+
+def measure_import(warmup: bool) -> dict:
+    """Import backend.app in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        capture_output=True, text=True, check=True, env=child_env(warmup)
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def wait_for(url: str, deadline: float, expect_status: int = 200) -> float:
+    """Poll url until it returns expect_status, return the time it did"""
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == expect_status:
+                return time.perf_counter()
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not return {expect_status} in time")
+
+
+def measure_server(warmup: bool, video_id: str = None, timeout: float = 60) -> dict:
+    """Start a uvicorn worker and time /health, /ready and the first request"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port), "--log-level", "warning"],
+        env=child_env(warmup), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    result = {}
+    try:
+        deadline = started + timeout
+        result["listening"] = wait_for(f"{base_url}/health", deadline) - started
+        if video_id:
+            request_started = time.perf_counter()
+            response = requests.get(f"{base_url}/process_video", params={"video_id": video_id}, timeout=timeout)
+            result["first_request"] = time.perf_counter() - request_started
+            result["first_request_status"] = response.status_code
+        if warmup:
+            result["ready"] = wait_for(f"{base_url}/ready", deadline) - started
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return result
+
+
+def summarize(label: str, values: list) -> None:
+    if values:
+        print(f"   {label:<22} median {statistics.median(values) * 1000:8.1f} ms   "
+              f"min {min(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark for YT_Skip")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per measurement")
+    parser.add_argument("--video-id", help="Also time the first /process_video request for this video")
+    parser.add_argument("--no-warmup", action="store_true", help="Disable background provider warm-up")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for a worker to come up")
+    args = parser.parse_args()
+    warmup = not args.no_warmup
+
+    print("🚀 YT_Skip Cold Start Benchmark")
+    print("=" * 60)
+    print(f"🔥 Background warm-up: {'on' if warmup else 'off'}")
+
+    print("\n📦 Importing backend.app in fresh interpreters...")
+    imports = [measure_import(warmup) for _ in range(args.runs)]
+    summarize("import", [run["seconds"] for run in imports])
+    print(f"   groq imported eagerly: {imports[0]['groq_loaded']}, "
+          f"youtube_transcript_api imported eagerly: {imports[0]['transcript_api_loaded']}")
+
+    print("\n🌐 Starting uvicorn workers...")
+    servers = []
+    for run in range(args.runs):
+        try:
+            servers.append(measure_server(warmup, args.video_id, args.timeout))
+        except (TimeoutError, subprocess.SubprocessError) as e:
+            print(f"❌ Run {run + 1} failed: {e}")
+    summarize("listening (/health)", [run["listening"] for run in servers])
+    summarize("warm (/ready)", [run["ready"] for run in servers if "ready" in run])
+    summarize("first /process_video", [run["first_request"] for run in servers if "first_request" in run])
+    failed = [run["first_request_status"] for run in servers if run.get("first_request_status", 200) != 200]
+    if failed:
+        print(f"⚠️ First requests returned non-200 statuses: {failed}")
+
+
+if __name__ == "__main__":
+    main()
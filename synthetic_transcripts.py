@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Synthetic YouTube caption generator for offline benchmarking.
+
+Produces realistic caption streams (1 minute up to 12 hours) in the same
+shape as YouTubeTranscriptApi's fetch() output, with injected sponsor reads,
+filler speech and repeated content so the skip pipeline has work to do.
+"""
+
+import json
+import random
+import argparse
+from typing import List, Dict
+
+# Content vocabulary used to build "core" caption lines
+TOPIC_SUBJECTS = [
+    "the compiler", "this recipe", "the engine", "our budget", "the camera", "the database",
+    "this chord progression", "the new update", "the trail", "the experiment", "the boss fight",
+    "the garden bed", "this library", "the market", "the sensor", "the second draft"
+]
+TOPIC_VERBS = [
+    "handles", "changes", "breaks", "improves", "depends on", "controls", "replaces",
+    "explains", "measures", "reduces", "shows", "builds on"
+]
+TOPIC_OBJECTS = [
+    "the main loop", "the final result", "every single step", "the lighting", "the sauce",
+    "the memory layout", "the timing", "the second half", "the whole process", "the texture",
+    "the error rate", "the first layer", "the background noise", "the overall cost"
+]
+TOPIC_TAILS = [
+    "", "in a really interesting way", "which is why we start here", "so pay attention to this part",
+    "and you can see it right here", "at around 40 percent", "when the load goes up", "on every frame"
+]
+
+# Skippable content injected into the stream
+SPONSOR_LINES = [
+    "this video is sponsored by {brand}",
+    "today's sponsor is {brand} and they are awesome",
+    "use my discount code {code} for 20 percent off",
+    "check out the link in the description to try {brand}",
+    "{brand} is the easiest way to get started with a free trial",
+    "huge thanks to {brand} for sponsoring this video",
+    "that affiliate link helps support the channel",
+]
+SPONSOR_BRANDS = ["NordPeak", "SquareLoop", "BrightCell", "Skillhouse", "HelloGreens", "RaidBlade"]
+FILLER_LINES = [
+    "um so yeah", "uh you know", "like basically", "so um where was I", "you know what I mean",
+    "uh actually literally", "so yeah right", "um uh", "kind of sort of", "like um yeah"
+]
+CTA_LINES = [
+    "don't forget to like and subscribe", "hit the notification bell",
+    "smash that like button if you enjoyed this", "leave a comment down below",
+    "welcome back to the channel everyone", "thanks for watching see you next time",
+    "check out my merch link in description", "support me on patreon"
+]
+
+# Rough words-per-second rate of spoken captions
+WORDS_PER_SECOND = (2.0, 3.2)
+
+
+def _core_line(rng: random.Random) -> str:
+    line = f"{rng.choice(TOPIC_SUBJECTS)} {rng.choice(TOPIC_VERBS)} {rng.choice(TOPIC_OBJECTS)}"
+    tail = rng.choice(TOPIC_TAILS)
+    return f"{line} {tail}".strip()
+
+
+def _cue_duration(text: str, rng: random.Random) -> float:
+    words = max(len(text.split()), 1)
+    return round(max(1.0, min(words / rng.uniform(*WORDS_PER_SECOND), 7.0)), 3)
+
+
+def generate_transcript(
+    duration_seconds: float,
+    seed: int = 0,
+    sponsor_every: float = 600.0,
+    filler_rate: float = 0.08,
+    repetition_rate: float = 0.05,
+    cta_rate: float = 0.02
+) -> List[Dict]:
+    """Generate a caption stream covering roughly duration_seconds.
+
+    Returns a list of {"text", "start", "duration"} dicts, the same shape
+    YouTubeTranscriptApi returns from fetch().
+    """
+    rng = random.Random(seed)
+    cues: List[Dict] = []
+    t = 0.0
+    next_sponsor = min(rng.uniform(30.0, 90.0), duration_seconds * 0.3)
+
+    while t < duration_seconds:
+        # Sponsor reads come as contiguous blocks of 4-10 cues
+        if t >= next_sponsor:
+            brand = rng.choice(SPONSOR_BRANDS)
+            code = f"{brand.upper()[:5]}{rng.randint(10, 99)}"
+            for _ in range(rng.randint(4, 10)):
+                text = rng.choice(SPONSOR_LINES).format(brand=brand, code=code)
+                duration = _cue_duration(text, rng)
+                cues.append({"text": text, "start": round(t, 3), "duration": duration})
+                t += duration
+            next_sponsor = t + rng.uniform(sponsor_every * 0.7, sponsor_every * 1.3)
+            continue
+
+        roll = rng.random()
+        if roll < filler_rate:
+            text = rng.choice(FILLER_LINES)
+        elif roll < filler_rate + cta_rate:
+            text = rng.choice(CTA_LINES)
+        elif roll < filler_rate + cta_rate + repetition_rate and len(cues) > 10:
+            # Repeat a recent line, optionally with a repetition marker
+            text = rng.choice(cues[-50:])["text"]
+            if rng.random() < 0.5:
+                text = f"again {text}"
+        else:
+            text = _core_line(rng)
+
+        duration = _cue_duration(text, rng)
+        cues.append({"text": text, "start": round(t, 3), "duration": duration})
+        # Small gaps between cues, occasionally a longer pause
+        t += duration + (rng.uniform(2.0, 5.0) if rng.random() < 0.01 else rng.uniform(0.0, 0.3))
+
+    return cues
+
+
+def generate_llm_segments(cues: List[Dict], rate: float = 0.1, seed: int = 0) -> List[float]:
+    """Pick plausible LLM skip start times: all sponsor/filler cues plus a random sample"""
+    rng = random.Random(seed)
+    skippable = set(FILLER_LINES) | set(CTA_LINES)
+    segments = []
+    for cue in cues:
+        text = cue["text"]
+        if text in skippable or "sponsor" in text or "discount code" in text or rng.random() < rate * 0.25:
+            segments.append(round(cue["start"] + rng.uniform(0.0, cue["duration"]), 1))
+    return segments
+
+
+def generate_llm_response(segments: List[float], seed: int = 0, malformed: bool = True) -> str:
+    """Render segments the way the model sometimes returns them (units, trailing commas)"""
+    rng = random.Random(seed)
+    if not malformed:
+        return json.dumps({"segments": segments})
+    parts = []
+    for value in segments:
+        suffix = rng.choice(["", "", "s", "sec", "seconds"]) if rng.random() < 0.3 else ""
+        parts.append(f"{value}{suffix}")
+    return '{"segments": [' + ", ".join(parts) + ",],}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic YouTube caption stream")
+    parser.add_argument("--minutes", type=float, default=10.0, help="Stream length in minutes (1 to 720)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="Write JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    cues = generate_transcript(args.minutes * 60, seed=args.seed)
+    payload = json.dumps(cues, indent=None)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+        print(f"Wrote {len(cues)} cues ({args.minutes:.0f} min) to {args.output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: single uvicorn process vs the production launcher.
+
+Both setups serve the same corpus snapshot (SNAPSHOT_PATH) of synthetic videos
+with cached results, so every worker answers from its cache. No Groq or YouTube
+calls are made, and the numbers measure the serving stack itself: event loop,
+HTTP parser, workers and serialization. Requests are sent over keep-alive
+connections, with --concurrency in flight, for --duration seconds per setup.
+
+    single       uvicorn backend.app:app (asyncio loop, h11 parser, one process)
+    production   python serve.py (uvloop, httptools, WEB_CONCURRENCY workers)
+
+The load generator runs on the same machine, so compare setups against each
+other rather than against production numbers.
+
+Usage:
+    python throughput_benchmark.py
+    python throughput_benchmark.py --workers 4 --concurrency 64 --duration 20
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, List
+
+import httpx
+import requests
+
+os.environ.setdefault("GROQ_API_KEY", "throughput-benchmark-unused")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_snapshot(path: str, videos: int, minutes: float) -> List[str]:
+    """Write a snapshot with a transcript and a cached default-preferences result per video"""
+    import backend.app as pipeline
+    from backend.snapshot import write_snapshot
+    from synthetic_transcripts import generate_transcript, generate_llm_segments
+
+    transcripts, results, video_ids = {}, {}, []
+    now = time.time()
+    for i in range(videos):
+        video_id = f"bench{i:04d}_{minutes:g}"
+        cues = generate_transcript(minutes * 60, seed=i)
+        data = [pipeline.TranscriptionResult(**cue) for cue in cues]
+        skip_segments = pipeline.create_enhanced_skip_segments(
+            data, pipeline.ImportantSegments(segments=generate_llm_segments(cues, seed=i)), None
+        )
+        cache_key = pipeline.get_cache_key(
+            video_id, pipeline.calculate_transcript_hash(data), pipeline.compile_preferences(None).preferences_hash
+        )
+        transcripts[video_id] = {"timestamp": now, "cues": [(seg.text, seg.start, seg.duration) for seg in data]}
+        results[video_id] = {cache_key: {
+            "skip_segments": [seg.model_dump() for seg in skip_segments],
+            "skip_percentage": pipeline.compute_skip_percentage(skip_segments, data[-1].start + data[-1].duration),
+            "timestamp": now
+        }}
+        video_ids.append(video_id)
+    write_snapshot(path, transcripts, results)
+    return video_ids
+
+
+def start_server(setup: str, port: int, workers: int, snapshot_path: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "SNAPSHOT_PATH": snapshot_path,
+        "WARMUP_ON_STARTUP": "false",
+        "FINGERPRINT_INDEX_ENABLED": "false",
+    })
+    if setup == "single":
+        command = [
+            sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port),
+            "--loop", "asyncio", "--http", "h11", "--log-level", "warning"
+        ]
+    else:
+        env.update({"HOST": "127.0.0.1", "PORT": str(port), "WEB_CONCURRENCY": str(workers),
+                    "UVICORN_LOG_LEVEL": "warning"})
+        command = [sys.executable, "serve.py"]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for(url: str, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+async def generate_load(base_url: str, video_ids: List[str], concurrency: int, duration: float) -> Dict[str, object]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def user(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get("/process_video", params={"video_id": video_ids[i % len(video_ids)]})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+                i += concurrency
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(offset) for offset in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p99": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+    }
+
+
+def run_setup(setup: str, args, snapshot_path: str, video_ids: List[str]) -> Dict[str, object]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(setup, port, args.workers, snapshot_path)
+    try:
+        wait_for(f"{base_url}/health")
+        # Touch every video once per worker so the first measured requests aren't cold
+        asyncio.run(generate_load(base_url, video_ids, args.concurrency, 1.0))
+        return asyncio.run(generate_load(base_url, video_ids, args.concurrency, args.duration))
+    finally:
+        server.terminate()
+        server.wait(timeout=args.workers * 10 + 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the single-process setup vs the production launcher")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="WEB_CONCURRENCY for serve.py")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per setup")
+    parser.add_argument("--videos", type=int, default=50, help="Distinct cached videos requested")
+    parser.add_argument("--minutes", type=float, default=10, help="Transcript length of each video")
+    parser.add_argument("--setups", default="single,production", help="Comma-separated setups to run")
+    args = parser.parse_args()
+
+    print("🏎️  YT_Skip Throughput Benchmark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "bench_snapshot.bin")
+        video_ids = build_snapshot(snapshot_path, args.videos, args.minutes)
+        # Importing backend.app configured logging; keep httpx from logging every request
+        logging.disable(logging.INFO)
+        print(f"📦 Snapshot with {len(video_ids)} cached {args.minutes:g}-minute videos")
+        print(f"🔧 {args.concurrency} concurrent requests, {args.duration:g}s per setup, "
+              f"{args.workers} production worker(s)\n")
+
+        results = {}
+        for setup in args.setups.split(","):
+            results[setup] = result = run_setup(setup, args, snapshot_path, video_ids)
+            print(f"   {setup:<12} {result['rps']:8.1f} req/s   p50 {result['p50'] * 1000:7.1f} ms   "
+                  f"p99 {result['p99'] * 1000:7.1f} ms   errors {result['errors']}")
+
+    if "single" in results and "production" in results and results["single"]["rps"]:
+        speedup = results["production"]["rps"] / results["single"]["rps"]
+        print(f"\n📈 Production launcher: {speedup:.2f}x the single-process throughput")
+
+
+if __name__ == "__main__":
+    main()